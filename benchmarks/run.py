@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the library's own overhead and its scaling with concurrency
+against a local stub of the Podio API.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --compare results.json
+
+Each benchmark reports requests (or operations) per second, p50/p99
+latency and client CPU time per request. With ``--compare``, the run
+fails if any benchmark got slower than the baseline by more than
+``--tolerance``.
+"""
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pypodio2 import client, codec, transport
+from pypodio2.encode import MultipartParam, multipart_encode
+from pypodio2.retry import RetryPolicy
+
+from .stub_server import StubProcess, make_item
+
+cpu_time = getattr(time, 'process_time', time.clock if hasattr(time, 'clock') else time.time)
+timer = getattr(time, 'perf_counter', time.time)
+
+
+def percentile(latencies, fraction):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(name, operation, count, concurrency=1, **extra):
+    """Runs ``operation(i)`` for i in range(count) on ``concurrency`` threads."""
+    def timed(i):
+        # Returns (latency, succeeded); the threads share no counters.
+        started = timer()
+        try:
+            operation(i)
+        except Exception:
+            return timer() - started, False
+        return timer() - started, True
+
+    cpu_started, started = cpu_time(), timer()
+    if concurrency == 1:
+        outcomes = [timed(i) for i in range(count)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(timed, range(count)))
+    elapsed, cpu = timer() - started, cpu_time() - cpu_started
+    latencies = [latency for latency, _ in outcomes]
+    errors = sum(1 for _, succeeded in outcomes if not succeeded)
+
+    result = {'name': name, 'concurrency': concurrency, 'count': count,
+              'per_second': count / elapsed,
+              'p50_ms': percentile(latencies, 0.5) * 1000,
+              'p99_ms': percentile(latencies, 0.99) * 1000,
+              'cpu_ms_per_op': cpu / count * 1000,
+              'errors': errors}
+    result.update(extra)
+    print('%-28s c=%-3d %9.1f/s  p50 %7.2fms  p99 %7.2fms  cpu %6.3fms/op  errors %d' % (
+        name, concurrency, result['per_second'], result['p50_ms'], result['p99_ms'],
+        result['cpu_ms_per_op'], result['errors']))
+    return result
+
+
+def make_client(url, pool_size, json_codec=None):
+    pool = transport.ConnectionPool(maxsize=pool_size)
+    return client.Client(transport.HttpTransport(
+        url, headers_factory=dict, pool=pool, codec=json_codec,
+        retry_policy=RetryPolicy(backoff=0.01, jitter=False)))
+
+
+def bench_transport(url, args):
+    results = []
+    for concurrency in args.concurrency:
+        c = make_client(url, concurrency)
+        results.append(measure('transport.get', lambda i: c.Item.find(i + 1),
+                               args.requests, concurrency))
+    return results
+
+
+def bench_pagination(url, args):
+    results = []
+    for prefetch in (False, True):
+        c = make_client(url, 2)
+
+        def iterate(i):
+            for _ in c.Item.iter_filter(1, limit=args.page_size, prefetch=prefetch):
+                pass
+        name = 'pagination.iter_filter%s' % ('.prefetch' if prefetch else '')
+        results.append(measure(name, iterate, args.scans, items=args.items))
+    return results
+
+
+def bench_multipart(url, args):
+    payload = b'x' * args.upload_size
+
+    def encode(i):
+        blocks, headers = multipart_encode([MultipartParam(
+            'source', filename='data.bin', fileobj=io.BytesIO(payload),
+            filesize=len(payload))])
+        for _ in blocks:
+            pass
+    results = [measure('multipart.encode', encode, args.uploads, bytes=len(payload))]
+    for concurrency in args.concurrency:
+        c = make_client(url, concurrency)
+        results.append(measure('multipart.upload',
+                               lambda i: c.Files.create('data.bin', payload),
+                               args.uploads, concurrency, bytes=len(payload)))
+    return results
+
+
+def bench_json(url, args):
+    data = json.dumps({'total': args.page_size, 'filtered': args.page_size,
+                       'items': [make_item(i) for i in range(args.page_size)]}).encode('utf-8')
+    codecs = [('stdlib', codec.STDLIB_CODEC)]
+    if codec.ORJSON_CODEC is not None:
+        codecs.append(('orjson', codec.ORJSON_CODEC))
+    return [measure('json.loads.%s' % name, lambda i: json_codec.loads(data),
+                    args.decodes, bytes=len(data))
+            for name, json_codec in codecs]
+
+
+BENCHMARKS = {
+    'transport': bench_transport,
+    'pagination': bench_pagination,
+    'multipart': bench_multipart,
+    'json': bench_json,
+}
+
+
+def compare(results, baseline, tolerance):
+    """Returns descriptions of the benchmarks slower than in ``baseline``."""
+    previous = dict(((r['name'], r['concurrency']), r) for r in baseline['results'])
+    regressions = []
+    for result in results:
+        before = previous.get((result['name'], result['concurrency']))
+        if before is None:
+            continue
+        if result['per_second'] < before['per_second'] * (1 - tolerance):
+            regressions.append('%s c=%d: %.1f/s, was %.1f/s' % (
+                result['name'], result['concurrency'], result['per_second'],
+                before['per_second']))
+        if result['p99_ms'] > before['p99_ms'] * (1 + tolerance):
+            regressions.append('%s c=%d: p99 %.2fms, was %.2fms' % (
+                result['name'], result['concurrency'], result['p99_ms'], before['p99_ms']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('benchmarks', nargs='*',
+                        help='Benchmarks to run, from %s (default: all)' % ', '.join(
+                            sorted(BENCHMARKS)))
+    parser.add_argument('--concurrency', type=lambda s: [int(n) for n in s.split(',')],
+                        default=[1, 4, 16], help='Comma-separated thread counts')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--items', type=int, default=2000,
+                        help='Items the stub filter endpoint pages over')
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--scans', type=int, default=5)
+    parser.add_argument('--uploads', type=int, default=50)
+    parser.add_argument('--upload-size', type=int, default=1024 * 1024)
+    parser.add_argument('--decodes', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds the stub waits before answering')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of stub responses that are 503s')
+    parser.add_argument('--rate-limit', type=int, default=5000,
+                        help='Budget the stub reports in its rate limit headers')
+    parser.add_argument('--gzip', action='store_true',
+                        help='Have the stub gzip its responses')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error('unknown benchmark %r' % name)
+
+    results = []
+    with StubProcess(latency=args.latency, error_rate=args.error_rate,
+                     rate_limit=args.rate_limit, total_items=args.items,
+                     gzip=args.gzip) as stub:
+        for name in args.benchmarks or sorted(BENCHMARKS):
+            results.extend(BENCHMARKS[name](stub.url, args))
+
+    report = {'python': platform.python_version(),
+              'implementation': platform.python_implementation(),
+              'platform': platform.platform(),
+              'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+              'settings': dict((k, v) for k, v in vars(args).items()
+                               if k not in ('output', 'compare')),
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
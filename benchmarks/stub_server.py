@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+A local stand-in for the Podio API serving canned payloads.
+
+It answers the handful of endpoints the benchmarks use, keeps connections
+alive like the real API, and can add latency, rate limit headers and
+injected errors to every response.
+"""
+import gzip
+import io
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+def make_item(item_id):
+    return {
+        'item_id': item_id,
+        'app_item_id': item_id,
+        'app': {'app_id': 1, 'config': {'name': 'Projects', 'item_name': 'Project'}},
+        'title': 'Project %d' % item_id,
+        'last_edit_on': '2016-01-01 00:00:00',
+        'fields': [
+            {'field_id': 10, 'external_id': 'title', 'type': 'text', 'label': 'Title',
+             'values': [{'value': 'Project %d' % item_id}]},
+            {'field_id': 11, 'external_id': 'status', 'type': 'category', 'label': 'Status',
+             'values': [{'value': {'id': 2, 'text': 'Active', 'color': 'DCEBD8'}}]},
+            {'field_id': 12, 'external_id': 'owner', 'type': 'contact', 'label': 'Owner',
+             'values': [{'value': {'profile_id': 7, 'user_id': 8, 'name': 'Ann Example',
+                                   'avatar': 123, 'link': 'https://podio.com/users/8'}}]},
+            {'field_id': 13, 'external_id': 'budget', 'type': 'money', 'label': 'Budget',
+             'values': [{'value': '1500.0000', 'currency': 'EUR'}]},
+            {'field_id': 14, 'external_id': 'notes', 'type': 'text', 'label': 'Notes',
+             'values': [{'value': 'Lorem ipsum dolor sit amet. ' * 10}]},
+        ],
+    }
+
+
+class StubConfig(object):
+    """
+    :param latency: Seconds to wait before answering each request.
+    :param error_rate: Fraction of requests answered with 503.
+    :param rate_limit: Budget reported in the rate limit headers. Every
+                       request takes one from it; none are refused.
+    :param total_items: Number of items the filter endpoint pages over.
+    :param gzip: Gzip responses for clients that accept it.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, rate_limit=5000, total_items=2000,
+                 seed=0, gzip=False):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.total_items = total_items
+        self.gzip = gzip
+        self.remaining = rate_limit
+        self.requests = 0
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; don't let Nagle's algorithm
+    # hold the body back for a delayed ACK.
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        self._respond()
+
+    def do_PUT(self):
+        self._respond()
+
+    def do_DELETE(self):
+        self._respond()
+
+    def _respond(self):
+        config = self.server.config
+        length = int(self.headers.get('content-length') or 0)
+        body = self.rfile.read(length) if length else b''
+        with config.lock:
+            config.requests += 1
+            config.remaining = max(config.remaining - 1, 0)
+            remaining = config.remaining
+            failed = config.random.random() < config.error_rate
+        if config.latency:
+            time.sleep(config.latency)
+        if failed:
+            status, payload = 503, {'error': 'unavailable'}
+        else:
+            status, payload = 200, self._payload(body)
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if config.gzip and 'gzip' in (self.headers.get('accept-encoding') or ''):
+            data = _gzip(data)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('X-Rate-Limit-Limit', str(config.rate_limit))
+        self.send_header('X-Rate-Limit-Remaining', str(remaining))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _payload(self, body):
+        path = self.path.split('?', 1)[0]
+        match = re.match(r'^/item/(\d+)$', path)
+        if match:
+            return make_item(int(match.group(1)))
+        if re.match(r'^/item/app/\d+/filter/$', path):
+            attributes = json.loads(body.decode('utf-8') or '{}')
+            offset = attributes.get('offset', 0)
+            limit = attributes.get('limit', 30)
+            total = self.server.config.total_items
+            return {'total': total, 'filtered': total,
+                    'items': [make_item(i) for i in
+                              range(offset + 1, min(offset + limit, total) + 1)]}
+        if path == '/file/':
+            return {'file_id': 1, 'size': len(body)}
+        return {}
+
+
+def _gzip(data):
+    out = io.BytesIO()
+    with gzip.GzipFile(fileobj=out, mode='wb', compresslevel=6) as f:
+        f.write(data)
+    return out.getvalue()
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StubServer(object):
+    """Runs the stub on a free local port in a background thread."""
+
+    def __init__(self, config=None):
+        self.config = config or StubConfig()
+        self.httpd = _ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.httpd.config = self.config
+        self.url = 'http://127.0.0.1:%d' % self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,))
+        self._thread.daemon = True
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _serve(config_kwargs, urls, stop):
+    with StubServer(StubConfig(**config_kwargs)) as server:
+        urls.put(server.url)
+        stop.wait()
+
+
+class StubProcess(object):
+    """
+    Runs a StubServer in a child process, so its CPU time is not counted
+    against the client being measured.
+    """
+
+    def __init__(self, **config_kwargs):
+        self._urls = multiprocessing.Queue()
+        self._stop = multiprocessing.Event()
+        self._process = multiprocessing.Process(target=_serve,
+                                                args=(config_kwargs, self._urls, self._stop))
+        self._process.daemon = True
+        self.url = None
+
+    def __enter__(self):
+        self._process.start()
+        self.url = self._urls.get(timeout=10)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._process.join(5)
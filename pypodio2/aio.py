@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio support for pypodio2.
+
+AsyncClient exposes exactly the same areas as Client, but every area
+method returns an awaitable instead of blocking::
+
+    client = api.AsyncOAuthClient(client_id, client_secret, login, password)
+    items = await asyncio.gather(*[client.Item.find(i) for i in item_ids])
+    await client.close()
+
+Requires Python 3.5+ and aiohttp.
+"""
+import asyncio
+
+from .client import Client
+from .retry import RETRYABLE_ERRORS
+from .transport import HttpTransport, refresh_headers
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+DEFAULT_CONNECTION_LIMIT = 100
+
+if aiohttp is not None:
+    _ASYNC_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+else:
+    _ASYNC_ERRORS = (asyncio.TimeoutError,)
+
+
+class AsyncResponse(dict):
+    """
+    Mimics httplib2.Response: a dict of lower-cased response headers with
+    a ``status`` attribute, so the regular response handlers work unchanged.
+    """
+
+    def __init__(self, status, headers):
+        super(AsyncResponse, self).__init__((k.lower(), v) for k, v in headers.items())
+        self.status = status
+
+
+class _ExecutorIterator(object):
+    """
+    Iterates a blocking iterable, such as a multipart body reading from a
+    file, in the default executor so the event loop never waits on it.
+    """
+
+    def __init__(self, iterable, loop):
+        self._iterator = iter(iterable)
+        self._loop = loop
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        block = await self._loop.run_in_executor(None, next, self._iterator, None)
+        if block is None:
+            raise StopAsyncIteration
+        return block
+
+
+class AsyncSingleFlight(object):
+    """
+    SingleFlight for coroutines: callers awaiting a key that is already in
+    flight share that call's result instead of starting their own.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, func):
+        call = self._calls.get(key)
+        if call is None:
+            call = self._calls[key] = asyncio.ensure_future(func())
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+        # A cancelled caller must not cancel the call the others wait for.
+        return await asyncio.shield(call)
+
+    def in_flight(self):
+        """The number of calls currently running."""
+        return len(self._calls)
+
+
+class AsyncHttpTransport(HttpTransport):
+    """
+    Non-blocking transport backed by a single aiohttp session. Requests are
+    built exactly like HttpTransport's, but ``request`` is a coroutine.
+    Any extra keyword arguments (``hooks``, ``codec``, ``single_flight``,
+    ...) are passed on to HttpTransport. ``send_stream`` (file uploads) is a
+    coroutine too; ``open_stream`` (file downloads) stays blocking.
+    """
+    is_async = True
+
+    def __init__(self, url, headers_factory, session=None, limit=DEFAULT_CONNECTION_LIMIT,
+                 single_flight=False, **transport_options):
+        super(AsyncHttpTransport, self).__init__(url, headers_factory, **transport_options)
+        self._single_flight = AsyncSingleFlight() if single_flight else None
+        self._session = session
+        self._limit = limit
+
+    def _get_session(self):
+        if self._session is None:
+            if aiohttp is None:
+                raise ImportError('AsyncHttpTransport requires aiohttp')
+            connector = aiohttp.TCPConnector(limit=self._limit)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def request(self, method, attribute_stack, params):
+        params = dict(params)
+        retry = params.pop('retry', self._retry_policy)
+        # The headers factory may block on a token refresh.
+        loop = asyncio.get_event_loop()
+        headers = await loop.run_in_executor(None, self._headers_factory)
+        url, body, headers, handler = self.prepare_request(method, attribute_stack, params,
+                                                           headers=headers)
+        cached = self._cached(method, url, headers)
+        if cached is not None:
+            return handler(*cached)
+
+        if self._single_flight is not None and method == 'GET':
+            key = (url, headers.get('authorization'), handler)
+            return await self._single_flight.do(
+                key, lambda: self._perform(method, url, body, headers, handler, retry))
+        return await self._perform(method, url, body, headers, handler, retry)
+
+    async def _perform(self, method, url, body, headers, handler, retry):
+        with self._hooked(method, url, body) as info:
+            return await self._attempt(method, url, body, headers, handler, retry, info)
+
+    async def _attempt(self, method, url, body, headers, handler, retry, info):
+        attempt = 0
+        reauthorized = False
+        while True:
+            if info is not None:
+                info.retries = attempt
+            try:
+                response, data = await self._send(url, method, body, headers)
+                if info is not None:
+                    info.record_response(response, data)
+            except RETRYABLE_ERRORS + _ASYNC_ERRORS as e:
+                if not retry or not retry.should_retry(method, attempt, error=e):
+                    raise
+                await asyncio.sleep(retry.delay(attempt))
+            else:
+                if response.status == 401 and not reauthorized:
+                    loop = asyncio.get_event_loop()
+                    if await loop.run_in_executor(None, refresh_headers, self._headers_factory,
+                                                  headers):
+                        reauthorized = True
+                        headers = dict(headers)
+                        headers.update(await loop.run_in_executor(None,
+                                                                  self._headers_factory))
+                        continue
+                if not retry or not retry.should_retry(method, attempt, response=response):
+                    self._remember(method, url, headers, response, data)
+                    return handler(response, data)
+                await asyncio.sleep(retry.delay(attempt, response))
+            attempt += 1
+
+    async def _send(self, url, method, body, headers):
+        session = self._get_session()
+        if self._rate_limiter is not None:
+            delay = self._rate_limiter.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        async with session.request(method, url, data=body, headers=headers) as resp:
+            data = await resp.read()
+            response = AsyncResponse(resp.status, resp.headers)
+        if self._rate_limiter is not None:
+            self._rate_limiter.update(response)
+        return response, data
+
+    async def send_stream(self, method, url, body, headers=None, handler=None):
+        """
+        Like HttpTransport.send_stream: sends ``body``, an iterable of byte
+        blocks, as it is produced. The blocks are pulled in an executor.
+        A streamed body can't be sent twice, so the request is not retried.
+        """
+        loop = asyncio.get_event_loop()
+        request_headers = await loop.run_in_executor(None, self._headers_factory)
+        request_headers.update(headers or {})
+        url = self._url_template % {'domain': self._api_url, 'generated_url': url[1:]}
+        with self._hooked(method, url, body) as info:
+            if info is not None and not info.request_bytes:
+                lengths = [v for k, v in request_headers.items() if k.lower() == 'content-length']
+                info.request_bytes = int(lengths[0]) if lengths else 0
+            response, data = await self._send(url, method, _ExecutorIterator(body, loop),
+                                              request_headers)
+            if info is not None:
+                info.record_response(response, data)
+            return (handler or self._default_handler)(response, data)
+
+    def then(self, result, callback):
+        async def chained():
+            return callback(await result)
+        return chained()
+
+    def finally_call(self, result, callback):
+        async def guarded():
+            try:
+                return await result
+            finally:
+                callback()
+        return guarded()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncClient(Client):
+    """
+    The asynchronous Podio API client. Callers should use the factory
+    methods in pypodio2.api (AsyncOAuthClient and friends) to create
+    instances.
+    """
+
+    async def close(self):
+        await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
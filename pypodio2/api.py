@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from . import transport, client
+from . import transport, client, ratelimit, retry
 
 
 def build_headers(authorization_headers, user_agent):
@@ -10,28 +10,75 @@ def build_headers(authorization_headers, user_agent):
 
 
 def OAuthClient(api_key, api_secret, login, password, user_agent=None,
-                domain="https://api.podio.com"):
+                domain="https://api.podio.com", token_store=None, **transport_options):
     auth = transport.OAuthAuthorization(login, password,
-                                        api_key, api_secret, domain)
-    return AuthorizingClient(domain, auth, user_agent=user_agent)
+                                        api_key, api_secret, domain, token_store)
+    return AuthorizingClient(domain, auth, user_agent=user_agent, **transport_options)
 
 
 def OAuthRefreshTokenClient(client_id, client_secret, refresh_token, user_agent=None,
-                            domain="https://api.podio.com"):
+                            domain="https://api.podio.com", token_store=None,
+                            **transport_options):
     auth = transport.OAuthRefreshTokenAuthorization(client_id, client_secret,
-                                                    refresh_token, domain)
-    return AuthorizingClient(domain, auth, user_agent=user_agent)
+                                                    refresh_token, domain, token_store)
+    return AuthorizingClient(domain, auth, user_agent=user_agent, **transport_options)
 
 
 def OAuthAppClient(client_id, client_secret, app_id, app_token, user_agent=None,
-                   domain="https://api.podio.com"):
+                   domain="https://api.podio.com", token_store=None, **transport_options):
     auth = transport.OAuthAppAuthorization(app_id, app_token,
-                                           client_id, client_secret, domain)
+                                           client_id, client_secret, domain, token_store)
 
-    return AuthorizingClient(domain, auth, user_agent=user_agent)
+    return AuthorizingClient(domain, auth, user_agent=user_agent, **transport_options)
 
 
-def AuthorizingClient(domain, auth, user_agent=None):
-    """Creates a Podio client using an auth object."""
-    http_transport = transport.HttpTransport(domain, build_headers(auth, user_agent))
+def AuthorizingClient(domain, auth, user_agent=None, **transport_options):
+    """
+    Creates a Podio client using an auth object. Any extra keyword arguments
+    are passed on to HttpTransport.
+    """
+    transport_options.setdefault('rate_limiter', ratelimit.RateLimiter())
+    transport_options.setdefault('retry_policy', retry.RetryPolicy())
+    http_transport = transport.HttpTransport(domain, build_headers(auth, user_agent),
+                                             **transport_options)
     return client.Client(http_transport)
+
+
+def AsyncOAuthClient(api_key, api_secret, login, password, user_agent=None,
+                     domain="https://api.podio.com", token_store=None,
+                     **transport_options):
+    auth = transport.OAuthAuthorization(login, password,
+                                        api_key, api_secret, domain, token_store)
+    return AsyncAuthorizingClient(domain, auth, user_agent=user_agent,
+                                  **transport_options)
+
+
+def AsyncOAuthRefreshTokenClient(client_id, client_secret, refresh_token, user_agent=None,
+                                 domain="https://api.podio.com", token_store=None,
+                                 **transport_options):
+    auth = transport.OAuthRefreshTokenAuthorization(client_id, client_secret,
+                                                    refresh_token, domain, token_store)
+    return AsyncAuthorizingClient(domain, auth, user_agent=user_agent,
+                                  **transport_options)
+
+
+def AsyncOAuthAppClient(client_id, client_secret, app_id, app_token, user_agent=None,
+                        domain="https://api.podio.com", token_store=None,
+                        **transport_options):
+    auth = transport.OAuthAppAuthorization(app_id, app_token,
+                                           client_id, client_secret, domain, token_store)
+    return AsyncAuthorizingClient(domain, auth, user_agent=user_agent,
+                                  **transport_options)
+
+
+def AsyncAuthorizingClient(domain, auth, user_agent=None, **transport_options):
+    """
+    Creates an asyncio Podio client using an auth object. The OAuth grant
+    itself still happens synchronously, once, when ``auth`` is built.
+    """
+    from . import aio
+    transport_options.setdefault('rate_limiter', ratelimit.RateLimiter())
+    transport_options.setdefault('retry_policy', retry.RetryPolicy())
+    http_transport = aio.AsyncHttpTransport(domain, build_headers(auth, user_agent),
+                                            **transport_options)
+    return aio.AsyncClient(http_transport)
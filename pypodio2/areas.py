@@ -1,11 +1,36 @@
 # -*- coding: utf-8 -*-
-import json
+import mimetypes
+import os
+import time
+from collections import namedtuple
+
+from .concurrency import DEFAULT_MAX_WORKERS, imap
+from .encode import MultipartParam, multipart_encode
+from .models import ItemRecord, typed_items
+from .pagination import iter_records
+from .schema import AppSchema
+from .transport import TransportException
 
 try:
     from urllib.parse import urlencode
 except ImportError:
     from urllib import urlencode
 
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+# Request bodies may be passed as a dict, or already serialized to JSON.
+JSON_BODY_TYPES = (dict, bytes, string_types)
+
+RANGE_NOT_SATISFIABLE = 416
+PARTIAL_CONTENT = 206
+
+# Outcome of one record in Item.bulk_create/bulk_update: ``index`` is the
+# record's position in the input, ``error`` the exception it failed with.
+BulkResult = namedtuple('BulkResult', ['index', 'item_id', 'error'])
+
 
 class Area(object):
     """Represents a Podio Area"""
@@ -13,6 +38,24 @@ class Area(object):
     def __init__(self, transport):
         self.transport = transport
 
+    def require_blocking(self, name, alternative):
+        """
+        Raises TypeError for helpers that drive several requests themselves
+        and so can't work on an asynchronous transport.
+        """
+        if self.transport.is_async:
+            raise TypeError('%s.%s needs a blocking client; on an AsyncClient, %s'
+                            % (type(self).__name__, name, alternative))
+
+    def dumps(self, attributes):
+        """
+        Serializes a request body with the transport's JSON codec. Bodies
+        that are already serialized (str or bytes) are passed through.
+        """
+        if isinstance(attributes, (bytes, string_types)):
+            return attributes
+        return self.transport.codec.dumps(attributes)
+
     @staticmethod
     def sanitize_id(item_id):
         if isinstance(item_id, int):
@@ -49,9 +92,9 @@ class Embed(Area):
         super(Embed, self).__init__(*args, **kwargs)
 
     def create(self, attributes):
-        if type(attributes) != dict:
+        if not isinstance(attributes, JSON_BODY_TYPES):
             return ApiErrorException('Must be of type dict')
-        attributes = json.dumps(attributes)
+        attributes = self.dumps(attributes)
         return self.transport.POST(url='/embed/', body=attributes, type='application/json')
 
 
@@ -61,15 +104,23 @@ class Contact(Area):
         super(Contact, self).__init__(*args, **kwargs)
 
     def create(self, space_id, attributes):
-        if type(attributes) != dict:
+        if not isinstance(attributes, JSON_BODY_TYPES):
             return ApiErrorException('Must be of type dict')
-        attributes = json.dumps(attributes)
+        attributes = self.dumps(attributes)
         return self.transport.POST(url='/contact/space/%d/' % space_id, body=attributes,
                                    type='application/json')
 
     def get_contacts(self, **kwargs):
         return self.transport.GET(url='/contact/', **kwargs)
 
+    def iter_contacts(self, limit=100, prefetch=False, **kwargs):
+        """Lazily yields every contact, fetching ``limit`` at a time."""
+        self.require_blocking('iter_contacts', 'page with offset and limit instead')
+
+        def fetch_page(offset, limit):
+            return self.get_contacts(offset=offset, limit=limit, **kwargs)
+        return iter_records(fetch_page, limit, prefetch=prefetch)
+
 
 class Search(Area):
 
@@ -77,34 +128,98 @@ class Search(Area):
         super(Search, self).__init__(*args, **kwargs)
 
     def searchApp(self, app_id, attributes):
-        if type(attributes) != dict:
+        if not isinstance(attributes, JSON_BODY_TYPES):
             return ApiErrorException('Must be of type dict')
-        attributes = json.dumps(attributes)
+        attributes = self.dumps(attributes)
         return self.transport.POST(url='/search/app/%d/' % app_id, body=attributes,
                                    type='application/json')
 
 
 class Item(Area):
-    def find(self, item_id, basic=False, **kwargs):
+    def find(self, item_id, basic=False, typed=False, **kwargs):
         """
         Get item
         
         :param item_id: Item ID
         :param basic: ?
+        :param typed: Return a compact ItemRecord instead of a dict
         :type item_id: int
         :return: Item info
         :rtype: dict
         """
         if basic:
-            return self.transport.GET(url='/item/%d/basic' % item_id)
-        return self.transport.GET(kwargs, url='/item/%d' % item_id)
-
-    def filter(self, app_id, attributes, **kwargs):
-        if not isinstance(attributes, dict):
-            raise TypeError('Must be of type dict')
-        attributes = json.dumps(attributes)
-        return self.transport.POST(url="/item/app/%d/filter/" % app_id, body=attributes,
-                                   type="application/json", **kwargs)
+            result = self.transport.GET(url='/item/%d/basic' % item_id)
+        else:
+            result = self.transport.GET(kwargs, url='/item/%d' % item_id)
+        if typed:
+            return self.transport.then(result, ItemRecord)
+        return result
+
+    def filter(self, app_id, attributes, typed=False, **kwargs):
+        """
+        :param typed: Return the matching items as compact ItemRecords
+        """
+        if not isinstance(attributes, JSON_BODY_TYPES):
+            raise TypeError('Must be a dict or serialized JSON')
+        attributes = self.dumps(attributes)
+        result = self.transport.POST(url="/item/app/%d/filter/" % app_id, body=attributes,
+                                     type="application/json", **kwargs)
+        if typed:
+            return self.transport.then(result, typed_items)
+        return result
+
+    def iter_filter(self, app_id, attributes=None, limit=500, prefetch=False, **kwargs):
+        """
+        Lazily yields every item matching ``attributes``, fetching ``limit``
+        items per request. Any limit/offset in ``attributes`` is ignored.
+
+        :param prefetch: Request the next page while the current one is
+                         being consumed.
+        :param typed: Yield compact ItemRecords instead of dicts.
+        """
+        self.require_blocking('iter_filter', 'page with offset and limit instead')
+        attributes = dict(attributes or {})
+        counts = {}
+
+        def fetch_page(offset, limit):
+            attributes.update(offset=offset, limit=limit)
+            result = self.filter(app_id, attributes, **kwargs)
+            counts['filtered'] = result.get('filtered')
+            return result['items']
+        return iter_records(fetch_page, limit, prefetch=prefetch,
+                            total=lambda: counts['filtered'])
+
+    def iter_filter_parallel(self, app_id, attributes=None, limit=500,
+                             max_workers=DEFAULT_MAX_WORKERS, ordered=True, **kwargs):
+        """
+        Like iter_filter, but once the first page has told us how many items
+        match, requests all remaining pages concurrently, ``max_workers`` at
+        a time.
+
+        :param ordered: Yield items in the order the filter sorts them. If
+                        false, pages are yielded as soon as they arrive.
+        """
+        self.require_blocking('iter_filter_parallel', 'page with offset and limit instead')
+        return self._iter_filter_parallel(app_id, dict(attributes or {}), limit,
+                                          max_workers, ordered, kwargs)
+
+    def _iter_filter_parallel(self, app_id, attributes, limit, max_workers, ordered, kwargs):
+        def fetch_page(offset):
+            page_attributes = dict(attributes, offset=offset, limit=limit)
+            return self.filter(app_id, page_attributes, **kwargs)
+
+        first = fetch_page(0)
+        for item in first['items']:
+            yield item
+        if not first['items']:
+            return
+        # The server may cap the page size below limit.
+        limit = len(first['items'])
+        total = first.get('filtered', first.get('total', 0))
+        offsets = range(limit, total, limit)
+        for page in imap(fetch_page, offsets, max_workers=max_workers, ordered=ordered):
+            for item in page['items']:
+                yield item
 
     def filter_by_view(self, app_id, view_id):
         return self.transport.POST(url="/item/app/{}/filter/{}".format(app_id, view_id))
@@ -126,9 +241,9 @@ class Item(Area):
         return self.transport.GET(url='/item/%s/value/v2' % item_id)
 
     def create(self, app_id, attributes, silent=False, hook=True):
-        if not isinstance(attributes, dict):
-            raise TypeError('Must be of type dict')
-        attributes = json.dumps(attributes)
+        if not isinstance(attributes, JSON_BODY_TYPES):
+            raise TypeError('Must be a dict or serialized JSON')
+        attributes = self.dumps(attributes)
         return self.transport.POST(body=attributes,
                                    type='application/json',
                                    url='/item/app/%d/%s' % (app_id,
@@ -142,14 +257,52 @@ class Item(Area):
         
         Important: webhooks will still be called.
         """
-        if not isinstance(attributes, dict):
-            raise TypeError('Must be of type dict')
-        attributes = json.dumps(attributes)
+        if not isinstance(attributes, JSON_BODY_TYPES):
+            raise TypeError('Must be a dict or serialized JSON')
+        attributes = self.dumps(attributes)
         return self.transport.PUT(body=attributes,
                                   type='application/json',
                                   url='/item/%d%s' % (item_id, self.get_options(silent=silent,
                                                                                 hook=hook)))
 
+    def bulk_create(self, app_id, records, silent=False, hook=True,
+                    max_workers=DEFAULT_MAX_WORKERS, ordered=True):
+        """
+        Creates an item for every attributes dict in ``records``, up to
+        ``max_workers`` at a time.
+
+        Lazily yields a BulkResult per record as it completes (in input
+        order if ``ordered``). A failing record yields a result carrying the
+        exception instead of stopping the run.
+        """
+        self.require_blocking('bulk_create', 'gather Item.create calls instead')
+
+        def create(indexed):
+            index, attributes = indexed
+            try:
+                item_id = self.create(app_id, attributes, silent=silent, hook=hook).get('item_id')
+            except Exception as e:
+                return BulkResult(index, None, e)
+            return BulkResult(index, item_id, None)
+        return imap(create, enumerate(records), max_workers=max_workers, ordered=ordered)
+
+    def bulk_update(self, records, silent=False, hook=True,
+                    max_workers=DEFAULT_MAX_WORKERS, ordered=True):
+        """
+        Updates items from ``(item_id, attributes)`` pairs, up to
+        ``max_workers`` at a time. Yields BulkResults like bulk_create.
+        """
+        self.require_blocking('bulk_update', 'gather Item.update calls instead')
+
+        def update(indexed):
+            index, (item_id, attributes) = indexed
+            try:
+                self.update(item_id, attributes, silent=silent, hook=hook)
+            except Exception as e:
+                return BulkResult(index, item_id, e)
+            return BulkResult(index, item_id, None)
+        return imap(update, enumerate(records), max_workers=max_workers, ordered=ordered)
+
     def delete(self, item_id, silent=False, hook=True):
         return self.transport.DELETE(url='/item/%d%s' % (item_id,
                                                          self.get_options(silent=silent,
@@ -170,9 +323,9 @@ class Application(Area):
         return self.transport.POST(url='/app/%s/activate' % app_id)
 
     def create(self, attributes):
-        if not isinstance(attributes, dict):
-            raise TypeError('Must be of type dict')
-        attributes = json.dumps(attributes)
+        if not isinstance(attributes, JSON_BODY_TYPES):
+            raise TypeError('Must be a dict or serialized JSON')
+        attributes = self.dumps(attributes)
         return self.transport.POST(url='/app/', body=attributes, type='application/json')
 
     def add_field(self, app_id, attributes):
@@ -186,9 +339,9 @@ class Application(Area):
         :return: Python dict of JSON response
         :rtype: dict
         """
-        if not isinstance(attributes, dict):
-            raise TypeError('Must be of type dict')
-        attributes = json.dumps(attributes)
+        if not isinstance(attributes, JSON_BODY_TYPES):
+            raise TypeError('Must be a dict or serialized JSON')
+        attributes = self.dumps(attributes)
         return self.transport.POST(url='/app/%s/field/' % app_id, body=attributes,
                                    type='application/json')
 
@@ -223,6 +376,17 @@ class Application(Area):
         """
         return self.transport.GET(url='/app/%s' % app_id)
 
+    def get_schema(self, app_id):
+        """
+        Builds an AppSchema for app with id app_id. Use a
+        pypodio2.schema.SchemaCache to reuse it across calls.
+
+        :param app_id: Application ID
+        :type app_id: str or int
+        :rtype: pypodio2.schema.AppSchema
+        """
+        return self.transport.then(self.find(app_id), AppSchema)
+
     def dependencies(self, app_id):
         """
         Finds application dependencies for app with id app_id.
@@ -237,6 +401,14 @@ class Application(Area):
     def get_items(self, app_id, **kwargs):
         return self.transport.GET(url='/item/app/%s/' % app_id, **kwargs)
 
+    def iter_items(self, app_id, limit=100, prefetch=False, **kwargs):
+        """Lazily yields every item in the app, fetching ``limit`` at a time."""
+        self.require_blocking('iter_items', 'page with offset and limit instead')
+
+        def fetch_page(offset, limit):
+            return self.get_items(app_id, offset=offset, limit=limit, **kwargs)['items']
+        return iter_records(fetch_page, limit, prefetch=prefetch)
+
     def list_in_space(self, space_id):
         """
         Returns a list of all the visible apps in a space.
@@ -254,6 +426,14 @@ class Task(Area):
         """
         return self.transport.GET('/task/', **kwargs)
 
+    def iter_tasks(self, limit=100, prefetch=False, **kwargs):
+        """Lazily yields every matching task, fetching ``limit`` at a time."""
+        self.require_blocking('iter_tasks', 'page with offset and limit instead')
+
+        def fetch_page(offset, limit):
+            return self.get(offset=offset, limit=limit, **kwargs)
+        return iter_records(fetch_page, limit, prefetch=prefetch)
+
     def delete(self, task_id):
         """
         Deletes the app with the given id.
@@ -281,7 +461,7 @@ class Task(Area):
         """
         # if not isinstance(attributes, dict):
         #    raise TypeError('Must be of type dict')
-        attributes = json.dumps(attributes)
+        attributes = self.dumps(attributes)
         return self.transport.POST(url='/task/%s' % self.get_options(silent=silent, hook=hook),
                                    body=attributes,
                                    type='application/json')
@@ -294,7 +474,7 @@ class Task(Area):
         """
         # if not isinstance(attributes, dict):
         #    raise TypeError('Must be of type dict')
-        attributes = json.dumps(attributes)
+        attributes = self.dumps(attributes)
         return self.transport.POST(body=attributes,
                                    type='application/json',
                                    url='/task/%s/%s/%s' % (ref_type, ref_id,
@@ -317,7 +497,7 @@ class Status(Area):
         return self.transport.GET(url='/status/%s' % status_id)
 
     def create(self, space_id, attributes):
-        attributes = json.dumps(attributes)
+        attributes = self.dumps(attributes)
         return self.transport.POST(url='/status/space/%s/' % space_id,
                                    body=attributes, type='application/json')
 
@@ -337,7 +517,7 @@ class Space(Area):
         """
         resp = self.transport.GET(url='/space/url?%s' % urlencode({'url': space_url}))
         if id_only:
-            return resp['space_id']
+            return self.transport.then(resp, lambda space: space['space_id'])
         return resp
 
     def find_all_for_org(self, org_id):
@@ -360,9 +540,9 @@ class Space(Area):
         :return: Details of newly created space
         :rtype: dict
         """
-        if not isinstance(attributes, dict):
-            raise TypeError('Dictionary of values expected')
-        attributes = json.dumps(attributes)
+        if not isinstance(attributes, JSON_BODY_TYPES):
+            raise TypeError('Dictionary of values or serialized JSON expected')
+        attributes = self.dumps(attributes)
         return self.transport.POST(url='/space/', body=attributes, type='application/json')
 
 
@@ -375,16 +555,16 @@ class Stream(Area):
     For details, see: https://developers.podio.com/doc/stream/
     """
 
-    def find_all_by_app_id(self, app_id):
+    def find_all_by_app_id(self, app_id, **kwargs):
         """
         Returns the stream for the given app. This includes items from
         the app and tasks on the app.
 
         For details, see: https://developers.podio.com/doc/stream/get-app-stream-264673
         """
-        return self.transport.GET(url='/stream/app/%s/' % app_id)
+        return self.transport.GET(url='/stream/app/%s/' % app_id, **kwargs)
 
-    def find_all(self):
+    def find_all(self, **kwargs):
         """
         Returns the global stream. The types of objects in the stream
         can be either "item", "status", "task", "action" or
@@ -393,31 +573,31 @@ class Stream(Area):
 
         https://developers.podio.com/doc/stream/get-global-stream-80012
         """
-        return self.transport.GET(url='/stream/')
+        return self.transport.GET(url='/stream/', **kwargs)
 
-    def find_all_by_org_id(self, org_id):
+    def find_all_by_org_id(self, org_id, **kwargs):
         """
         Returns the activity stream for the given organization.
 
         For details, see: https://developers.podio.com/doc/stream/get-organization-stream-80038
         """
-        return self.transport.GET(url='/stream/org/%s/' % org_id)
+        return self.transport.GET(url='/stream/org/%s/' % org_id, **kwargs)
 
-    def find_all_personal(self):
+    def find_all_personal(self, **kwargs):
         """
         Returns the personal stream from personal spaces and sub-orgs.
 
         For details, see: https://developers.podio.com/doc/stream/get-personal-stream-1656647
         """
-        return self.transport.GET(url='/stream/personal/')
+        return self.transport.GET(url='/stream/personal/', **kwargs)
 
-    def find_all_by_space_id(self, space_id):
+    def find_all_by_space_id(self, space_id, **kwargs):
         """
         Returns the activity stream for the space.
 
         For details, see: https://developers.podio.com/doc/stream/get-space-stream-80039
         """
-        return self.transport.GET(url='/stream/space/%s/' % space_id)
+        return self.transport.GET(url='/stream/space/%s/' % space_id, **kwargs)
 
     def find_by_ref(self, ref_type, ref_id):
         """
@@ -430,10 +610,38 @@ class Stream(Area):
         """
         return self.transport.GET(url='/stream/%s/%s' % (ref_type, ref_id))
 
+    def _iter(self, find, args, limit, prefetch, kwargs):
+        name = 'iter_' + find.__name__[len('find_'):]
+        self.require_blocking(name, 'page with offset and limit instead')
+
+        def fetch_page(offset, limit):
+            return find(*args, offset=offset, limit=limit, **kwargs)
+        return iter_records(fetch_page, limit, prefetch=prefetch)
+
+    def iter_all(self, limit=30, prefetch=False, **kwargs):
+        """Lazily yields the whole global stream, newest first."""
+        return self._iter(self.find_all, (), limit, prefetch, kwargs)
+
+    def iter_all_by_app_id(self, app_id, limit=30, prefetch=False, **kwargs):
+        """Lazily yields the whole stream of the app, newest first."""
+        return self._iter(self.find_all_by_app_id, (app_id,), limit, prefetch, kwargs)
+
+    def iter_all_by_org_id(self, org_id, limit=30, prefetch=False, **kwargs):
+        """Lazily yields the whole stream of the organization, newest first."""
+        return self._iter(self.find_all_by_org_id, (org_id,), limit, prefetch, kwargs)
+
+    def iter_all_personal(self, limit=30, prefetch=False, **kwargs):
+        """Lazily yields the whole personal stream, newest first."""
+        return self._iter(self.find_all_personal, (), limit, prefetch, kwargs)
+
+    def iter_all_by_space_id(self, space_id, limit=30, prefetch=False, **kwargs):
+        """Lazily yields the whole stream of the space, newest first."""
+        return self._iter(self.find_all_by_space_id, (space_id,), limit, prefetch, kwargs)
+
 
 class Hook(Area):
     def create(self, hookable_type, hookable_id, attributes):
-        attributes = json.dumps(attributes)
+        attributes = self.dumps(attributes)
         return self.transport.POST(url='/hook/%s/%s/' % (hookable_type, hookable_id),
                                    body=attributes, type='application/json')
 
@@ -452,7 +660,7 @@ class Hook(Area):
 
 class Connection(Area):
     def create(self, attributes):
-        attributes = json.dumps(attributes)
+        attributes = self.dumps(attributes)
         return self.transport.POST(url='/connection/', body=attributes, type='application/json')
 
     def find(self, conn_id):
@@ -469,8 +677,16 @@ class Notification(Area):
     def find(self, notification_id):
         return self.transport.GET(url='/notification/%s' % notification_id)
 
-    def find_all(self):
-        return self.transport.GET(url='/notification/')
+    def find_all(self, **kwargs):
+        return self.transport.GET(url='/notification/', **kwargs)
+
+    def iter_all(self, limit=100, prefetch=False, **kwargs):
+        """Lazily yields every matching notification, fetching ``limit`` at a time."""
+        self.require_blocking('iter_all', 'page with offset and limit instead')
+
+        def fetch_page(offset, limit):
+            return self.find_all(offset=offset, limit=limit, **kwargs)
+        return iter_records(fetch_page, limit, prefetch=prefetch)
 
     def get_inbox_new_count(self):
         return self.transport.GET(url='/notification/inbox/new/count')
@@ -489,14 +705,22 @@ class Notification(Area):
 
 
 class Conversation(Area):
-    def find_all(self):
-        return self.transport.GET(url='/conversation/')
+    def find_all(self, **kwargs):
+        return self.transport.GET(url='/conversation/', **kwargs)
+
+    def iter_all(self, limit=100, prefetch=False, **kwargs):
+        """Lazily yields every conversation, fetching ``limit`` at a time."""
+        self.require_blocking('iter_all', 'page with offset and limit instead')
+
+        def fetch_page(offset, limit):
+            return self.find_all(offset=offset, limit=limit, **kwargs)
+        return iter_records(fetch_page, limit, prefetch=prefetch)
 
     def find(self, conversation_id):
         return self.transport.GET(url='/conversation/%s' % conversation_id)
 
     def create(self, attributes):
-        attributes = json.dumps(attributes)
+        attributes = self.dumps(attributes)
         return self.transport.POST(url='/conversation/', body=attributes, type='application/json')
 
     def star(self, conversation_id):
@@ -518,19 +742,98 @@ class Files(Area):
         raw_handler = lambda resp, data: data
         return self.transport.GET(url='/file/%d/raw' % file_id, handler=raw_handler)
 
+    def download(self, file_id, destination, chunk_size=64 * 1024, resume=True, progress=None):
+        """
+        Streams the raw file into ``destination``, a path or a writable
+        binary file object, reading ``chunk_size`` bytes at a time so memory
+        use does not grow with the file size.
+
+        If ``destination`` is a path that already holds the start of the
+        file and ``resume`` is true, only the missing bytes are requested
+        (HTTP Range). ``progress``, if given, is called after every chunk as
+        ``progress(bytes_done, bytes_total, bytes_per_second)``;
+        ``bytes_total`` is None when the server does not say.
+
+        :return: The size of the downloaded file in bytes
+        :rtype: int
+        """
+        is_path = isinstance(destination, string_types)
+        offset = 0
+        if is_path and resume and os.path.exists(destination):
+            offset = os.path.getsize(destination)
+        # Resuming and progress count the file's own bytes, so don't let the
+        # server compress them; files are mostly compressed already anyway.
+        headers = {'accept-encoding': 'identity'}
+        if offset:
+            headers['range'] = 'bytes=%d-' % offset
+        try:
+            response = self.transport.open_stream('GET', '/file/%s/raw' % file_id,
+                                                  headers=headers)
+        except TransportException as e:
+            if offset and getattr(e.status, 'status', None) == RANGE_NOT_SATISFIABLE:
+                return offset  # Already complete.
+            raise
+
+        with response:
+            if response.status != PARTIAL_CONTENT:
+                offset = 0  # The server sent the whole file after all.
+            total = response.get('content-length')
+            if total is not None:
+                total = int(total) + offset
+            out = open(destination, 'ab' if offset else 'wb') if is_path else destination
+            try:
+                done = offset
+                started = time.time()
+                for chunk in response.iter_content(chunk_size):
+                    out.write(chunk)
+                    done += len(chunk)
+                    if progress is not None:
+                        elapsed = time.time() - started
+                        rate = (done - offset) / elapsed if elapsed > 0 else 0.0
+                        progress(done, total, rate)
+            finally:
+                if is_path:
+                    out.close()
+        return done
+
     def attach(self, file_id, ref_type, ref_id):
         attributes = {
             'ref_type': ref_type,
             'ref_id': ref_id
         }
-        return self.transport.POST(url='/file/%s/attach' % file_id, body=json.dumps(attributes),
+        return self.transport.POST(url='/file/%s/attach' % file_id, body=self.dumps(attributes),
                                    type='application/json')
 
-    def create(self, filename, filedata):
-        """Create a file from raw data"""
-        attributes = {'filename': filename,
-                      'source': filedata}
-        return self.transport.POST(url='/file/v2/', body=attributes, type='multipart/form-data')
+    def create(self, filename, filedata=None, path=None):
+        """
+        Create a file from raw data, a readable binary file object, or the
+        local file at ``path``. The upload is streamed straight from the
+        source, so memory use does not depend on the size of the file.
+
+        :param filename: The name the file gets in Podio
+        :param filedata: The file contents as bytes, or a file object
+        :param path: Path of a local file to upload instead of ``filedata``
+        :return: Python dict of JSON response
+        :rtype: dict
+        """
+        if (filedata is None) == (path is None):
+            raise TypeError('Pass exactly one of filedata and path')
+        fileobj = open(path, 'rb') if path is not None else None
+        # On an asynchronous transport the upload only happens once the
+        # result is awaited, so the file is closed through the transport.
+        close = fileobj.close if path is not None else (lambda: None)
+        try:
+            if fileobj is None and hasattr(filedata, 'read'):
+                fileobj, filedata = filedata, None
+            source = MultipartParam('source', value=filedata, fileobj=fileobj,
+                                    filename=filename,
+                                    filetype=mimetypes.guess_type(filename)[0])
+            body, headers = multipart_encode([('filename', filename), source])
+            return self.transport.finally_call(
+                self.transport.send_stream('POST', '/file/v2/', body, headers=headers), close)
+        except Exception:
+            close()
+            raise
 
     def copy(self, file_id):
         """Copy a file to generate a new file_id"""
@@ -547,9 +850,9 @@ class View(Area):
         :param app_id: the application id
         :param attributes: the body of the request as a dictionary
         """
-        if not isinstance(attributes, dict):
-            raise TypeError('Must be of type dict')
-        attributes = json.dumps(attributes)
+        if not isinstance(attributes, JSON_BODY_TYPES):
+            raise TypeError('Must be a dict or serialized JSON')
+        attributes = self.dumps(attributes)
         return self.transport.POST(url='/view/app/{}/'.format(app_id),
                                    body=attributes, type='application/json')
 
@@ -601,9 +904,9 @@ class View(Area):
         :param app_id: the app id
         :param attributes: the body of the request in dictionary format
         """
-        if not isinstance(attributes, dict):
-            raise TypeError('Must be of type dict')
-        attribute_data = json.dumps(attributes)
+        if not isinstance(attributes, JSON_BODY_TYPES):
+            raise TypeError('Must be a dict or serialized JSON')
+        attribute_data = self.dumps(attributes)
         return self.transport.PUT(url='/view/app/{}/last'.format(app_id),
                                   body=attribute_data, type='application/json')
 
@@ -615,8 +918,8 @@ class View(Area):
         :param attributes: a dictionary containing the modifications to be made to the view
         :return:
         """
-        if not isinstance(attributes, dict):
-            raise TypeError('Must be of type dict')
-        attribute_data = json.dumps(attributes)
+        if not isinstance(attributes, JSON_BODY_TYPES):
+            raise TypeError('Must be a dict or serialized JSON')
+        attribute_data = self.dumps(attributes)
         return self.transport.PUT(url='/view/{}'.format(view_id),
                                   body=attribute_data, type='application/json')
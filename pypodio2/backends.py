@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP backends for HttpTransport.
+
+A backend sends one request and returns ``(response, data)``: a
+BackendResponse-like mapping of lowercased headers with a ``status``
+attribute, and the body as bytes. It must be safe to call from several
+threads. Errors reaching the server are raised as BackendError (a
+socket.error, so retry policies treat them as transient).
+
+Httplib2Backend, the default, keeps a pool of ``httplib2.Http`` objects.
+Urllib3Backend and HttpxBackend use those libraries' own connection
+pools; install them separately. HttpxBackend can speak HTTP/2 (with the
+``h2`` package), multiplexing concurrent requests over one connection::
+
+    client = api.OAuthClient(..., backend=HttpxBackend(pool_size=16, http2=True))
+
+Every backend asks for compressed responses and returns them decoded,
+see pypodio2.compression.
+"""
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from httplib2 import Http, HTTPConnectionWithTimeout, HTTPSConnectionWithTimeout
+
+from . import compression
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    from urllib.parse import urljoin, urlsplit
+except ImportError:
+    from urlparse import urljoin, urlsplit
+
+try:
+    import urllib3
+except ImportError:
+    urllib3 = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+DEFAULT_POOL_SIZE = 32
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+
+NODELAY_OPTION = (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class BackendError(socket.error):
+    pass
+
+
+class BackendResponse(dict):
+    """Response headers, lowercased, with the status code as ``status``."""
+
+    def __init__(self, status, headers):
+        dict.__init__(self, ((k.lower(), v) for k, v in headers))
+        self.status = status
+
+
+def _decoded_response(status, headers, data):
+    """For libraries that decode bodies themselves but keep the headers."""
+    response = BackendResponse(status, headers)
+    if compression.decoder(response.get('content-encoding')) is not None:
+        compression.mark_decoded(response, data)
+    return response, data
+
+
+class ConnectionPool(object):
+    """
+    A bounded, thread-safe pool of HTTP connections.
+
+    httplib2.Http objects are not safe to use from several threads at
+    once, so every request checks one out for its own exclusive use and
+    hands it back when done. At most ``maxsize`` connections are created;
+    callers beyond that block until one is returned.
+    """
+
+    def __init__(self, factory=Http, maxsize=DEFAULT_POOL_SIZE, timeout=None):
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        self.factory = factory
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.maxsize:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self.factory()
+            except Exception:
+                self._discard()
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeout('No connection became available within %s seconds'
+                              % self.timeout)
+
+    def release(self, connection):
+        self._idle.put(connection)
+
+    def _discard(self):
+        with self._lock:
+            self._created -= 1
+
+    @contextmanager
+    def connection(self):
+        """Checks a connection out for the duration of the with-block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            # The connection may be left half-way through a request; let a
+            # fresh one take its place instead of handing it out again.
+            self._discard()
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        """Closes the sockets of the idle connections; they reconnect if used again."""
+        idle = []
+        while True:
+            try:
+                idle.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for conn in idle:
+            _close_connections(conn)
+            self._idle.put(conn)
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class _NoDelayHTTPConnection(HTTPConnectionWithTimeout):
+    def connect(self):
+        HTTPConnectionWithTimeout.connect(self)
+        self.sock.setsockopt(*NODELAY_OPTION)
+
+
+class _NoDelayHTTPSConnection(HTTPSConnectionWithTimeout):
+    def connect(self):
+        HTTPSConnectionWithTimeout.connect(self)
+        self.sock.setsockopt(*NODELAY_OPTION)
+
+
+def _close_connections(http):
+    connections = getattr(http, 'connections', None)
+    if isinstance(connections, dict):
+        for conn in list(connections.values()):
+            conn.close()
+        connections.clear()
+
+
+class Httplib2Backend(object):
+    """
+    Sends requests through a ConnectionPool of ``httplib2.Http`` objects.
+
+    :param pool: An existing ConnectionPool; otherwise one of ``pool_size``
+                 connections is created.
+    :param timeout: Socket timeout in seconds.
+    :param pool_timeout: Seconds to wait for a free connection before
+                         raising PoolTimeout. None waits forever.
+    :param idle_timeout: Reconnect instead of reusing a connection left
+                         idle for longer than this many seconds, as
+                         servers and load balancers drop idle sockets.
+    :param tcp_nodelay: Disable Nagle's algorithm on new sockets.
+    """
+
+    def __init__(self, pool=None, pool_size=DEFAULT_POOL_SIZE, timeout=None,
+                 pool_timeout=None, idle_timeout=None, tcp_nodelay=False, clock=time.time):
+        if pool is None:
+            pool = ConnectionPool(factory=lambda: Http(timeout=timeout), maxsize=pool_size,
+                                  timeout=pool_timeout)
+        self.pool = pool
+        self.idle_timeout = idle_timeout
+        self.tcp_nodelay = tcp_nodelay
+        self._clock = clock
+        self._last_used = {}
+
+    def request(self, method, url, body, headers):
+        headers = compression.negotiate(headers or {})
+        kwargs = {}
+        if self.tcp_nodelay:
+            kwargs['connection_type'] = _NoDelayHTTPSConnection \
+                if url.startswith('https:') else _NoDelayHTTPConnection
+        with self.pool.connection() as http:
+            if self.idle_timeout is not None:
+                last_used = self._last_used.get(id(http))
+                if last_used is not None and self._clock() - last_used > self.idle_timeout:
+                    _close_connections(http)
+            response, data = http.request(url, method, body=body, headers=headers, **kwargs)
+            if self.idle_timeout is not None:
+                self._last_used[id(http)] = self._clock()
+        # httplib2 decodes gzip and deflate itself, but not brotli.
+        return response, compression.decode(response, data)
+
+    def close(self):
+        self.pool.close()
+
+
+class Urllib3Backend(object):
+    """
+    Sends requests through a ``urllib3.PoolManager``. Redirects are
+    followed like httplib2 does, except that the authorization header is
+    not passed on to other hosts.
+
+    :param pool_size: Connections kept per host; further concurrent
+                      requests wait for one to be returned.
+    :param timeout: Connect and read timeout in seconds.
+    :param tcp_nodelay: Disable Nagle's algorithm on new sockets.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=None, tcp_nodelay=True,
+                 **pool_kwargs):
+        if urllib3 is None:
+            raise ImportError('Urllib3Backend requires urllib3')
+        from urllib3.connection import HTTPConnection
+        socket_options = [o for o in HTTPConnection.default_socket_options
+                          if o[:2] != NODELAY_OPTION[:2]]
+        if tcp_nodelay:
+            socket_options.append(NODELAY_OPTION)
+        self.manager = urllib3.PoolManager(
+            maxsize=pool_size, block=True, socket_options=socket_options,
+            timeout=urllib3.Timeout(connect=timeout, read=timeout), **pool_kwargs)
+
+    def request(self, method, url, body, headers):
+        headers = compression.negotiate(dict(headers or {}))
+        origin = urlsplit(url).netloc
+        for _ in range(MAX_REDIRECTS + 1):
+            try:
+                response = self.manager.request(method, url, body=body, headers=headers,
+                                                retries=False, redirect=False)
+            except urllib3.exceptions.HTTPError as e:
+                raise BackendError(str(e))
+            location = response.headers.get('location')
+            if response.status not in REDIRECT_STATUSES or not location:
+                break
+            url = urljoin(url, location)
+            if urlsplit(url).netloc != origin:
+                # Don't hand our credentials to another host.
+                headers = dict((k, v) for k, v in headers.items()
+                               if k.lower() != 'authorization')
+            if response.status == 303 or (response.status in (301, 302) and method == 'POST'):
+                method, body = 'GET', None
+        return _decoded_response(response.status, response.headers.items(), response.data)
+
+    def close(self):
+        self.manager.clear()
+
+
+class HttpxBackend(object):
+    """
+    Sends requests through an ``httpx.Client``.
+
+    :param pool_size: Maximum number of open connections.
+    :param timeout: Connect, read and write timeout in seconds.
+    :param pool_timeout: Seconds to wait for a free connection.
+    :param idle_timeout: Seconds an idle connection is kept open.
+    :param http2: Negotiate HTTP/2 (requires the ``h2`` package).
+    :param tcp_nodelay: Disable Nagle's algorithm on new sockets.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=None, pool_timeout=None,
+                 idle_timeout=5.0, http2=False, tcp_nodelay=True):
+        if httpx is None:
+            raise ImportError('HttpxBackend requires httpx')
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size,
+                              keepalive_expiry=idle_timeout)
+        transport = httpx.HTTPTransport(limits=limits, http2=http2,
+                                        socket_options=[NODELAY_OPTION] if tcp_nodelay else None)
+        self.client = httpx.Client(transport=transport, follow_redirects=True,
+                                   timeout=httpx.Timeout(timeout, pool=pool_timeout))
+
+    def request(self, method, url, body, headers):
+        try:
+            response = self.client.request(method, url, content=body,
+                                           headers=compression.negotiate(headers or {}))
+        except httpx.TransportError as e:
+            raise BackendError(str(e))
+        return _decoded_response(response.status_code, response.headers.items(),
+                                 response.content)
+
+    def close(self):
+        self.client.close()
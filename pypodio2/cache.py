@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+An in-memory cache for GET responses that rarely change, such as app,
+view, space and hook definitions.
+
+Pass a ResponseCache to HttpTransport as ``cache``. Only endpoints with a
+TTL rule are cached; successful writes through the transport evict the
+entries they may have made stale.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# (path pattern, seconds to keep the response)
+DEFAULT_TTLS = (
+    (r'^/app/\d+$', 300),                # Application.find
+    (r'^/app/space/\d+/$', 300),         # Application.list_in_space
+    (r'^/view/app/\d+/', 300),           # View.get_views, View.get
+    (r'^/space/\d+$', 600),              # Space.find
+    (r'^/space/url$', 600),              # Space.find_by_url
+    (r'^/hook/\w+/\d+/$', 300),          # Hook.find_all_for
+)
+
+# (written path pattern, cached path prefixes to evict). Prefixes are
+# formatted with the groups matched by the pattern.
+DEFAULT_INVALIDATIONS = (
+    (r'^/app/(\d+)', ('/app/{0}', '/app/space/')),
+    (r'^/app/$', ('/app/space/',)),
+    (r'^/view/app/(\d+)/', ('/view/app/{0}/',)),
+    (r'^/view/\d+', ('/view/app/',)),
+    (r'^/space/', ('/space/',)),
+    (r'^/hook/(\w+)/(\d+)/', ('/hook/{0}/{1}/',)),
+    (r'^/hook/\d+', ('/hook/',)),
+)
+
+
+class ResponseCache(object):
+    """
+    A thread-safe LRU cache of raw ``(response, data)`` pairs, keyed by
+    the caller's identity and the full request URL.
+
+    Holds at most ``maxsize`` entries and, if ``max_bytes`` is set, at most
+    that many bytes of response bodies; the least recently used entries
+    are evicted first. ``ttls`` and ``invalidations`` replace the default
+    rules above.
+    """
+
+    def __init__(self, maxsize=1024, max_bytes=None, ttls=DEFAULT_TTLS,
+                 invalidations=DEFAULT_INVALIDATIONS, clock=time.time):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._ttls = [(re.compile(pattern), ttl) for pattern, ttl in ttls]
+        self._invalidations = [(re.compile(pattern), prefixes)
+                               for pattern, prefixes in invalidations]
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def ttl_for(self, path):
+        for pattern, ttl in self._ttls:
+            if pattern.search(path):
+                return ttl
+        return None
+
+    def get(self, identity, url):
+        """Returns the cached ``(response, data)`` for ``url``, or None."""
+        key = (identity, url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, entry_path, response, data = entry
+            if expires_at <= self._clock():
+                self._remove(key)
+                return None
+            # Mark as most recently used.
+            del self._entries[key]
+            self._entries[key] = entry
+            return response, data
+
+    def put(self, identity, path, url, response, data):
+        ttl = self.ttl_for(path)
+        if not ttl:
+            return
+        key = (identity, url)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self._clock() + ttl, path, response, data)
+            self._bytes += len(data or b'')
+            while self._entries and (len(self._entries) > self.maxsize or
+                                     (self.max_bytes and self._bytes > self.max_bytes)):
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry[3] or b'')
+
+    def invalidate(self, prefix=''):
+        """Evicts every entry whose path starts with ``prefix``."""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e[1].startswith(prefix)]:
+                self._remove(key)
+
+    def clear(self):
+        self.invalidate()
+
+    def invalidate_for_write(self, path):
+        """Evicts the entries made stale by a successful write to ``path``."""
+        for pattern, prefixes in self._invalidations:
+            match = pattern.search(path)
+            if match:
+                for prefix in prefixes:
+                    self.invalidate(prefix.format(*match.groups()))
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+JSON codecs used to serialize request bodies and parse responses.
+
+HttpTransport uses DEFAULT_CODEC unless given another one as ``codec``.
+When orjson is installed, the default codec parses responses with it,
+straight from the raw bytes; request bodies are still written by the
+standard library so they stay byte-for-byte what they always were. Use
+ORJSON_CODEC to serialize with orjson as well.
+"""
+import json
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# json.loads only accepts bytes from Python 3.6 on.
+_LOADS_BYTES = sys.version_info < (3,) or sys.version_info >= (3, 6)
+
+
+def _json_loads(data):
+    if isinstance(data, bytes) and not _LOADS_BYTES:
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+class JsonCodec(object):
+    """A pair of JSON ``dumps``/``loads`` functions. ``loads`` takes bytes."""
+
+    def __init__(self, dumps, loads, name=None):
+        self.dumps = dumps
+        self.loads = loads
+        self.name = name
+
+    def __repr__(self):
+        return '<JsonCodec %s>' % self.name
+
+
+STDLIB_CODEC = JsonCodec(json.dumps, _json_loads, 'json')
+
+if orjson is not None:
+    ORJSON_CODEC = JsonCodec(orjson.dumps, orjson.loads, 'orjson')
+    DEFAULT_CODEC = JsonCodec(json.dumps, orjson.loads, 'json+orjson')
+else:
+    ORJSON_CODEC = None
+    DEFAULT_CODEC = STDLIB_CODEC
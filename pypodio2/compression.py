@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Content-Encoding support: negotiating compressed responses, decoding them
+incrementally, and gzipping large request bodies.
+
+Backends add ``Accept-Encoding: gzip, deflate`` (and ``br`` when the
+brotli or brotlicffi package is installed) to every request that doesn't
+set its own, and hand back decoded bodies. As httplib2 does, the decoded
+response's Content-Encoding header is renamed ``-content-encoding``.
+Streamed responses (``HttpTransport.open_stream``) are decoded chunk by
+chunk as they are read. AsyncHttpTransport leaves both to aiohttp.
+
+Request bodies are only compressed when HttpTransport is created with
+``compress_requests=True``, as servers are not obliged to accept them.
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+ACCEPT_ENCODING = 'gzip, deflate, br' if brotli is not None else 'gzip, deflate'
+
+# Smaller bodies fit in a packet or two anyway; compressing them costs
+# more CPU than the bytes saved are worth.
+MIN_COMPRESS_SIZE = 1024
+
+
+class DecodingError(ValueError):
+    """A response body did not decode as its Content-Encoding said."""
+
+
+class _ZlibDecoder(object):
+    """
+    Decodes gzip, or deflate. Servers disagree on whether deflate means a
+    zlib stream or a raw one, so ``fallback_wbits`` is tried if the first
+    chunk is not a zlib stream.
+    """
+
+    def __init__(self, wbits, fallback_wbits=None):
+        self._decompressor = zlib.decompressobj(wbits)
+        self._fallback_wbits = fallback_wbits
+
+    def decompress(self, data):
+        try:
+            if self._fallback_wbits is None or not data:
+                return self._decompressor.decompress(data)
+            fallback_wbits, self._fallback_wbits = self._fallback_wbits, None
+            try:
+                return self._decompressor.decompress(data)
+            except zlib.error:
+                self._decompressor = zlib.decompressobj(fallback_wbits)
+                return self._decompressor.decompress(data)
+        except zlib.error as e:
+            raise DecodingError(str(e))
+
+    def flush(self):
+        try:
+            return self._decompressor.flush()
+        except zlib.error as e:
+            raise DecodingError(str(e))
+
+
+class _BrotliDecoder(object):
+    def __init__(self):
+        decompressor = brotli.Decompressor()
+        # brotli calls it process, brotlicffi decompress.
+        self._process = getattr(decompressor, 'process', None) or decompressor.decompress
+
+    def decompress(self, data):
+        try:
+            return self._process(data)
+        except brotli.error as e:
+            raise DecodingError(str(e))
+
+    def flush(self):
+        return b''
+
+
+def decoder(content_encoding):
+    """
+    Returns an object with ``decompress(data)`` and ``flush()`` methods for
+    decoding a body sent with ``content_encoding``, or None if the body is
+    not encoded or the encoding is not supported. Both methods raise
+    DecodingError for corrupt input.
+    """
+    encoding = (content_encoding or '').strip().lower()
+    if encoding in ('gzip', 'x-gzip'):
+        return _ZlibDecoder(16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        return _ZlibDecoder(zlib.MAX_WBITS, -zlib.MAX_WBITS)
+    if encoding == 'br' and brotli is not None:
+        return _BrotliDecoder()
+    return None
+
+
+def negotiate(headers):
+    """
+    Returns ``headers`` with Accept-Encoding added, unless it already has
+    one or asks for a byte range, which must count the raw bytes.
+    """
+    names = set(name.lower() for name in headers)
+    if 'accept-encoding' in names or 'range' in names:
+        return headers
+    headers = dict(headers)
+    headers['accept-encoding'] = ACCEPT_ENCODING
+    return headers
+
+
+def mark_decoded(response, data):
+    """Updates the headers of ``response`` for a body that has been decoded."""
+    response['-content-encoding'] = response.pop('content-encoding')
+    response['content-length'] = str(len(data))
+
+
+def decode(response, data):
+    """
+    Decodes a whole response body if ``response`` (a dict of lowercased
+    headers) names a supported Content-Encoding. Raises DecodingError.
+    """
+    if not data:
+        return data
+    body_decoder = decoder(response.get('content-encoding'))
+    if body_decoder is None:
+        return data
+    data = body_decoder.decompress(data) + body_decoder.flush()
+    mark_decoded(response, data)
+    return data
+
+
+def compress(body, min_size=MIN_COMPRESS_SIZE, level=6):
+    """
+    Gzips a request body of at least ``min_size`` bytes. Returns None for
+    smaller bodies and ones that aren't strings. The gzip header carries no
+    timestamp, so equal bodies compress to equal bytes.
+    """
+    if not isinstance(body, (bytes, type(u''))):
+        return None
+    if not isinstance(body, bytes):
+        body = body.encode('utf-8')
+    if len(body) < min_size:
+        return None
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Bounded-concurrency helpers for issuing many Podio requests at once.
+
+These rely on the transport being safe to share between threads, which
+HttpTransport is.
+"""
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def imap(func, iterable, max_workers=DEFAULT_MAX_WORKERS, ordered=True):
+    """
+    Lazily yields ``func(arg)`` for every ``arg`` in ``iterable``, running
+    up to ``max_workers`` calls concurrently.
+
+    ``iterable`` is consumed on demand and at most ``2 * max_workers``
+    calls are pending at any time, so arbitrarily long inputs are fine.
+    Results come back in input order if ``ordered`` is true, otherwise as
+    soon as they complete. An exception raised by ``func`` is re-raised
+    when its result would have been yielded.
+    """
+    if max_workers < 1:
+        raise ValueError('max_workers must be at least 1')
+    max_pending = 2 * max_workers
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = deque() if ordered else set()
+    try:
+        if ordered:
+            for arg in iterable:
+                pending.append(executor.submit(func, arg))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        else:
+            for arg in iterable:
+                pending.add(executor.submit(func, arg))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
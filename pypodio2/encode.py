@@ -8,9 +8,13 @@ multipart/form-data is the standard way to upload files over HTTP"""
 import mimetypes
 import os
 import re
-import urllib
 from email.header import Header
 
+try:
+    from urllib.parse import quote_plus
+except ImportError:
+    from urllib import quote_plus
+
 __all__ = ['gen_boundary', 'encode_and_quote', 'MultipartParam',
            'encode_string', 'encode_file_header', 'get_body_size', 'get_headers',
            'multipart_encode']
@@ -20,6 +24,11 @@ try:
 except ImportError:
     UnsupportedOperation = None
 
+try:
+    text_type = unicode
+except NameError:
+    text_type = str
+
 try:
     import uuid
 
@@ -39,24 +48,26 @@ except ImportError:
 
 
 def encode_and_quote(data):
-    """If ``data`` is unicode, return urllib.quote_plus(data.encode("utf-8"))
-    otherwise return urllib.quote_plus(data)"""
+    """If ``data`` is unicode, return quote_plus(data.encode("utf-8"))
+    otherwise return quote_plus(data)"""
     if data is None:
         return None
 
-    if isinstance(data, unicode):
+    if isinstance(data, text_type):
         data = data.encode("utf-8")
-    return urllib.quote_plus(data)
+    return quote_plus(data)
 
 
 def _strify(s):
-    """If s is a unicode string, encode it to UTF-8 and return the results,
-    otherwise return str(s), or None if s is None"""
+    """Return ``s`` as bytes: unicode strings are encoded to UTF-8, other
+    objects are converted with str() first. Returns None if s is None"""
     if s is None:
         return None
-    if isinstance(s, unicode):
+    if isinstance(s, bytes):
+        return s
+    if isinstance(s, text_type):
         return s.encode("utf-8")
-    return str(s)
+    return _strify(str(s))
 
 
 class MultipartParam(object):
@@ -99,14 +110,12 @@ class MultipartParam(object):
         if filename is None:
             self.filename = None
         else:
-            if isinstance(filename, unicode):
-                # Encode with XML entities
-                self.filename = filename.encode("ascii", "xmlcharrefreplace")
-            else:
-                self.filename = str(filename)
-            self.filename = self.filename.encode("string_escape"). \
-                replace('"', '\\"')
-        self.filetype = _strify(filetype)
+            if isinstance(filename, bytes):
+                filename = filename.decode("utf-8")
+            # Encode with XML entities
+            filename = filename.encode("ascii", "xmlcharrefreplace").decode("ascii")
+            self.filename = filename.replace('\\', '\\\\').replace('"', '\\"')
+        self.filetype = filetype
 
         self.filesize = filesize
         self.fileobj = fileobj
@@ -216,19 +225,19 @@ class MultipartParam(object):
         headers.append("")
         headers.append("")
 
-        return "\r\n".join(headers)
+        return "\r\n".join(headers).encode("utf-8")
 
     def encode(self, boundary):
-        """Returns the string encoding of this parameter"""
+        """Returns the encoding of this parameter as bytes"""
         if self.value is None:
-            value = self.fileobj.read()
+            value = _strify(self.fileobj.read())
         else:
             value = self.value
 
-        if re.search("^--%s$" % re.escape(boundary), value, re.M):
+        if re.search(b"^--" + re.escape(_strify(boundary)) + b"$", value, re.M):
             raise ValueError("boundary found in encoded string")
 
-        return "%s%s\r\n" % (self.encode_hdr(boundary), value)
+        return self.encode_hdr(boundary) + value + b"\r\n"
 
     def iter_encode(self, boundary, blocksize=4096):
         """Yields the encoding of this parameter
@@ -248,15 +257,15 @@ class MultipartParam(object):
             yield block
             if self.cb:
                 self.cb(self, current, total)
-            last_block = ""
-            encoded_boundary = "--%s" % encode_and_quote(boundary)
-            boundary_exp = re.compile("^%s$" % re.escape(encoded_boundary),
+            last_block = b""
+            encoded_boundary = _strify("--%s" % encode_and_quote(boundary))
+            boundary_exp = re.compile(b"^" + re.escape(encoded_boundary) + b"$",
                                       re.M)
             while True:
-                block = self.fileobj.read(blocksize)
+                block = _strify(self.fileobj.read(blocksize))
                 if not block:
                     current += 2
-                    yield "\r\n"
+                    yield b"\r\n"
                     if self.cb:
                         self.cb(self, current, total)
                     break
@@ -323,7 +332,7 @@ def get_headers(params, boundary):
     """Returns a dictionary with Content-Type and Content-Length headers
     for the multipart/form-data encoding of ``params``."""
     headers = {}
-    boundary = urllib.quote_plus(boundary)
+    boundary = quote_plus(boundary)
     headers['Content-Type'] = "multipart/form-data; boundary=%s" % boundary
     headers['Content-Length'] = str(get_body_size(params, boundary))
     return headers
@@ -349,7 +358,7 @@ class MultipartYielder:
         of parameters"""
         if self.param_iter is not None:
             try:
-                block = self.param_iter.next()
+                block = next(self.param_iter)
                 self.current += len(block)
                 if self.cb:
                     self.cb(self.p, self.current, self.total)
@@ -364,7 +373,7 @@ class MultipartYielder:
             self.param_iter = None
             self.p = None
             self.i = None
-            block = "--%s--\r\n" % self.boundary
+            block = _strify("--%s--\r\n" % self.boundary)
             self.current += len(block)
             if self.cb:
                 self.cb(self.p, self.current, self.total)
@@ -375,6 +384,8 @@ class MultipartYielder:
         self.i += 1
         return self.next()
 
+    __next__ = next
+
     def reset(self):
         self.i = 0
         self.current = 0
@@ -409,23 +420,23 @@ def multipart_encode(params, boundary=None, cb=None):
     Examples:
 
     >>> datagen, headers = multipart_encode( [("key", "value1"), ("key", "value2")] )
-    >>> s = "".join(datagen)
-    >>> assert "value2" in s and "value1" in s
+    >>> s = b"".join(datagen)
+    >>> assert b"value2" in s and b"value1" in s
 
     >>> p = MultipartParam("key", "value2")
     >>> datagen, headers = multipart_encode( [("key", "value1"), p] )
-    >>> s = "".join(datagen)
-    >>> assert "value2" in s and "value1" in s
+    >>> s = b"".join(datagen)
+    >>> assert b"value2" in s and b"value1" in s
 
     >>> datagen, headers = multipart_encode( {"key": "value1"} )
-    >>> s = "".join(datagen)
-    >>> assert "value2" not in s and "value1" in s
+    >>> s = b"".join(datagen)
+    >>> assert b"value2" not in s and b"value1" in s
 
     """
     if boundary is None:
         boundary = gen_boundary()
     else:
-        boundary = urllib.quote_plus(boundary)
+        boundary = quote_plus(boundary)
 
     headers = get_headers(params, boundary)
     params = MultipartParam.from_params(params)
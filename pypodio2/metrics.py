@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Request instrumentation.
+
+HttpTransport takes a list of ``hooks``. Each hook's ``before_request``
+and ``after_request`` are called with the same RequestInfo around every
+request that goes to the network (cache hits and callers sharing a
+single-flight request are not counted again), from AsyncHttpTransport and
+the streaming uploads and downloads too. For streams, the latency is the
+time until the response headers arrived and the response size is taken
+from Content-Length. A hook must not raise.
+
+MetricsCollector is a hook that aggregates counters and latency
+histograms per method and endpoint and exports them in the Prometheus
+text format::
+
+    metrics = MetricsCollector()
+    client = api.OAuthClient(..., hooks=[metrics])
+    ...
+    print(metrics.to_prometheus())
+"""
+import re
+import threading
+import time
+
+from .ratelimit import _header_int
+
+# Python 2 has no perf_counter.
+timer = getattr(time, 'perf_counter', time.time)
+
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def endpoint_template(path):
+    """Replaces numeric ids in a path: ``/item/12/value`` -> ``/item/{id}/value``."""
+    return _ID_SEGMENT.sub('/{id}', path)
+
+
+class RequestInfo(object):
+    """What is known about a request; filled in as it progresses."""
+
+    def __init__(self, method, url, path, body):
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint_template(path)
+        self.request_bytes = len(body) if isinstance(body, (bytes, type(u''))) else 0
+        self.status = None
+        self.response_bytes = 0
+        self.retries = 0
+        self.rate_limit_limit = None
+        self.rate_limit_remaining = None
+        self.error = None
+        self.latency = None
+        self._started = timer()
+
+    def record_response(self, response, data=None):
+        """``data`` is None for a streamed response whose body is unread."""
+        self.status = getattr(response, 'status', None)
+        if data is None:
+            self.response_bytes = _header_int(response, 'content-length') or 0
+        else:
+            self.response_bytes = len(data)
+        limit = _header_int(response, 'x-rate-limit-limit')
+        if limit is not None:
+            self.rate_limit_limit = limit
+            self.rate_limit_remaining = _header_int(response, 'x-rate-limit-remaining')
+
+    def finish(self):
+        self.latency = timer() - self._started
+
+
+class _EndpointStats(object):
+    def __init__(self, buckets):
+        self.statuses = {}
+        self.buckets = [0] * len(buckets)
+        self.count = 0
+        self.latency_sum = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.retries = 0
+
+
+class MetricsCollector(object):
+    """
+    Thread-safe per-endpoint request counters and latency histograms.
+
+    :param buckets: Upper bounds of the latency histogram buckets, in
+                    seconds.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.rate_limit_limit = None
+        self.rate_limit_remaining = None
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def before_request(self, info):
+        pass
+
+    def after_request(self, info):
+        status = str(info.status) if info.status is not None else 'error'
+        with self._lock:
+            key = (info.method, info.endpoint)
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _EndpointStats(self.buckets)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.count += 1
+            stats.latency_sum += info.latency
+            for i, bound in enumerate(self.buckets):
+                if info.latency <= bound:
+                    stats.buckets[i] += 1
+            stats.request_bytes += info.request_bytes
+            stats.response_bytes += info.response_bytes
+            stats.retries += info.retries
+            if info.rate_limit_remaining is not None:
+                self.rate_limit_limit = info.rate_limit_limit
+                self.rate_limit_remaining = info.rate_limit_remaining
+
+    def snapshot(self):
+        """Returns ``{(method, endpoint): {...}}`` with the totals so far."""
+        with self._lock:
+            return dict((key, {'count': s.count,
+                               'statuses': dict(s.statuses),
+                               'latency_sum': s.latency_sum,
+                               'buckets': list(zip(self.buckets, s.buckets)),
+                               'request_bytes': s.request_bytes,
+                               'response_bytes': s.response_bytes,
+                               'retries': s.retries})
+                        for key, s in self._stats.items())
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def to_prometheus(self, prefix='podio'):
+        """Renders the metrics in the Prometheus text exposition format."""
+        stats = sorted(self.snapshot().items())
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append('# HELP %s_%s %s' % (prefix, name, help_text))
+            lines.append('# TYPE %s_%s %s' % (prefix, name, kind))
+
+        def sample(name, labels, value):
+            lines.append('%s_%s{%s} %s' % (prefix, name, ','.join(
+                '%s="%s"' % (k, _escape(v)) for k, v in labels), _number(value)))
+
+        metric('requests_total', 'counter', 'Requests sent, by endpoint and status.')
+        for (method, endpoint), s in stats:
+            for status, count in sorted(s['statuses'].items()):
+                sample('requests_total', [('method', method), ('endpoint', endpoint),
+                                          ('status', status)], count)
+
+        metric('request_duration_seconds', 'histogram', 'Request latency, retries included.')
+        for (method, endpoint), s in stats:
+            labels = [('method', method), ('endpoint', endpoint)]
+            for bound, count in s['buckets']:
+                sample('request_duration_seconds_bucket', labels + [('le', _number(bound))],
+                       count)
+            sample('request_duration_seconds_bucket', labels + [('le', '+Inf')], s['count'])
+            sample('request_duration_seconds_sum', labels, s['latency_sum'])
+            sample('request_duration_seconds_count', labels, s['count'])
+
+        for name, key, help_text in (
+                ('request_bytes_total', 'request_bytes', 'Request body bytes sent.'),
+                ('response_bytes_total', 'response_bytes', 'Response body bytes received.'),
+                ('retries_total', 'retries', 'Requests repeated after a failure.')):
+            metric(name, 'counter', help_text)
+            for (method, endpoint), s in stats:
+                sample(name, [('method', method), ('endpoint', endpoint)], s[key])
+
+        if self.rate_limit_remaining is not None:
+            metric('rate_limit_remaining', 'gauge', 'Requests left in the rate limit window.')
+            lines.append('%s_rate_limit_remaining %d' % (prefix, self.rate_limit_remaining))
+            metric('rate_limit_limit', 'gauge', 'Size of the rate limit window.')
+            lines.append('%s_rate_limit_limit %d' % (prefix, self.rate_limit_limit))
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Compact, read-only models for API responses.
+
+Item responses carry a lot that is rarely needed once the item has been
+fetched: field configs, full user profiles, whole referenced items. An
+ItemRecord keeps only the identifying parts of an item and a trimmed copy
+of each field's raw values, in ``__slots__`` objects. Values are decoded
+into plain Python on first access::
+
+    for item in client.Item.iter_filter(app_id, typed=True):
+        item['status']          # -> 'Done' (category option text)
+        item.field(1234).values # -> every value of field 1234
+"""
+
+# Keys worth keeping from the nested objects of heavy field types.
+_CONTACT_KEYS = ('profile_id', 'user_id', 'name', 'mail', 'type')
+_APP_ITEM_KEYS = ('item_id', 'app_item_id', 'title')
+_FILE_KEYS = ('file_id', 'name', 'mimetype', 'size', 'link')
+
+
+def _pick(obj, keys):
+    return dict((k, obj[k]) for k in keys if k in obj)
+
+
+def _compact(field_type, values):
+    """Drops the bulky parts of raw values that decoding never looks at."""
+    if field_type == 'contact':
+        return [{'value': _pick(v['value'], _CONTACT_KEYS)} for v in values]
+    if field_type == 'app':
+        compacted = []
+        for v in values:
+            item = _pick(v['value'], _APP_ITEM_KEYS)
+            app = v['value'].get('app')
+            if app:
+                item['app'] = {'app_id': app.get('app_id')}
+            compacted.append({'value': item})
+        return compacted
+    if field_type == 'image':
+        return [{'value': _pick(v['value'], _FILE_KEYS)} for v in values]
+    return values
+
+
+def _decode(field_type, value):
+    if field_type == 'category':
+        return value['value']['text']
+    if field_type == 'app':
+        return value['value']['item_id']
+    if field_type == 'contact':
+        return value['value']['profile_id']
+    if field_type == 'image':
+        return value['value']['file_id']
+    if field_type == 'date':
+        return value.get('start')
+    if field_type == 'money':
+        return {'value': value.get('value'), 'currency': value.get('currency')}
+    if field_type == 'embed':
+        return value['embed']['url']
+    return value.get('value', value)
+
+
+class ItemField(object):
+    """One field of an ItemRecord."""
+    __slots__ = ('field_id', 'external_id', 'type', 'label', '_raw', '_values')
+
+    def __init__(self, field):
+        self.field_id = field['field_id']
+        self.external_id = field.get('external_id')
+        self.type = field.get('type')
+        self.label = field.get('label')
+        self._raw = _compact(self.type, field.get('values') or [])
+        self._values = None
+
+    @property
+    def values(self):
+        """Every value of the field, decoded."""
+        if self._values is None:
+            self._values = [_decode(self.type, v) for v in self._raw]
+        return self._values
+
+    @property
+    def value(self):
+        """The first value of the field, or None if it is empty."""
+        values = self.values
+        return values[0] if values else None
+
+    def to_dict(self):
+        return {'field_id': self.field_id,
+                'external_id': self.external_id,
+                'type': self.type,
+                'label': self.label,
+                'values': self._raw}
+
+    def __repr__(self):
+        return '<ItemField %s %r>' % (self.field_id, self.external_id)
+
+
+class ItemRecord(object):
+    """
+    A compact item. ``item[key]`` returns the first decoded value of the
+    field with that external_id or field_id; ``field(key)`` returns the
+    ItemField itself. ``to_dict()`` rebuilds an API-shaped dict from what
+    was kept.
+    """
+    __slots__ = ('item_id', 'app_item_id', 'app_id', 'external_id', 'title',
+                 'revision', 'created_on', 'last_edit_on', 'last_event_on', 'fields',
+                 '_index')
+
+    def __init__(self, item):
+        self.item_id = item['item_id']
+        self.app_item_id = item.get('app_item_id')
+        self.app_id = (item.get('app') or {}).get('app_id')
+        self.external_id = item.get('external_id')
+        self.title = item.get('title')
+        revision = item.get('current_revision')
+        self.revision = revision.get('revision') if isinstance(revision, dict) else None
+        self.created_on = item.get('created_on')
+        self.last_edit_on = item.get('last_edit_on')
+        self.last_event_on = item.get('last_event_on')
+        self.fields = tuple(ItemField(f) for f in item.get('fields') or ())
+        self._index = None
+
+    def field(self, key):
+        """Looks a field up by external_id or field_id. Raises KeyError."""
+        if self._index is None:
+            index = {}
+            for f in self.fields:
+                index[f.field_id] = f
+                if f.external_id is not None:
+                    index[f.external_id] = f
+            self._index = index
+        return self._index[key]
+
+    def __getitem__(self, key):
+        return self.field(key).value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        try:
+            self.field(key)
+        except KeyError:
+            return False
+        return True
+
+    def to_dict(self):
+        return {'item_id': self.item_id,
+                'app_item_id': self.app_item_id,
+                'app': {'app_id': self.app_id},
+                'external_id': self.external_id,
+                'title': self.title,
+                'revision': self.revision,
+                'current_revision': {'revision': self.revision},
+                'created_on': self.created_on,
+                'last_edit_on': self.last_edit_on,
+                'last_event_on': self.last_event_on,
+                'fields': [f.to_dict() for f in self.fields]}
+
+    def __repr__(self):
+        return '<ItemRecord %s %r>' % (self.item_id, self.title)
+
+
+def typed_items(response):
+    """Replaces the items of a filter-style response with ItemRecords."""
+    response = dict(response)
+    response['items'] = [ItemRecord(item) for item in response.get('items') or ()]
+    return response
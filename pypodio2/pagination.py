@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Lazy offset/limit pagination over Podio list endpoints.
+
+The helpers here take a ``fetch_page(offset, limit)`` callable returning a
+list of records, and walk it one page at a time so memory use stays
+bounded by the page size no matter how long the list is.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+
+def iter_pages(fetch_page, limit, offset=0, prefetch=False, total=None):
+    """
+    Yields successive pages from ``fetch_page`` until an empty page is
+    returned. Servers may cap the page size below ``limit``, so a short
+    page doesn't end the walk; the next one starts after its last record.
+
+    If ``prefetch`` is true, the next page is requested on a background
+    thread as soon as a page arrives, so the caller never waits between
+    pages as long as it consumes records slower than the API serves them.
+    Requires a thread-safe transport.
+
+    :param total: A callable returning the number of records in the whole
+                  list, or None if not known (yet). It is called after
+                  each page, and the walk stops once it has been reached,
+                  saving the request for the trailing empty page.
+    """
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+
+    def done(page, offset):
+        if not page:
+            return True
+        known = total() if total is not None else None
+        return known is not None and offset >= known
+
+    if not prefetch:
+        while True:
+            page = fetch_page(offset, limit)
+            offset += len(page)
+            if page:
+                yield page
+            if done(page, offset):
+                return
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        pending = executor.submit(fetch_page, offset, limit)
+        while pending is not None:
+            page = pending.result()
+            offset += len(page)
+            if done(page, offset):
+                pending = None
+            else:
+                pending = executor.submit(fetch_page, offset, limit)
+            if page:
+                yield page
+    finally:
+        executor.shutdown(wait=False)
+
+
+def iter_records(fetch_page, limit, offset=0, prefetch=False, total=None):
+    """Like iter_pages, but yields one record at a time."""
+    for page in iter_pages(fetch_page, limit, offset=offset, prefetch=prefetch, total=total):
+        for record in page:
+            yield record
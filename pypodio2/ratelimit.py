@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Client-side pacing based on Podio's rate limit headers.
+
+Podio reports the hourly budget in ``X-Rate-Limit-Limit`` and what is left
+of it in ``X-Rate-Limit-Remaining``. Once the budget is exhausted every
+request fails with 420/429 until the hour is over, so it is much cheaper to
+slow down a little before that happens.
+"""
+import threading
+import time
+
+DEFAULT_PERIOD = 3600
+DEFAULT_LOW_WATER = 0.1
+RATE_LIMITED_STATUSES = (420, 429)
+
+
+def _header_int(response, name):
+    try:
+        return int(response.get(name))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class RateLimiter(object):
+    """
+    A token bucket kept in sync with Podio's rate limit headers.
+
+    The bucket holds ``limit`` tokens and refills at ``limit / period``
+    tokens per second. Every request takes a token; every response resets
+    the level to what the server says is remaining. While more than
+    ``low_water`` of the budget is left requests are not delayed at all.
+    Below that, requests are spaced out progressively further, reaching the
+    refill rate as the bucket runs empty, so the budget is stretched out
+    instead of hitting the wall.
+
+    Until the first response with rate limit headers arrives, nothing is
+    delayed. One limiter may be shared by any number of threads.
+    """
+
+    def __init__(self, limit=None, period=DEFAULT_PERIOD, low_water=DEFAULT_LOW_WATER,
+                 clock=time.time, sleep=time.sleep):
+        self.limit = limit
+        self.period = period
+        self.low_water = low_water
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(limit) if limit else None
+        self._updated = clock()
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self):
+        """The estimated number of requests left in the current window."""
+        with self._lock:
+            self._refill(self._clock())
+            return self._tokens
+
+    def _refill(self, now):
+        if self._tokens is not None:
+            elapsed = max(0.0, now - self._updated)
+            refilled = self._tokens + elapsed * self.limit / self.period
+            self._tokens = min(float(self.limit), refilled)
+        self._updated = now
+
+    def reserve(self):
+        """
+        Takes a token and returns how many seconds the caller should wait
+        before sending its request.
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if self._tokens is None:
+                return 0.0
+            rate = float(self.limit) / self.period
+            fill = max(0.0, self._tokens / self.limit)
+            if fill >= self.low_water:
+                interval = 0.0
+            else:
+                interval = (1.0 - fill / self.low_water) / rate
+            start = max(now, self._next_slot)
+            self._next_slot = start + interval
+            self._tokens -= 1
+            return start - now
+
+    def acquire(self):
+        """Blocks until the caller may send a request."""
+        delay = self.reserve()
+        if delay > 0:
+            self._sleep(delay)
+
+    def update(self, response):
+        """Updates the budget from the headers of an httplib2-style response."""
+        if response is None:
+            return
+        limit = _header_int(response, 'x-rate-limit-limit')
+        remaining = _header_int(response, 'x-rate-limit-remaining')
+        status = getattr(response, 'status', None)
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if limit:
+                self.limit = limit
+            if remaining is not None and self.limit:
+                self._tokens = float(min(remaining, self.limit))
+            if status in RATE_LIMITED_STATUSES and self.limit:
+                self._tokens = 0.0
+            self._updated = now
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Recording real API traffic and replaying it offline.
+
+A Recorder wraps the ``httplib2.Http`` objects of a ConnectionPool and
+appends every request/response pair, with headers and timing, to a JSON
+lines file (gzipped if the name ends in ``.gz``). A Replayer serves those
+responses back from the same kind of pool, without network access::
+
+    recorder = Recorder('export.jsonl.gz')
+    transport = HttpTransport(url, headers, pool=ConnectionPool(factory=recorder.factory()))
+    ...
+    replayer = Replayer('export.jsonl.gz', speed=10)
+    transport = HttpTransport(url, headers, pool=ConnectionPool(factory=replayer.factory))
+
+Requests are matched on method, URL and body, falling back to method and
+URL for bodies that differ between runs (such as multipart boundaries).
+Repeated requests get the recorded responses in the order they were
+recorded. Authorization headers are never written. Streamed downloads
+and uploads (``Files.download``, ``Files.create``) bypass the pool and
+are not recorded.
+"""
+import base64
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+
+from httplib2 import Http, Response
+
+REDACTED_HEADERS = ('authorization',)
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 'b')
+    return open(path, mode + 'b')
+
+
+def _encode_body(body):
+    """Returns ``(text, encoding)`` for storing a body in JSON."""
+    if body is None:
+        return None, None
+    if not isinstance(body, bytes):
+        return body, None
+    try:
+        return body.decode('utf-8'), None
+    except UnicodeDecodeError:
+        return base64.b64encode(body).decode('ascii'), 'base64'
+
+
+def _decode_body(text, encoding):
+    if text is None:
+        return None
+    if encoding == 'base64':
+        return base64.b64decode(text)
+    return text.encode('utf-8')
+
+
+def _digest(body):
+    if body is None:
+        return None
+    if not isinstance(body, bytes):
+        body = body.encode('utf-8')
+    return hashlib.sha1(body).hexdigest()
+
+
+class Recorder(object):
+    """Appends the exchanges of every wrapped connection to ``path``."""
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._file = _open(path, 'a')
+
+    def factory(self, http_factory=Http):
+        """Returns a ConnectionPool factory making recording connections."""
+        return lambda: RecordingHttp(http_factory(), self)
+
+    def record(self, method, url, body, headers, started, duration, response, data):
+        request_body, request_encoding = _encode_body(body)
+        response_body, response_encoding = _encode_body(data)
+        entry = {
+            'started': started,
+            'duration': duration,
+            'method': method,
+            'url': url,
+            'request_headers': dict((k, v) for k, v in (headers or {}).items()
+                                    if k.lower() not in REDACTED_HEADERS),
+            'request_body': request_body,
+            'request_digest': _digest(body),
+            'status': response.status,
+            'response_headers': dict((k, v) for k, v in response.items() if k != 'status'),
+            'response_body': response_body,
+        }
+        if request_encoding:
+            entry['request_encoding'] = request_encoding
+        if response_encoding:
+            entry['response_encoding'] = response_encoding
+        line = json.dumps(entry, separators=(',', ':'), sort_keys=True)
+        with self._lock:
+            self._file.write(line.encode('utf-8') + b'\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class RecordingHttp(object):
+    """An Http object that records each exchange through a Recorder."""
+
+    def __init__(self, http, recorder):
+        self.http = http
+        self.recorder = recorder
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        started = self.recorder._clock()
+        response, data = self.http.request(uri, method, body=body, headers=headers, **kwargs)
+        self.recorder.record(method, uri, body, headers, started,
+                             self.recorder._clock() - started, response, data)
+        return response, data
+
+
+class ReplayMiss(LookupError):
+    """A request that was never recorded, or asked for more times than it was."""
+
+
+class Replayer(object):
+    """
+    Serves the exchanges recorded in ``path``.
+
+    :param speed: None to answer immediately, 1 to take as long as the
+                  recorded request did, 10 to take a tenth of that, etc.
+    """
+
+    def __init__(self, path, speed=None, sleep=time.sleep):
+        self.speed = speed
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._exact = {}
+        self._loose = {}
+        with _open(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line.decode('utf-8'))
+                entry['served'] = False
+                self._exact.setdefault((entry['method'], entry['url'], entry['request_digest']),
+                                       deque()).append(entry)
+                self._loose.setdefault((entry['method'], entry['url']), deque()).append(entry)
+
+    def factory(self):
+        """A ConnectionPool factory; connections are stateless."""
+        return ReplayHttp(self)
+
+    def _take(self, queue):
+        while queue:
+            entry = queue.popleft()
+            if not entry['served']:
+                entry['served'] = True
+                return entry
+        return None
+
+    def respond(self, method, url, body):
+        with self._lock:
+            entry = self._take(self._exact.get((method, url, _digest(body)), ())) or \
+                self._take(self._loose.get((method, url), ()))
+        if entry is None:
+            raise ReplayMiss('%s %s was not recorded' % (method, url))
+        if self.speed:
+            self._sleep(entry['duration'] / float(self.speed))
+        info = dict(entry['response_headers'])
+        info['status'] = str(entry['status'])
+        return Response(info), _decode_body(entry['response_body'],
+                                            entry.get('response_encoding'))
+
+    def remaining(self):
+        """The number of recorded exchanges not served yet."""
+        with self._lock:
+            return sum(1 for queue in self._loose.values()
+                       for entry in queue if not entry['served'])
+
+
+class ReplayHttp(object):
+    def __init__(self, replayer):
+        self.replayer = replayer
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        return self.replayer.respond(method, uri, body)
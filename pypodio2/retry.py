@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Retrying of requests that failed for transient reasons.
+"""
+import random
+import socket
+import time
+from email.utils import mktime_tz, parsedate_tz
+
+from httplib2 import HttpLib2Error
+
+RETRY_STATUSES = (420, 429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE')
+RETRYABLE_ERRORS = (socket.error, socket.timeout, HttpLib2Error)
+
+
+def _retry_after(response):
+    """Returns the delay requested by a Retry-After header, if any."""
+    try:
+        value = response.get('retry-after')
+    except AttributeError:
+        return None
+    if not isinstance(value, str):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    date = parsedate_tz(value)
+    if date is None:
+        return None
+    return max(0.0, mktime_tz(date) - time.time())
+
+
+class RetryPolicy(object):
+    """
+    Decides whether and when a failed request is sent again.
+
+    A request is retried when it fails with a socket/connection error or
+    with one of ``statuses``, but only if its method is in ``methods``
+    (the idempotent ones by default, so a POST is never sent twice unless
+    asked for). Attempt ``n`` waits a random time between zero and
+    ``backoff * 2 ** n`` seconds, capped at ``max_backoff`` ("full
+    jitter"), unless the server sent a Retry-After header, which wins.
+
+    Pass a policy to HttpTransport as ``retry_policy`` to apply it to every
+    request, or as ``retry`` to a single call to override it, e.g.
+    ``client.transport.POST(url=..., retry=RetryPolicy(methods=('POST',)))``.
+    ``retry=False`` disables retrying for that call.
+    """
+
+    def __init__(self, max_retries=3, backoff=0.5, max_backoff=60.0,
+                 statuses=RETRY_STATUSES, methods=IDEMPOTENT_METHODS,
+                 jitter=True, sleep=time.sleep):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+        self.methods = methods
+        self.jitter = jitter
+        self.sleep = sleep
+
+    def should_retry(self, method, attempt, response=None, error=None):
+        """
+        ``attempt`` counts the retries already made, starting at 0. The
+        transport passes either the ``response`` it got or the connection
+        ``error`` it caught.
+        """
+        if attempt >= self.max_retries or method not in self.methods:
+            return False
+        if error is not None:
+            return True
+        return getattr(response, 'status', None) in self.statuses
+
+    def delay(self, attempt, response=None):
+        """How many seconds to wait before retry number ``attempt``."""
+        if response is not None:
+            retry_after = _retry_after(response)
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
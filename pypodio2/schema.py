@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Precompiled app schemas for building and validating item payloads.
+
+An AppSchema is built once from an ``Application.find`` response and
+indexes the app's fields by external_id and field_id, and category
+options by label, so translating a payload for ``Item.create`` or
+``Item.update`` costs a dict lookup per field::
+
+    schema = client.Application.get_schema(app_id)
+    client.Item.create(app_id, {'fields': schema.translate({
+        'title': 'Quarterly report',
+        'status': 'Done',            # category option label -> option id
+        'customer': [1234],          # app reference, checked to be item ids
+        'project': [(8, 99)],        # (app_id, item_id), app checked too
+    })})
+
+App reference fields take item ids, ``(app_id, item_id)`` pairs or
+ItemRecords. Bare item ids can't be checked against the referenced apps
+without fetching the items, so only pairs and ItemRecords are.
+"""
+import numbers
+import threading
+
+from .models import ItemRecord
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+
+class SchemaError(ValueError):
+    pass
+
+
+class FieldSchema(object):
+    """The parts of a field definition needed to build values for it."""
+
+    def __init__(self, field):
+        config = field.get('config') or {}
+        settings = config.get('settings') or {}
+        self.field_id = field['field_id']
+        self.external_id = field.get('external_id')
+        self.type = field.get('type')
+        self.label = field.get('label') or config.get('label')
+        self.required = bool(config.get('required'))
+        self.multiple = bool(settings.get('multiple'))
+        self.options = {}
+        self.option_ids = set()
+        for option in settings.get('options') or ():
+            if option.get('status', 'active') != 'active':
+                continue
+            self.options[option['text']] = option['id']
+            self.option_ids.add(option['id'])
+        self.referenced_app_ids = set(app['app_id'] if isinstance(app, dict) else app
+                                      for app in settings.get('referenced_apps') or ())
+
+    def option_id(self, option):
+        """Maps a category option label (or id) to its id."""
+        if option in self.option_ids and not isinstance(option, string_types):
+            return option
+        try:
+            return self.options[option]
+        except KeyError:
+            raise SchemaError('%r is not an option of field %r' % (option, self.external_id))
+
+    def translate(self, value):
+        """Converts a friendly value into what the API expects for this field."""
+        if self.type == 'category':
+            if isinstance(value, (list, tuple)):
+                if len(value) > 1 and not self.multiple:
+                    raise SchemaError('Field %r takes a single option' % self.external_id)
+                return [self.option_id(v) for v in value]
+            return self.option_id(value)
+        if self.type == 'app':
+            if isinstance(value, (list, tuple)):
+                return [self.reference(v) for v in value]
+            return self.reference(value)
+        return value
+
+    def reference(self, target):
+        """
+        Maps an app reference target (an item id, an ``(app_id, item_id)``
+        pair or an ItemRecord) to its item id, checking the app it is in.
+        """
+        if isinstance(target, ItemRecord):
+            app_id, item_id = target.app_id, target.item_id
+        elif isinstance(target, tuple) and len(target) == 2:
+            app_id, item_id = target
+        else:
+            app_id, item_id = None, target
+        if not isinstance(item_id, numbers.Integral):
+            raise SchemaError('Field %r takes item ids, got %r' % (self.external_id, target))
+        if app_id is not None and self.referenced_app_ids and \
+                app_id not in self.referenced_app_ids:
+            raise SchemaError('Field %r cannot reference items of app %s'
+                              % (self.external_id, app_id))
+        return item_id
+
+    def __repr__(self):
+        return '<FieldSchema %s %r (%s)>' % (self.field_id, self.external_id, self.type)
+
+
+class AppSchema(object):
+    """The field index of one app revision."""
+
+    def __init__(self, app):
+        self.app_id = app.get('app_id')
+        self.revision = app.get('current_revision')
+        self.fields = [FieldSchema(f) for f in app.get('fields') or ()
+                       if f.get('status', 'active') == 'active']
+        self._by_external_id = dict((f.external_id, f) for f in self.fields)
+        self._by_id = dict((f.field_id, f) for f in self.fields)
+
+    def field(self, key):
+        """Looks a field up by external_id or field_id."""
+        field = self._by_external_id.get(key) or self._by_id.get(key)
+        if field is None:
+            raise SchemaError('App %s has no field %r' % (self.app_id, key))
+        return field
+
+    def field_id(self, external_id):
+        return self.field(external_id).field_id
+
+    def option_id(self, field, label):
+        return self.field(field).option_id(label)
+
+    def translate(self, values):
+        """
+        Translates ``{external_id or field_id: value}`` into the
+        ``{field_id: value}`` dict Podio expects as an item's ``fields``,
+        mapping category labels to option ids and rejecting unknown fields
+        or options with a SchemaError.
+        """
+        fields = {}
+        for key, value in values.items():
+            field = self.field(key)
+            fields[field.field_id] = field.translate(value)
+        return fields
+
+    def missing_required(self, values):
+        """Returns the external_ids of required fields absent from ``values``."""
+        present = set(self.field(key).field_id for key in values)
+        return [f.external_id for f in self.fields if f.required and f.field_id not in present]
+
+
+class SchemaCache(object):
+    """
+    Keeps one AppSchema per app_id, fetched through ``client`` on first
+    use. Passing the app revision you have seen (for example from an item
+    or a webhook) to ``get`` refetches the schema if it has changed.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._schemas = {}
+        self._lock = threading.Lock()
+
+    def get(self, app_id, revision=None):
+        schema = self._schemas.get(app_id)
+        if schema is not None and (revision is None or schema.revision == revision):
+            return schema
+        with self._lock:
+            schema = self._schemas.get(app_id)
+            if schema is None or (revision is not None and schema.revision != revision):
+                schema = AppSchema(self.client.Application.find(app_id))
+                self._schemas[app_id] = schema
+            return schema
+
+    def invalidate(self, app_id=None):
+        with self._lock:
+            if app_id is None:
+                self._schemas.clear()
+            else:
+                self._schemas.pop(app_id, None)
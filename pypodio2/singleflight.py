@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Collapsing of identical concurrent calls into one.
+"""
+import threading
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Runs at most one call per key at a time. Threads asking for a key that
+    is already in flight wait for that call and share its result (or its
+    exception) instead of starting their own. Once the call finishes the
+    key is forgotten, so later callers start a fresh call.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if leader:
+            try:
+                call.result = func()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self):
+        """The number of calls currently running."""
+        return len(self._calls)
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+A local SQLite copy of app items for answering reads without the API.
+
+SQLiteItemStore keeps each item as JSON next to indexed columns for its
+item_id, app_id, external_id and timestamps, plus one indexed row per
+value of the fields it is told to index. ``filter`` takes the same
+attributes as ``Item.filter`` and returns the same shape of response::
+
+    store = SQLiteItemStore('/var/lib/mirror/items.db', indexed_fields=['status'])
+    for event in ItemSync(client, app_id, checkpoints).run():
+        store.apply(event)
+
+    store.filter(app_id, {'filters': {'status': [2]}, 'sort_by': 'last_edit_on'})
+"""
+import json
+import numbers
+import sqlite3
+import threading
+
+from .models import ItemRecord, _decode
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+# Filter and sort keys answered from the items table itself.
+ITEM_COLUMNS = ('item_id', 'app_item_id', 'external_id', 'created_on', 'last_edit_on')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    item_id INTEGER PRIMARY KEY,
+    app_id INTEGER,
+    app_item_id INTEGER,
+    external_id TEXT,
+    created_on TEXT,
+    last_edit_on TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_app ON items (app_id, last_edit_on);
+CREATE INDEX IF NOT EXISTS items_external_id ON items (app_id, external_id);
+CREATE TABLE IF NOT EXISTS field_values (
+    item_id INTEGER NOT NULL,
+    field_id INTEGER NOT NULL,
+    external_id TEXT,
+    value
+);
+CREATE INDEX IF NOT EXISTS field_values_id ON field_values (field_id, value);
+CREATE INDEX IF NOT EXISTS field_values_external_id ON field_values (external_id, value);
+CREATE INDEX IF NOT EXISTS field_values_item ON field_values (item_id);
+"""
+
+_SCALAR_TYPES = (string_types, numbers.Number)
+
+
+def _index_values(field):
+    """The values of a field as stored in field_values, matching what
+    Item.filter takes: option ids for categories, item ids for app
+    references, profile ids for contacts, start dates and numbers."""
+    field_type = field.get('type')
+    values = []
+    for value in field.get('values') or ():
+        if field_type == 'category':
+            value = value['value']['id']
+        else:
+            value = _decode(field_type, value)
+            if field_type == 'money':
+                value = value['value']
+            if field_type in ('number', 'money', 'progress', 'calculation'):
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    pass
+        if isinstance(value, _SCALAR_TYPES):
+            values.append(value)
+    return values
+
+
+class SQLiteItemStore(object):
+    """
+    :param path: Database file, or ``':memory:'``.
+    :param indexed_fields: External ids or field ids of the fields to
+                           index for ``filter``. None indexes every field.
+    """
+
+    def __init__(self, path=':memory:', indexed_fields=None):
+        self.indexed_fields = None if indexed_fields is None else set(indexed_fields)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.executescript(_SCHEMA)
+
+    def _indexed(self, field):
+        return self.indexed_fields is None or field['field_id'] in self.indexed_fields \
+            or field.get('external_id') in self.indexed_fields
+
+    def save(self, item):
+        """Adds or replaces an item, given as an API dict or an ItemRecord."""
+        self.save_many([item])
+
+    def save_many(self, items):
+        with self._lock, self._db:
+            for item in items:
+                self._save(item)
+
+    def _save(self, item):
+        if isinstance(item, ItemRecord):
+            item = item.to_dict()
+        item_id = item['item_id']
+        self._db.execute(
+            'INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (item_id, (item.get('app') or {}).get('app_id'), item.get('app_item_id'),
+             item.get('external_id'), item.get('created_on'), item.get('last_edit_on'),
+             json.dumps(item)))
+        self._db.execute('DELETE FROM field_values WHERE item_id = ?', (item_id,))
+        self._db.executemany(
+            'INSERT INTO field_values VALUES (?, ?, ?, ?)',
+            [(item_id, field['field_id'], field.get('external_id'), value)
+             for field in item.get('fields') or () if self._indexed(field)
+             for value in _index_values(field)])
+
+    def delete(self, item_id):
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM items WHERE item_id = ?', (item_id,))
+            self._db.execute('DELETE FROM field_values WHERE item_id = ?', (item_id,))
+
+    def apply(self, event):
+        """Applies a ChangeEvent from pypodio2.sync.ItemSync."""
+        if event.item is None:
+            self.delete(event.item_id)
+        else:
+            self.save(event.item)
+
+    def get(self, item_id):
+        """Returns the stored item dict, or None."""
+        with self._lock:
+            row = self._db.execute('SELECT data FROM items WHERE item_id = ?',
+                                   (item_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_all_by_external_id(self, app_id, external_id):
+        """Answers Item.find_all_by_external_id locally."""
+        items = self._select('app_id = ? AND external_id = ?', [app_id, external_id],
+                             'item_id', False, None, 0)
+        return {'total': len(items), 'filtered': len(items), 'items': items}
+
+    def filter(self, app_id, attributes=None):
+        """
+        Answers Item.filter locally. Supports ``filters`` on item columns
+        (item_id, app_item_id, external_id, created_on, last_edit_on) and
+        indexed fields, each given a value, a list of values (matching any)
+        or a ``{'from': ..., 'to': ...}`` range; ``sort_by`` on the same
+        keys, ``sort_desc``, ``limit`` and ``offset``.
+        """
+        attributes = attributes or {}
+        where, params = ['app_id = ?'], [app_id]
+        for key, value in (attributes.get('filters') or {}).items():
+            column, column_params = self._column(key)
+            if column == 'value':
+                condition, value_params = self._condition('value', value)
+                where.append('item_id IN (SELECT item_id FROM field_values WHERE %s AND %s)'
+                             % (column_params[0], condition))
+                params.extend(column_params[1:] + value_params)
+            else:
+                condition, value_params = self._condition(column, value)
+                where.append(condition)
+                params.extend(value_params)
+
+        with self._lock:
+            total = self._db.execute('SELECT COUNT(*) FROM items WHERE app_id = ?',
+                                     (app_id,)).fetchone()[0]
+            filtered = self._db.execute('SELECT COUNT(*) FROM items WHERE ' +
+                                        ' AND '.join(where), params).fetchone()[0]
+        items = self._select(' AND '.join(where), params, attributes.get('sort_by', 'item_id'),
+                             attributes.get('sort_desc', True), attributes.get('limit', 30),
+                             attributes.get('offset', 0))
+        return {'total': total, 'filtered': filtered, 'items': items}
+
+    def _column(self, key):
+        if key in ITEM_COLUMNS:
+            return key, []
+        if self.indexed_fields is not None and key not in self.indexed_fields:
+            raise ValueError('Field %r is not indexed' % (key,))
+        if isinstance(key, numbers.Integral):
+            return 'value', ['field_id = ?', key]
+        return 'value', ['external_id = ?', key]
+
+    def _condition(self, column, value):
+        if isinstance(value, dict):
+            conditions, params = [], []
+            if value.get('from') is not None:
+                conditions.append('%s >= ?' % column)
+                params.append(value['from'])
+            if value.get('to') is not None:
+                conditions.append('%s <= ?' % column)
+                params.append(value['to'])
+            return '(%s)' % (' AND '.join(conditions) or '1'), params
+        if isinstance(value, (list, tuple, set)):
+            value = list(value)
+            return '%s IN (%s)' % (column, ', '.join('?' * len(value))), value
+        return '%s = ?' % column, [value]
+
+    def _select(self, where, params, sort_by, sort_desc, limit, offset):
+        column, column_params = self._column(sort_by)
+        if column == 'value':
+            column = '(SELECT MIN(value) FROM field_values WHERE field_values.item_id = ' \
+                     'items.item_id AND %s)' % column_params[0]
+            column_params = column_params[1:]
+        query = 'SELECT data FROM items WHERE %s ORDER BY %s %s, item_id LIMIT ? OFFSET ?' % (
+            where, column, 'DESC' if sort_desc else 'ASC')
+        with self._lock:
+            rows = self._db.execute(query, params + column_params +
+                                    [-1 if limit is None else limit, offset]).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
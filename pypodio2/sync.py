@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental mirroring of app items.
+
+An ItemSync remembers, per app, the newest ``last_edit_on`` it has seen
+and the ids of the items it knows about. Each run asks ``Item.filter``
+only for items edited since that checkpoint, sorted by ``last_edit_on``,
+and yields a ChangeEvent for each of them::
+
+    sync = ItemSync(client, app_id, FileCheckpointStore('/var/lib/mirror'))
+    for event in sync.run():
+        if event.type == 'deleted':
+            db.delete(event.item_id)
+        else:
+            db.save(event.item)
+
+Deletions are detected by comparing the app's item count, which every
+filter response carries, with the number of known items. Only when they
+differ does the sync list the app's item ids to find out which went away.
+"""
+import json
+import os
+from collections import namedtuple
+
+from .tokenstore import replace_file
+
+CREATED = 'created'
+UPDATED = 'updated'
+DELETED = 'deleted'
+
+# ``item`` is None for deleted items.
+ChangeEvent = namedtuple('ChangeEvent', ['type', 'item_id', 'item'])
+
+# Trims filter responses to the fields needed to list item ids and page
+# through them by last_edit_on.
+ID_SCAN_FIELDS = 'items.view(micro).fields(last_edit_on)'
+
+
+class Checkpoint(object):
+    """
+    Where a sync of one app stopped: the newest ``last_edit_on`` seen, the
+    ids of the items edited at exactly that time (so they are not reported
+    again, as the filter boundary is inclusive), and every known item id.
+    """
+
+    def __init__(self, last_edit_on=None, item_ids=(), known_ids=()):
+        self.last_edit_on = last_edit_on
+        self.item_ids = set(item_ids)
+        self.known_ids = set(known_ids)
+
+    @property
+    def item_id(self):
+        """The highest id among the items edited at ``last_edit_on``."""
+        return max(self.item_ids) if self.item_ids else None
+
+    def to_dict(self):
+        return {'last_edit_on': self.last_edit_on,
+                'item_ids': sorted(self.item_ids),
+                'known_ids': sorted(self.known_ids)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('last_edit_on'), data.get('item_ids', ()),
+                   data.get('known_ids', ()))
+
+
+class MemoryCheckpointStore(object):
+    def __init__(self):
+        self._checkpoints = {}
+
+    def get(self, app_id):
+        data = self._checkpoints.get(app_id)
+        return Checkpoint.from_dict(data) if data is not None else None
+
+    def set(self, app_id, checkpoint):
+        self._checkpoints[app_id] = checkpoint.to_dict()
+
+
+class FileCheckpointStore(object):
+    """Keeps one JSON checkpoint file per app in ``directory``."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _path(self, app_id):
+        return os.path.join(self.directory, 'app-%s.json' % app_id)
+
+    def get(self, app_id):
+        try:
+            with open(self._path(app_id)) as f:
+                return Checkpoint.from_dict(json.load(f))
+        except (IOError, OSError, ValueError):
+            return None
+
+    def set(self, app_id, checkpoint):
+        path = self._path(app_id)
+        tmp_path = '%s.%s.tmp' % (path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint.to_dict(), f)
+        replace_file(tmp_path, path)
+
+
+class ItemSync(object):
+    """
+    Syncs the items of ``app_id`` against the checkpoint kept in ``store``.
+
+    :param filters: Extra ``Item.filter`` filters, for mirroring part of an
+                    app. Checking for deletions then costs one more request.
+    :param limit: Items per filter request.
+    """
+
+    def __init__(self, client, app_id, store, filters=None, limit=500):
+        self.client = client
+        self.app_id = app_id
+        self.store = store
+        self.filters = dict(filters or {})
+        self.limit = limit
+
+    def run(self, full_scan=False):
+        """
+        Yields the ChangeEvents since the last run. The new checkpoint is
+        saved once every event has been consumed, so an interrupted run is
+        repeated in full next time.
+
+        :param full_scan: List every item id to look for deletions even if
+                          the item count matches, e.g. after the checkpoint
+                          was restored from an older backup.
+        """
+        checkpoint = self.store.get(self.app_id) or Checkpoint()
+        known_ids = set(checkpoint.known_ids)
+        last_edit_on = checkpoint.last_edit_on
+        boundary_ids = set(checkpoint.item_ids)
+        counts = {}
+
+        for item in self._iter_items(self.filters, counts, since=checkpoint.last_edit_on,
+                                     skip_ids=checkpoint.item_ids):
+            item_id = item['item_id']
+            edited_on = item.get('last_edit_on')
+            event_type = UPDATED if item_id in known_ids else CREATED
+            known_ids.add(item_id)
+            if edited_on is not None:
+                if last_edit_on is None or edited_on > last_edit_on:
+                    last_edit_on = edited_on
+                    boundary_ids = set()
+                if edited_on == last_edit_on:
+                    boundary_ids.add(item_id)
+            yield ChangeEvent(event_type, item_id, item)
+
+        total = counts.get('total') if not self.filters else self._count()
+        if full_scan or (total is not None and total != len(known_ids)):
+            current_ids = set(item['item_id'] for item in self._iter_items(
+                self.filters, counts, GET={'fields': ID_SCAN_FIELDS}))
+            for item_id in sorted(known_ids - current_ids):
+                yield ChangeEvent(DELETED, item_id, None)
+            known_ids &= current_ids
+            boundary_ids &= current_ids
+
+        self.store.set(self.app_id, Checkpoint(last_edit_on, boundary_ids, known_ids))
+
+    def _iter_items(self, filters, counts, since=None, skip_ids=(), **kwargs):
+        """
+        Yields the items matching ``filters`` edited at or after ``since``,
+        oldest first, except ``skip_ids`` edited exactly at ``since``.
+
+        Each page asks for the items edited since the last one of the
+        previous page instead of using offsets, so an item edited during the
+        run moves to a later page rather than shifting the items after it
+        back over a page boundary.
+        """
+        cursor, seen, offset = since, set(skip_ids), 0
+        while True:
+            page_filters = dict(filters)
+            if cursor is not None:
+                page_filters['last_edit_on'] = {'from': cursor}
+            page = self.client.Item.filter(self.app_id, {
+                'filters': page_filters,
+                'sort_by': 'last_edit_on',
+                'sort_desc': False,
+                'offset': offset,
+                'limit': self.limit,
+            }, **kwargs)
+            counts['total'] = page.get('total')
+            items = page['items']
+            for item in items:
+                if item.get('last_edit_on') == cursor and item['item_id'] in seen:
+                    continue
+                yield item
+            if len(items) < self.limit:
+                return
+            last_edit_on = items[-1].get('last_edit_on')
+            if last_edit_on == cursor:
+                # A whole page edited at the same moment; step over it.
+                offset += len(items)
+            else:
+                cursor, seen, offset = last_edit_on, set(), 0
+            seen.update(item['item_id'] for item in items
+                        if item.get('last_edit_on') == cursor)
+
+    def _count(self):
+        # 'total' counts every item in the app; with filters we need the
+        # number of items matching them alone.
+        page = self.client.Item.filter(self.app_id, {'filters': self.filters, 'limit': 1},
+                                       GET={'fields': ID_SCAN_FIELDS})
+        return page.get('filtered')
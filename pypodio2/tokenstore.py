@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Token stores let several clients, threads or processes share one OAuth
+access token instead of each performing its own grant.
+
+A store maps a key (see BaseOAuthAuthorization.token_key) to the dict
+produced by OAuthToken.to_dict, and provides a lock per key so only one
+holder refreshes a token at a time.
+"""
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class MemoryTokenStore(object):
+    """Shares tokens between the clients of a single process."""
+
+    def __init__(self):
+        self._tokens = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def get(self, key):
+        return self._tokens.get(key)
+
+    def set(self, key, token):
+        self._tokens[key] = dict(token)
+
+    @contextmanager
+    def lock(self, key):
+        with self._guard:
+            lock = self._locks.setdefault(key, threading.RLock())
+        with lock:
+            yield
+
+
+class FileTokenStore(object):
+    """
+    Shares tokens between processes on one machine through files in
+    ``directory``, one JSON file per key. Updates are serialised with an
+    advisory lock on a companion ``.lock`` file and written atomically, so
+    readers never see a half-written token. The directory is created, and
+    token files are written, readable by the current user only.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+
+    def _path(self, key, suffix):
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + suffix)
+
+    def get(self, key):
+        try:
+            with open(self._path(key, '.json')) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def set(self, key, token):
+        path = self._path(key, '.json')
+        tmp_path = '%s.%s.tmp' % (path, os.getpid())
+        # Created with its final mode, so the token is never readable by others.
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(token, f)
+        replace_file(tmp_path, path)
+
+    @contextmanager
+    def lock(self, key):
+        with open(self._path(key, '.lock'), 'a+') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def replace_file(src, dst):
+    """
+    Renames ``src`` over ``dst``. On POSIX this is atomic; os.rename does not
+    overwrite on Windows, and os.replace is Python 3 only, so there ``dst`` is
+    removed first.
+    """
+    if os.name == 'nt' and os.path.exists(dst):
+        os.remove(dst)
+    os.rename(src, dst)
@@ -1,4 +1,10 @@
 # -*- coding: utf-8 -*-
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+
 from httplib2 import Http
 
 try:
@@ -6,9 +12,25 @@ try:
 except ImportError:
     from urllib import urlencode
 
+try:
+    from urllib.parse import urljoin, urlsplit
+    from http.client import HTTPConnection, HTTPSConnection
+except ImportError:
+    from urlparse import urljoin, urlsplit
+    from httplib import HTTPConnection, HTTPSConnection
+
+from . import compression
+# ConnectionPool and PoolTimeout are also imported from here.
+from .backends import (MAX_REDIRECTS, REDIRECT_STATUSES, ConnectionPool, Httplib2Backend,
+                       PoolTimeout)
+from .codec import DEFAULT_CODEC
 from .encode import multipart_encode
+from .metrics import RequestInfo
+from .ratelimit import RATE_LIMITED_STATUSES
+from .retry import RETRYABLE_ERRORS
+from .singleflight import SingleFlight
 
-import json
+DEFAULT_STREAM_TIMEOUT = 60
 
 
 class OAuthToken(object):
@@ -24,64 +46,221 @@ class OAuthToken(object):
         self.expires_in = resp['expires_in']
         self.access_token = resp['access_token']
         self.refresh_token = resp['refresh_token']
+        self.expires_at = resp.get('expires_at') or time.time() + self.expires_in
+
+    def expires_within(self, seconds):
+        return time.time() + seconds >= self.expires_at
+
+    def to_dict(self):
+        return {'expires_in': self.expires_in,
+                'expires_at': self.expires_at,
+                'access_token': self.access_token,
+                'refresh_token': self.refresh_token}
 
     def to_headers(self):
         return {'authorization': "OAuth2 %s" % self.access_token}
 
 
-class OAuthAuthorization(object):
-    """Generates headers for Podio OAuth2 Authorization"""
-
-    def __init__(self, login, password, key, secret, domain):
-        body = {'grant_type': 'password',
-                'client_id': key,
-                'client_secret': secret,
-                'username': login,
-                'password': password}
+class BaseOAuthAuthorization(object):
+    """
+    Generates headers for Podio OAuth2 Authorization and keeps the access
+    token fresh.
+
+    Once the token is within ``refresh_margin`` seconds of expiring, a
+    background thread exchanges the refresh token for a new one while the
+    current token keeps being handed out. Only if the token is about to
+    expire for real (``expiry_margin``) does a caller block on the refresh.
+    Subclasses supply the initial grant through ``_grant_body`` and the
+    identity the token belongs to through ``_token_identity``.
+
+    If a ``token_store`` (see pypodio2.tokenstore) is given, tokens are
+    shared through it: a still-valid stored token is reused instead of
+    performing a grant, and refreshes happen under the store's lock, so
+    only one process refreshes while the others pick up its result.
+    """
+    refresh_margin = 300
+    expiry_margin = 30
+
+    def __init__(self, client_id, client_secret, domain, token_store=None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.domain = domain
+        self.token_store = token_store
+        self._lock = threading.Lock()
+        self._refreshing = False
+        with self._store_lock():
+            token = self._shared_token(self.expiry_margin)
+            if token is None:
+                token = self._request_token(self._grant_body())
+                self._save_token(token)
+        self.token = token
+
+    def _grant_body(self):
+        raise NotImplementedError
+
+    def _token_identity(self):
+        raise NotImplementedError
+
+    @property
+    def token_key(self):
+        """The key this authorization's token is kept under in a token store."""
+        return '%s:%s:%s' % (self.domain, self.client_id, self._token_identity())
+
+    @contextmanager
+    def _store_lock(self):
+        if self.token_store is None:
+            yield
+        else:
+            with self.token_store.lock(self.token_key):
+                yield
+
+    def _shared_token(self, margin):
+        """Returns the stored token if it is valid for at least ``margin`` seconds."""
+        if self.token_store is None:
+            return None
+        data = self.token_store.get(self.token_key)
+        try:
+            token = OAuthToken(data)
+        except (KeyError, TypeError, AttributeError):
+            return None
+        if token.expires_within(margin):
+            return None
+        return token
+
+    def _save_token(self, token):
+        if self.token_store is not None:
+            self.token_store.set(self.token_key, token.to_dict())
+
+    def _request_token(self, body):
         h = Http()
         headers = {'content-type': 'application/x-www-form-urlencoded'}
-        response, data = h.request(domain + "/oauth/token", "POST",
+        response, data = h.request(self.domain + "/oauth/token", "POST",
                                    urlencode(body), headers=headers)
-        self.token = OAuthToken(_handle_response(response, data))
+        return OAuthToken(_handle_response(response, data))
+
+    def refresh(self, stale_token=None, stale_headers=None):
+        """
+        Replaces the access token with a new one. If ``stale_token`` is
+        given and another thread already replaced it, nothing is done; the
+        same goes for ``stale_headers``, the headers a request carrying the
+        old token was refused with.
+        """
+        with self._lock:
+            if stale_token is not None and self.token is not stale_token:
+                return
+            if stale_headers is not None and stale_headers.get('authorization') != \
+                    self.token.to_headers()['authorization']:
+                return
+            with self._store_lock():
+                token = self._shared_token(self.refresh_margin)
+                if token is None or token.access_token == self.token.access_token:
+                    token = self._refreshed_token()
+                    self._save_token(token)
+                self.token = token
+
+    def _refreshed_token(self):
+        body = {'grant_type': 'refresh_token',
+                'client_id': self.client_id,
+                'client_secret': self.client_secret,
+                'refresh_token': self.token.refresh_token}
+        try:
+            return self._request_token(body)
+        except TransportException:
+            # The refresh token itself may have been revoked or expired;
+            # fall back to the original grant.
+            return self._request_token(self._grant_body())
+
+    def _refresh_in_background(self, token):
+        try:
+            self.refresh(stale_token=token)
+        except Exception:
+            pass  # The next call will try again, synchronously if need be.
+        finally:
+            self._refreshing = False
 
     def __call__(self):
+        token = self.token
+        if token.expires_within(self.expiry_margin):
+            self.refresh(stale_token=token)
+        elif token.expires_within(self.refresh_margin) and not self._refreshing:
+            self._refreshing = True
+            thread = threading.Thread(target=self._refresh_in_background, args=(token,))
+            thread.daemon = True
+            thread.start()
         return self.token.to_headers()
 
 
-class OAuthRefreshTokenAuthorization(object):
+class OAuthAuthorization(BaseOAuthAuthorization):
+    """Generates headers for Podio OAuth2 Authorization"""
+
+    def __init__(self, login, password, key, secret, domain, token_store=None):
+        self.login = login
+        self.password = password
+        super(OAuthAuthorization, self).__init__(key, secret, domain, token_store)
+
+    def _token_identity(self):
+        return 'user:%s' % self.login
+
+    def _grant_body(self):
+        return {'grant_type': 'password',
+                'client_id': self.client_id,
+                'client_secret': self.client_secret,
+                'username': self.login,
+                'password': self.password}
+
+
+class OAuthRefreshTokenAuthorization(BaseOAuthAuthorization):
     """Generates headers for Podio OAuth2 Authorization from a refresh token."""
 
-    def __init__(self, client_id, client_secret, refresh_token, domain):
-        body = {'grant_type': 'refresh_token',
-                'client_id': client_id,
-                'client_secret': client_secret,
-                'refresh_token': refresh_token}
-        http = Http()
-        headers = {'content-type': 'application/x-www-form-urlencoded'}
-        response, data = http.request(domain + '/oauth/token', 'POST',
-                                      urlencode(body), headers=headers)
-        self.token = OAuthToken(_handle_response(response, data))
+    def __init__(self, client_id, client_secret, refresh_token, domain, token_store=None):
+        self.initial_refresh_token = refresh_token
+        super(OAuthRefreshTokenAuthorization, self).__init__(client_id, client_secret, domain,
+                                                             token_store)
 
-    def __call__(self):
-        return self.token.to_headers()
+    def _token_identity(self):
+        digest = hashlib.sha1(self.initial_refresh_token.encode('utf-8')).hexdigest()
+        return 'refresh:%s' % digest
 
+    def _grant_body(self):
+        return {'grant_type': 'refresh_token',
+                'client_id': self.client_id,
+                'client_secret': self.client_secret,
+                'refresh_token': self.initial_refresh_token}
 
-class OAuthAppAuthorization(object):
 
-    def __init__(self, app_id, app_token, key, secret, domain):
-        body = {'grant_type': 'app',
-                'client_id': key,
-                'client_secret': secret,
-                'app_id': app_id,
-                'app_token': app_token}
-        h = Http()
-        headers = {'content-type': 'application/x-www-form-urlencoded'}
-        response, data = h.request(domain + "/oauth/token", "POST",
-                                   urlencode(body), headers=headers)
-        self.token = OAuthToken(_handle_response(response, data))
+class OAuthAppAuthorization(BaseOAuthAuthorization):
 
-    def __call__(self):
-        return self.token.to_headers()
+    def __init__(self, app_id, app_token, key, secret, domain, token_store=None):
+        self.app_id = app_id
+        self.app_token = app_token
+        super(OAuthAppAuthorization, self).__init__(key, secret, domain, token_store)
+
+    def _token_identity(self):
+        return 'app:%s' % self.app_id
+
+    def _grant_body(self):
+        return {'grant_type': 'app',
+                'client_id': self.client_id,
+                'client_secret': self.client_secret,
+                'app_id': self.app_id,
+                'app_token': self.app_token}
+
+
+def refresh_headers(headers_factory, stale_headers=None):
+    """
+    Asks ``headers_factory`` to renew its credentials. Returns False if it
+    has no way to do so.
+
+    :param stale_headers: The headers a request was refused with. If the
+                          factory has moved on from them (another thread
+                          refreshed first), it need not refresh again.
+    """
+    refresh = getattr(headers_factory, 'refresh', None)
+    if refresh is None:
+        return False
+    if stale_headers is None:
+        return refresh() is not False
+    return refresh(stale_headers=stale_headers) is not False
 
 
 class UserAgentHeaders(object):
@@ -94,6 +273,9 @@ class UserAgentHeaders(object):
         headers['User-Agent'] = self.user_agent
         return headers
 
+    def refresh(self, stale_headers=None):
+        return refresh_headers(self.base_headers_factory, stale_headers)
+
 
 class KeepAliveHeaders(object):
 
@@ -105,6 +287,9 @@ class KeepAliveHeaders(object):
         headers['Connection'] = 'Keep-Alive'
         return headers
 
+    def refresh(self, stale_headers=None):
+        return refresh_headers(self.base_headers_factory, stale_headers)
+
 
 class TransportException(Exception):
 
@@ -117,50 +302,393 @@ class TransportException(Exception):
         return "TransportException(%s): %s" % (self.status, self.content)
 
 
+class RateLimitException(TransportException):
+    """Podio refused the request because the rate limit has been exceeded."""
+
+
+class RequestBuilder(object):
+    """
+    Collects the method and path of a single request.
+
+    Every attribute access on an HttpTransport starts a new builder, so
+    concurrent callers never share request state. Supports the same
+    syntax as before, e.g. ``transport.GET.user.status()`` or
+    ``transport.POST(url='/item/app/1/', body=..., type=...)``.
+    """
+
+    def __init__(self, transport, method='GET', attribute_stack=()):
+        self._transport = transport
+        self._method = method
+        self._attribute_stack = list(attribute_stack)
+
+    def _extend(self, method=None, name=None):
+        stack = self._attribute_stack
+        if name is not None:
+            stack = stack + [name]
+        return RequestBuilder(self._transport, method or self._method, stack)
+
+    def __call__(self, *args, **kwargs):
+        stack = self._attribute_stack + [str(a) for a in args]
+        return self._transport.request(self._method, stack, kwargs)
+
+    def __getitem__(self, name):
+        return self._extend(name=name)
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if name in self._transport._supported_methods:
+            return self._extend(method=name)
+        elif not name.endswith(')'):
+            return self._extend(name=name)
+        return self
+
+
+class StreamingResponse(object):
+    """
+    A response whose body has not been read yet. ``headers`` holds the
+    lower-cased response headers. Close it, or use it as a context
+    manager, to release the connection.
+
+    A compressed body is decoded as it is read; its Content-Encoding is
+    then found under ``-content-encoding`` and Content-Length still gives
+    the size sent over the wire.
+    """
+
+    def __init__(self, connection, response):
+        self._connection = connection
+        self._response = response
+        self.status = response.status
+        self.headers = dict((k.lower(), v) for k, v in response.getheaders())
+        self._decoder = compression.decoder(self.headers.get('content-encoding'))
+        if self._decoder is not None:
+            self.headers['-content-encoding'] = self.headers.pop('content-encoding')
+
+    def get(self, name, default=None):
+        return self.headers.get(name, default)
+
+    def read(self, amt=None):
+        """
+        Reads up to ``amt`` bytes off the wire (all of them by default) and
+        returns them decoded; an empty result means the body is exhausted.
+        """
+        if self._decoder is None:
+            return self._response.read(amt)
+        while True:
+            chunk = self._response.read(amt)
+            if not chunk:
+                return self._decoder.flush()
+            data = self._decoder.decompress(chunk)
+            if amt is None:
+                return data + self._decoder.flush()
+            if data:
+                return data
+
+    def iter_content(self, chunk_size=64 * 1024):
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        self._response.close()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
 class HttpTransport(object):
-    def __init__(self, url, headers_factory):
+    # Whether requests return awaitables; see pypodio2.aio.
+    is_async = False
+
+    def __init__(self, url, headers_factory, pool=None, rate_limiter=None, retry_policy=None,
+                 cache=None, single_flight=False, codec=None, hooks=None, backend=None,
+                 compress_requests=False, min_compress_size=compression.MIN_COMPRESS_SIZE):
         self._api_url = url
         self._headers_factory = headers_factory
         self._supported_methods = ("GET", "POST", "PUT", "HEAD", "DELETE",)
-        self._attribute_stack = []
-        self._method = "GET"
-        self._posts = []
-        self._http = Http()
-        self._params = {}
+        # See pypodio2.backends; ``pool`` is kept for the httplib2 backend.
+        self.backend = backend if backend is not None else Httplib2Backend(pool=pool)
+        self._rate_limiter = rate_limiter
+        self._retry_policy = retry_policy
+        self.cache = cache
+        # When enabled, identical concurrent GETs share one request and one
+        # parsed result, which callers must then treat as read-only.
+        self._single_flight = SingleFlight() if single_flight else None
+        self.codec = codec or DEFAULT_CODEC
+        self._default_handler = partial(_handle_response, codec=self.codec)
+        # Objects with before_request(info) and after_request(info) methods,
+        # see pypodio2.metrics.
+        self._hooks = list(hooks or ())
+        # Gzip JSON request bodies of at least min_compress_size bytes; only
+        # for servers known to accept compressed requests.
+        self._compress_requests = compress_requests
+        self._min_compress_size = min_compress_size
         self._url_template = '%(domain)s/%(generated_url)s'
         self._stack_collapser = "/".join
         self._params_template = '?%s'
 
-    def __call__(self, *args, **kwargs):
-        self._attribute_stack += [str(a) for a in args]
-        self._params = kwargs
-
-        headers = self._headers_factory()
-
-        if 'url' not in kwargs:
-            url = self.get_url()
-        else:
-            url = self.get_url(kwargs['url'])
-
-        if (self._method == "POST" or self._method == "PUT") and 'type' not in kwargs:
+    def request(self, method, attribute_stack, params):
+        """
+        Performs a single request. All per-request state lives in local
+        variables, so one transport can be shared freely between threads.
+        """
+        params = dict(params)
+        retry = params.pop('retry', self._retry_policy)
+        url, body, headers, handler = self.prepare_request(method, attribute_stack, params)
+        cached = self._cached(method, url, headers)
+        if cached is not None:
+            return handler(*cached)
+
+        if self._single_flight is not None and method == 'GET':
+            key = (url, headers.get('authorization'), handler)
+            return self._single_flight.do(
+                key, lambda: self._perform(method, url, body, headers, handler, retry))
+        return self._perform(method, url, body, headers, handler, retry)
+
+    def _perform(self, method, url, body, headers, handler, retry):
+        with self._hooked(method, url, body) as info:
+            return self._attempt(method, url, body, headers, handler, retry, info)
+
+    @contextmanager
+    def _hooked(self, method, url, body):
+        """
+        Calls the hooks around a request. Yields its RequestInfo, or None
+        when there are no hooks to fill it in for.
+        """
+        if not self._hooks:
+            yield None
+            return
+        info = RequestInfo(method, url, self._path(url), body)
+        for hook in self._hooks:
+            hook.before_request(info)
+        try:
+            yield info
+        except Exception as e:
+            info.error = e
+            raise
+        finally:
+            info.finish()
+            for hook in self._hooks:
+                hook.after_request(info)
+
+    def _attempt(self, method, url, body, headers, handler, retry, info):
+        attempt = 0
+        reauthorized = False
+        while True:
+            if info is not None:
+                info.retries = attempt
+            try:
+                response, data = self._send(url, method, body, headers)
+                if info is not None:
+                    info.record_response(response, data)
+            except RETRYABLE_ERRORS as e:
+                if not retry or not retry.should_retry(method, attempt, error=e):
+                    raise
+                retry.sleep(retry.delay(attempt))
+            else:
+                if (getattr(response, 'status', None) == 401 and not reauthorized
+                        and refresh_headers(self._headers_factory, headers)):
+                    # The access token was revoked or expired early; retry
+                    # once with fresh credentials.
+                    reauthorized = True
+                    headers = dict(headers)
+                    headers.update(self._headers_factory())
+                    continue
+                if not retry or not retry.should_retry(method, attempt, response=response):
+                    self._remember(method, url, headers, response, data)
+                    return handler(response, data)
+                retry.sleep(retry.delay(attempt, response))
+            attempt += 1
+
+    def _path(self, url):
+        return url[len(self._api_url):].split('?', 1)[0]
+
+    def _cached(self, method, url, headers):
+        if self.cache is None or method != 'GET':
+            return None
+        return self.cache.get(headers.get('authorization'), url)
+
+    def _remember(self, method, url, headers, response, data):
+        """Caches a GET response, or evicts what a successful write made stale."""
+        status = getattr(response, 'status', None)
+        if self.cache is None or status is None or status >= 400:
+            return
+        if method == 'GET':
+            if status == 200:
+                self.cache.put(headers.get('authorization'), self._path(url), url,
+                               response, data)
+        elif method != 'HEAD':
+            self.cache.invalidate_for_write(self._path(url))
+
+    def _send(self, url, method, body, headers):
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+        response, data = self.backend.request(method, url, body, headers)
+        if self._rate_limiter is not None:
+            self._rate_limiter.update(response)
+        return response, data
+
+    def prepare_request(self, method, attribute_stack, params, headers=None):
+        """
+        Returns the ``(url, body, headers, handler)`` for a request.
+        ``headers`` defaults to what the headers factory returns.
+        """
+        params = dict(params)
+        if headers is None:
+            headers = self._headers_factory()
+        url = self.get_url(method, attribute_stack, params)
+
+        if (method == "POST" or method == "PUT") and 'type' not in params:
             headers.update({'content-type': 'application/json'})
             # Not sure if this will always work, but for validate/verfiy nothing else was working:
-            body = json.dumps(kwargs)
-        elif 'type' in kwargs:
-            if kwargs['type'] == 'multipart/form-data':
-                body, new_headers = multipart_encode(kwargs['body'])
-                body = "".join(body)
+            body = self.codec.dumps(params)
+        elif 'type' in params:
+            if params['type'] == 'multipart/form-data':
+                body, new_headers = multipart_encode(params['body'])
+                body = b"".join(body)
                 headers.update(new_headers)
             else:
-                body = kwargs['body']
-                headers.update({'content-type': kwargs['type']})
+                body = params['body']
+                headers.update({'content-type': params['type']})
         else:
-            body = self._generate_body()  # hack
-        response, data = self._http.request(url, self._method, body=body, headers=headers)
-
-        self._attribute_stack = []
-        handler = kwargs.get('handler', _handle_response)
-        return handler(response, data)
+            body = self._generate_body(method, params)  # hack
+
+        if self._compress_requests and headers.get('content-type') == 'application/json':
+            compressed = compression.compress(body, self._min_compress_size)
+            if compressed is not None:
+                body = compressed
+                headers['content-encoding'] = 'gzip'
+
+        handler = params.get('handler', self._default_handler)
+        return url, body, headers, handler
+
+    def then(self, result, callback):
+        """
+        Applies ``callback`` to the result of a request made through this
+        transport. Lets areas post-process responses without caring whether
+        the transport is blocking or asynchronous.
+        """
+        return callback(result)
+
+    def finally_call(self, result, callback):
+        """
+        Calls ``callback()`` once the request behind ``result`` is over,
+        whether it succeeded or not, and returns ``result``. Lets areas
+        release resources a request reads from, such as open files.
+        """
+        callback()
+        return result
+
+    def close(self):
+        """Closes the backend's idle connections."""
+        self.backend.close()
+
+    def open_stream(self, method, url, headers=None, body=None,
+                    timeout=DEFAULT_STREAM_TIMEOUT):
+        """
+        Sends a request and returns a StreamingResponse without reading its
+        body, following redirects. ``url`` is a path such as
+        ``'/file/1/raw'``. ``body`` may be a string or an iterable of
+        blocks, which is sent as it is produced. Raises TransportException
+        for error responses.
+
+        As with ``request``, failing to connect is retried according to the
+        retry policy, and a 401 refreshes the credentials and retries once;
+        neither happens for an iterable body, which can't be sent twice.
+        Streams always go through http.client: the ``backend`` the
+        transport was created with is not used.
+        """
+        request_headers = self._headers_factory()
+        request_headers.update(headers or {})
+        request_headers = compression.negotiate(request_headers)
+        url = self._url_template % {'domain': self._api_url, 'generated_url': url[1:]}
+        with self._hooked(method, url, body) as info:
+            if info is not None and not info.request_bytes:
+                lengths = [v for k, v in request_headers.items() if k.lower() == 'content-length']
+                info.request_bytes = int(lengths[0]) if lengths else 0
+            return self._attempt_stream(method, url, request_headers, body, timeout, info)
+
+    def _attempt_stream(self, method, url, request_headers, body, timeout, info):
+        replayable = body is None or isinstance(body, (bytes, type(u'')))
+        retry = self._retry_policy if replayable else None
+        attempt = 0
+        reauthorized = False
+        while True:
+            if info is not None:
+                info.retries = attempt
+            try:
+                return self._open_stream(method, url, request_headers, body, timeout, info)
+            except RETRYABLE_ERRORS as e:
+                if not retry or not retry.should_retry(method, attempt, error=e):
+                    raise
+                retry.sleep(retry.delay(attempt))
+            except TransportException as e:
+                if (getattr(e.status, 'status', None) != 401 or not replayable or reauthorized
+                        or not refresh_headers(self._headers_factory, request_headers)):
+                    raise
+                reauthorized = True
+                request_headers = dict(request_headers)
+                request_headers.update(self._headers_factory())
+                continue
+            attempt += 1
+
+    def _open_stream(self, method, url, request_headers, body, timeout, info):
+        request_headers = dict(request_headers)
+        origin = urlsplit(url).netloc
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            connection_class = HTTPSConnection if parts.scheme == 'https' else HTTPConnection
+            connection = connection_class(parts.netloc, timeout=timeout)
+            path = parts.path + ('?' + parts.query if parts.query else '')
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire()
+            try:
+                connection.request(method, path, body=body, headers=request_headers)
+                response = StreamingResponse(connection, connection.getresponse())
+            except Exception:
+                connection.close()
+                raise
+            if self._rate_limiter is not None:
+                self._rate_limiter.update(response)
+            if info is not None:
+                info.record_response(response)
+
+            if response.status in REDIRECT_STATUSES and response.get('location'):
+                response.close()
+                url = urljoin(url, response.get('location'))
+                if urlsplit(url).netloc != origin:
+                    # Don't hand our credentials to another host.
+                    request_headers.pop('authorization', None)
+                if response.status == 303:
+                    method, body = 'GET', None
+                continue
+            if response.status >= 400:
+                try:
+                    data = response.read()
+                finally:
+                    response.close()
+                content = data.decode("utf-8") if data else '{}'
+                if response.status in RATE_LIMITED_STATUSES:
+                    raise RateLimitException(response, content)
+                raise TransportException(response, content)
+            return response
+        raise TransportException(response, 'Too many redirects')
+
+    def send_stream(self, method, url, body, headers=None, handler=None):
+        """
+        Sends ``body``, an iterable of byte blocks, block by block without
+        ever joining it in memory. ``headers`` should include the
+        Content-Length. The response is passed to ``handler`` as usual.
+        """
+        with self.open_stream(method, url, headers=headers, body=body) as response:
+            data = response.read()
+        return (handler or self._default_handler)(response, data)
 
     def _generate_params(self, params):
         body = self._params_template % urlencode(params)
@@ -168,44 +696,39 @@ class HttpTransport(object):
             return ''
         return body
 
-    def _generate_body(self):
-        if self._method == 'POST':
-            internal_params = self._params.copy()
+    def _generate_body(self, method, params):
+        if method == 'POST':
+            internal_params = params.copy()
 
             if 'GET' in internal_params:
                 del internal_params['GET']
 
             return self._generate_params(internal_params)[1:]
 
-    def _clear_content_type(self):
-        """Clear content-type"""
-        if 'content-type' in self._headers:
-            del self._headers['content-type']
-
-    def _clear_headers(self):
-        """Clear all headers"""
-        self._headers = {}
-
-    def get_url(self, url=None):
+    def get_url(self, method, attribute_stack, params):
+        """
+        Builds the request URL. A ``url`` entry in ``params`` takes
+        precedence over the attribute stack and is removed from ``params``.
+        """
+        url = params.pop('url', None)
         if url is None:
             url = self._url_template % {
                 "domain": self._api_url,
-                "generated_url": self._stack_collapser(self._attribute_stack),
+                "generated_url": self._stack_collapser(attribute_stack),
             }
         else:
             url = self._url_template % {
                 'domain': self._api_url,
                 'generated_url': url[1:]
             }
-            del self._params['url']
 
-        if len(self._params):
-            internal_params = self._params.copy()
+        if len(params):
+            internal_params = params.copy()
 
             if 'handler' in internal_params:
                 del internal_params['handler']
 
-            if self._method == 'POST' or self._method == "PUT":
+            if method == 'POST' or method == "PUT":
                 if "GET" not in internal_params:
                     return url
                 internal_params = internal_params['GET']
@@ -213,22 +736,20 @@ class HttpTransport(object):
         return url
 
     def __getitem__(self, name):
-        self._attribute_stack.append(name)
-        return self
+        return RequestBuilder(self, attribute_stack=[name])
 
     def __getattr__(self, name):
-        if name in self._supported_methods:
-            self._method = name
-        elif not name.endswith(')'):
-            self._attribute_stack.append(name)
-        return self
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(RequestBuilder(self), name)
 
 
-def _handle_response(response, data):
-    if not data:
-        data = '{}'
-    else:
-        data = data.decode("utf-8")
+def _handle_response(response, data, codec=DEFAULT_CODEC):
     if response.status >= 400:
-        raise TransportException(response, data)
-    return json.loads(data)
+        content = data.decode("utf-8") if data else '{}'
+        if response.status in RATE_LIMITED_STATUSES:
+            raise RateLimitException(response, content)
+        raise TransportException(response, content)
+    if not data:
+        return {}
+    return codec.loads(data)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Receiving Podio webhooks.
+
+WebhookReceiver is a WSGI application. It answers each callback as soon
+as the event is queued, and hands events to ``handler`` on a pool of
+worker threads. ``hook.verify`` callbacks are completed for you with
+``Hook.validate``::
+
+    def handle(event):
+        if event.type == 'item.update':
+            refresh(int(event.params['item_id']))
+
+    app = WebhookReceiver(client, handle)
+    # e.g. wsgiref.simple_server.make_server('', 8080, app).serve_forever()
+
+Podio retries callbacks that fail or time out, so identical callbacks
+received within ``dedupe_window`` seconds are acknowledged but handled
+only once. When the queue is full the receiver answers 503 and leaves
+the retry to Podio.
+
+``receive`` holds the framework-independent part and never blocks, so
+asyncio servers can call it directly from their request handlers.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    from urllib.parse import parse_qsl
+except ImportError:
+    from urlparse import parse_qsl
+
+log = logging.getLogger(__name__)
+
+VERIFY = 'hook.verify'
+
+# ``params`` holds every parameter of the callback, including type and hook_id.
+WebhookEvent = namedtuple('WebhookEvent', ['type', 'hook_id', 'params'])
+
+_STATUS_LINES = {
+    200: '200 OK',
+    400: '400 Bad Request',
+    405: '405 Method Not Allowed',
+    503: '503 Service Unavailable',
+}
+
+
+class WebhookReceiver(object):
+    """
+    :param client: Used to validate ``hook.verify`` callbacks.
+    :param handler: Called with a WebhookEvent for every other callback.
+    :param workers: Number of worker threads.
+    :param queue_size: Events that may wait for a worker before callbacks
+                       are refused.
+    :param dedupe_window: Seconds to remember callbacks for deduplication.
+    :param on_error: Called with ``(event, exception)`` when handling an
+                     event fails. By default the error is logged to the
+                     ``pypodio2.webhooks`` logger.
+    """
+
+    def __init__(self, client, handler, workers=4, queue_size=1000, dedupe_window=600,
+                 on_error=None, clock=time.time):
+        self.client = client
+        self.handler = handler
+        self.dedupe_window = dedupe_window
+        self.on_error = on_error
+        self._clock = clock
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._seen = OrderedDict()
+        self._seen_lock = threading.Lock()
+        self._workers = []
+        for _ in range(workers):
+            worker = threading.Thread(target=self._work)
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def __call__(self, environ, start_response):
+        if environ.get('REQUEST_METHOD') != 'POST':
+            status = 405
+        else:
+            try:
+                length = int(environ.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                length = 0
+            body = environ['wsgi.input'].read(length) if length else b''
+            params = _parse(body, environ.get('CONTENT_TYPE', ''))
+            status = self.receive(params) if params is not None else 400
+        start_response(_STATUS_LINES[status], [('Content-Type', 'text/plain'),
+                                               ('Content-Length', '0')])
+        return [b'']
+
+    def receive(self, params):
+        """
+        Queues the callback with the given parameters and returns the HTTP
+        status to answer it with.
+        """
+        if not params.get('type') or not params.get('hook_id'):
+            return 400
+        key = tuple(sorted(params.items()))
+        now = self._clock()
+        with self._seen_lock:
+            while self._seen and next(iter(self._seen.values())) <= now:
+                self._seen.popitem(last=False)
+            if key in self._seen:
+                return 200
+            try:
+                self._queue.put_nowait(WebhookEvent(params['type'], params['hook_id'],
+                                                    params))
+            except queue.Full:
+                return 503
+            self._seen[key] = now + self.dedupe_window
+        return 200
+
+    def _work(self):
+        while True:
+            event = self._queue.get()
+            try:
+                if event is None:
+                    return
+                if event.type == VERIFY:
+                    self.client.Hook.validate(int(event.hook_id), event.params['code'])
+                else:
+                    self.handler(event)
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(event, e)
+                else:
+                    log.exception('Handling webhook event %r failed', event)
+            finally:
+                self._queue.task_done()
+
+    def join(self):
+        """Blocks until every queued event has been handled."""
+        self._queue.join()
+
+    def stop(self):
+        """Lets the workers finish the queued events, then stops them."""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+
+def _parse(body, content_type):
+    if isinstance(body, bytes):
+        body = body.decode('utf-8')
+    if content_type.startswith('application/json'):
+        try:
+            params = json.loads(body)
+        except ValueError:
+            return None
+        if not isinstance(params, dict):
+            return None
+        return dict((k, str(v)) for k, v in params.items())
+    return dict(parse_qsl(body))
@@ -9,7 +9,14 @@ setup(
     url="https://github.com/podio/podio-py",
     license="MIT",
     packages=["pypodio2"],
-    install_requires=["httplib2"],
+    install_requires=["httplib2", "futures; python_version < '3'"],
+    extras_require={
+        "async": ["aiohttp"],
+        "urllib3": ["urllib3"],
+        "httpx": ["httpx"],
+        "http2": ["httpx[http2]"],
+        "brotli": ["brotli"],
+    },
     tests_require=["nose", "mock", "tox"],
     test_suite="nose.collector",
     classifiers=[
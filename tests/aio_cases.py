@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+The pypodio2.aio tests, collected through tests/test_aio.py. They live
+apart because ``async def`` does not even parse before Python 3.5.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from mock import Mock
+from nose.tools import eq_, assert_raises
+
+from pypodio2.aio import AsyncClient, AsyncHttpTransport
+from tests.utils import URL_BASE
+
+
+class FakeResponse(object):
+    def __init__(self, status, payload, session=None, body=None):
+        self.status = status
+        self.headers = {'Content-Type': 'application/json'}
+        self._payload = payload
+        self._session = session
+        self._body = body
+
+    async def read(self):
+        if self._session is not None and self._session.gate is not None:
+            await self._session.gate.wait()
+        return json.dumps(self._payload).encode('utf-8')
+
+    async def __aenter__(self):
+        if hasattr(self._body, '__aiter__'):
+            # Like aiohttp, consume a streamed body while sending.
+            blocks = []
+            async for block in self._body:
+                blocks.append(block)
+            self._session.uploads.append(b''.join(blocks))
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeSession(object):
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = []
+        self.uploads = []
+        self.closed = False
+        self.gate = None
+
+    def request(self, method, url, data=None, headers=None):
+        self.calls.append((method, url, data, headers))
+        return FakeResponse(200, self.payload, self, data)
+
+    async def close(self):
+        self.closed = True
+
+
+def run(coroutine):
+    # asyncio.run is 3.7+.
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def get_client_and_session(payload, **transport_options):
+    session = FakeSession(payload)
+    transport = AsyncHttpTransport(URL_BASE, headers_factory=dict, session=session,
+                                   **transport_options)
+    return AsyncClient(transport), session
+
+
+def test_area_methods_are_awaitable():
+    client, session = get_client_and_session({'item_id': 1})
+
+    async def scenario():
+        return await client.Item.find(1)
+
+    eq_({'item_id': 1}, run(scenario()))
+    eq_([('GET', URL_BASE + '/item/1', None, {})], session.calls)
+
+
+def test_post_body_matches_sync_transport():
+    client, session = get_client_and_session({'item_id': 1})
+    attributes = {'fields': {'title': 'x'}}
+
+    run(client.Item.create(3, attributes))
+    eq_([('POST', URL_BASE + '/item/app/3/', json.dumps(attributes),
+          {'content-type': 'application/json'})], session.calls)
+
+
+def test_post_processed_results():
+    client, session = get_client_and_session({'space_id': 42})
+    eq_(42, run(client.Space.find_by_url('https://podio.com/org/space')))
+
+
+def test_gather_and_close():
+    client, session = get_client_and_session({'ok': True})
+
+    async def scenario():
+        async with client:
+            return await asyncio.gather(*[client.Task.complete(i) for i in range(10)])
+
+    eq_([{'ok': True}] * 10, run(scenario()))
+    eq_(10, len(session.calls))
+    assert session.closed
+
+
+def test_hooks_and_single_flight():
+    hook = Mock()
+    client, session = get_client_and_session({'item_id': 1}, hooks=[hook],
+                                             single_flight=True)
+    single_flight = client.transport._single_flight
+    callers = []
+
+    async def do(key, func, do=single_flight.do):
+        callers.append(key)
+        return await do(key, func)
+    single_flight.do = do
+
+    async def scenario():
+        # Hold the response until every caller has joined the call in flight.
+        session.gate = asyncio.Event()
+        finds = asyncio.gather(*[client.Item.find(1) for _ in range(5)])
+        while len(callers) < 5:
+            await asyncio.sleep(0.001)
+        session.gate.set()
+        return await finds
+
+    eq_([{'item_id': 1}] * 5, run(scenario()))
+    eq_(1, len(session.calls))
+    eq_(1, hook.after_request.call_count)
+    info = hook.after_request.call_args[0][0]
+    eq_((info.method, info.endpoint, info.status), ('GET', '/item/{id}', 200))
+    eq_(0, client.transport._single_flight.in_flight())
+
+
+def test_headers_are_built_off_the_event_loop():
+    threads = []
+
+    def headers_factory():
+        threads.append(threading.current_thread())
+        return {'authorization': 'OAuth2 token'}
+
+    session = FakeSession({'item_id': 1})
+    client = AsyncClient(AsyncHttpTransport(URL_BASE, headers_factory, session=session))
+    run(client.Item.find(1))
+    eq_('OAuth2 token', session.calls[0][3]['authorization'])
+    assert threads and threading.current_thread() not in threads
+
+
+def test_file_upload_is_streamed_and_awaitable():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'upload')
+    try:
+        with open(path, 'wb') as f:
+            f.write(b'x' * 200000)
+        client, session = get_client_and_session({'file_id': 5})
+        eq_({'file_id': 5}, run(client.Files.create('report.pdf', path=path)))
+        method, url, data, headers = session.calls[0]
+        eq_(('POST', URL_BASE + '/file/v2/'), (method, url))
+        assert headers['Content-Type'].startswith('multipart/form-data; boundary=')
+        eq_(int(headers['Content-Length']), len(session.uploads[0]))
+        assert b'x' * 200000 in session.uploads[0]
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_bulk_helpers_refuse_async_clients():
+    client, session = get_client_and_session({'item_id': 1})
+    assert_raises(TypeError, client.Item.bulk_create, 1, [{'a': 1}])
+    assert_raises(TypeError, client.Item.bulk_update, [(1, {'a': 1})])
+    eq_([], session.calls)
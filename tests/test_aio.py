@@ -0,0 +1,13 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.aio. Works by handing AsyncHttpTransport a fake
+aiohttp session and making assertions about how pypodio2 calls it.
+"""
+import sys
+
+from nose.plugins.skip import SkipTest
+
+if sys.version_info < (3, 5):
+    raise SkipTest('pypodio2.aio needs Python 3.5+')
+
+from tests.aio_cases import *  # noqa
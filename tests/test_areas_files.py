@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.areas.Files (via pypodio2.client.Client). Streaming
+downloads are exercised against a throwaway local HTTP server.
+"""
+
+import io
+import os
+import shutil
+import socket
+import tempfile
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from mock import patch
+from nose.tools import eq_, assert_raises
+
+import pypodio2.client
+import pypodio2.transport
+from pypodio2.metrics import MetricsCollector
+from pypodio2.retry import RetryPolicy
+
+CONTENT = os.urandom(300 * 1024)
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers['content-length'])
+        body = self.rfile.read(length)
+        FileHandler.requests.append((self.path, self.headers.get('content-type'), body))
+        payload = b'{"file_id": 5}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        FileHandler.requests.append((self.path, self.headers.get('range'),
+                                     self.headers.get('authorization')))
+        if self.path == '/file/2/raw':
+            self.send_response(302)
+            self.send_header('Location', '/cdn/2')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.path == '/file/4/raw' and self.headers.get('authorization') != 'OAuth2 fresh':
+            self.send_response(401)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'{}')
+            return
+        if self.path not in ('/file/1/raw', '/cdn/2', '/file/4/raw'):
+            self.send_response(404)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'{}')
+            return
+        start = 0
+        if self.headers.get('range'):
+            start = int(self.headers['range'].split('=')[1].rstrip('-'))
+            if start >= len(CONTENT):
+                self.send_response(416)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(CONTENT) - start))
+        self.end_headers()
+        self.wfile.write(CONTENT[start:])
+
+
+class RefreshingHeaders(object):
+    def __init__(self):
+        self.token = 'stale'
+        self.refreshes = 0
+
+    def __call__(self):
+        return {'authorization': 'OAuth2 %s' % self.token}
+
+    def refresh(self, stale_headers=None):
+        self.refreshes += 1
+        self.token = 'fresh'
+
+
+class ServerFixture(object):
+    def __init__(self, headers=None, **transport_options):
+        self.headers = headers or (lambda: {'authorization': 'OAuth2 token'})
+        self.transport_options = transport_options
+
+    def __enter__(self):
+        FileHandler.requests = []
+        self.server = HTTPServer(('127.0.0.1', 0), FileHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,))
+        self.thread.daemon = True
+        self.thread.start()
+        url = 'http://127.0.0.1:%s' % self.server.server_port
+        return pypodio2.client.Client(pypodio2.transport.HttpTransport(
+            url, self.headers, **self.transport_options))
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_download_to_file_object():
+    out = io.BytesIO()
+    progress = []
+    with ServerFixture() as client:
+        size = client.Files.download(1, out, chunk_size=8192,
+                                     progress=lambda *args: progress.append(args))
+    eq_(len(CONTENT), size)
+    eq_(CONTENT, out.getvalue())
+    eq_((len(CONTENT), len(CONTENT)), progress[-1][:2])
+    assert len(progress) > 1
+
+
+def test_download_resumes_partial_file():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'download')
+    try:
+        with open(path, 'wb') as f:
+            f.write(CONTENT[:1000])
+        with ServerFixture() as client:
+            eq_(len(CONTENT), client.Files.download(1, path))
+            eq_('bytes=1000-', FileHandler.requests[-1][1])
+            # Nothing left to fetch the second time round.
+            eq_(len(CONTENT), client.Files.download(1, path))
+        with open(path, 'rb') as f:
+            eq_(CONTENT, f.read())
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_download_follows_redirects():
+    out = io.BytesIO()
+    with ServerFixture() as client:
+        client.Files.download(2, out)
+    eq_(CONTENT, out.getvalue())
+    eq_(['/file/2/raw', '/cdn/2'], [r[0] for r in FileHandler.requests])
+
+
+def test_download_errors():
+    with ServerFixture() as client:
+        with assert_raises(pypodio2.transport.TransportException) as raised:
+            client.Files.download(3, io.BytesIO())
+    # Decoded like the content of any other error response.
+    eq_('{}', raised.exception.content)
+
+
+def test_download_refreshes_credentials_on_401():
+    headers = RefreshingHeaders()
+    out = io.BytesIO()
+    with ServerFixture(headers=headers) as client:
+        client.Files.download(4, out)
+    eq_(CONTENT, out.getvalue())
+    eq_(1, headers.refreshes)
+    eq_(['OAuth2 stale', 'OAuth2 fresh'], [r[2] for r in FileHandler.requests])
+
+
+def test_download_retries_failed_connects():
+    connect = pypodio2.transport.HTTPConnection.connect
+    failures = [socket.error('refused')]
+
+    def flaky_connect(self):
+        if failures:
+            raise failures.pop()
+        return connect(self)
+
+    sleeps = []
+    out = io.BytesIO()
+    with ServerFixture(retry_policy=RetryPolicy(sleep=sleeps.append)) as client:
+        with patch.object(pypodio2.transport.HTTPConnection, 'connect', flaky_connect):
+            client.Files.download(1, out)
+    eq_(CONTENT, out.getvalue())
+    eq_(1, len(sleeps))
+
+
+def test_streams_are_seen_by_hooks():
+    metrics = MetricsCollector()
+    with ServerFixture(hooks=[metrics]) as client:
+        client.Files.download(1, io.BytesIO())
+        assert_raises(pypodio2.transport.TransportException,
+                      client.Files.download, 3, io.BytesIO())
+        client.Files.create('report.pdf', CONTENT)
+    stats = metrics.snapshot()
+    eq_(stats[('GET', '/file/{id}/raw')]['statuses'], {'200': 1, '404': 1})
+    eq_(stats[('GET', '/file/{id}/raw')]['response_bytes'], len(CONTENT) + 2)
+    assert stats[('POST', '/file/v2/')]['request_bytes'] > len(CONTENT)
+
+
+def check_upload(request):
+    path, content_type, body = request
+    eq_('/file/v2/', path)
+    assert content_type.startswith('multipart/form-data; boundary='), content_type
+    assert b'name="filename"\r\n' in body
+    assert b'name="source"; filename="report.pdf"' in body
+    assert CONTENT in body
+
+
+def test_create_from_bytes():
+    with ServerFixture() as client:
+        eq_({'file_id': 5}, client.Files.create('report.pdf', CONTENT))
+        check_upload(FileHandler.requests[-1])
+
+
+def test_create_from_file_object_and_path():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'upload')
+    try:
+        with open(path, 'wb') as f:
+            f.write(CONTENT)
+        with ServerFixture() as client:
+            with open(path, 'rb') as f:
+                eq_({'file_id': 5}, client.Files.create('report.pdf', f))
+            check_upload(FileHandler.requests[-1])
+            eq_({'file_id': 5}, client.Files.create('report.pdf', path=path))
+            check_upload(FileHandler.requests[-1])
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_create_needs_one_source():
+    with ServerFixture() as client:
+        assert_raises(TypeError, client.Files.create, 'report.pdf')
+        assert_raises(TypeError, client.Files.create, 'report.pdf', CONTENT, path='x')
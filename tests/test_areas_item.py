@@ -10,6 +10,7 @@ import json
 from mock import Mock
 from nose.tools import eq_
 
+from pypodio2.compression import negotiate
 from tests.utils import check_client_method, get_client_and_http, URL_BASE
 
 
@@ -147,4 +148,43 @@ def test_delete():
     http.request.assert_called_once_with("%s/item/%s?" % (URL_BASE, item_id),
                                          'DELETE',
                                          body=None,
-                                         headers={})
+                                         headers=negotiate({}))
+
+
+def test_bulk_create():
+    client, http = get_client_and_http()
+
+    def request(url, method, body=None, headers=None):
+        attributes = json.loads(body)
+        response = Mock()
+        if attributes.get('fail'):
+            response.status = 400
+            return response, b'{"error": "invalid_value"}'
+        response.status = 200
+        if attributes['n'] == 4:
+            return response, b'[]'  # Not the shape we expect: an error, not a crash.
+        return response, json.dumps({'item_id': attributes['n'] * 10}).encode('utf-8')
+    http.request = Mock(side_effect=request)
+
+    records = ({'n': n, 'fail': n == 3} for n in range(6))
+    results = list(client.Item.bulk_create(1, records, silent=True, max_workers=2))
+
+    eq_([0, 1, 2, 3, 4, 5], [r.index for r in results])
+    eq_([0, 10, 20, None, None, 50], [r.item_id for r in results])
+    eq_([False, False, False, True, True, False], [r.error is not None for r in results])
+    for call in http.request.call_args_list:
+        eq_(URL_BASE + '/item/app/1/?silent=true', call[0][0])
+
+
+def test_bulk_update():
+    client, http = get_client_and_http()
+    response = Mock()
+    response.status = 200
+    http.request = Mock(return_value=(response, b'{}'))
+
+    results = list(client.Item.bulk_update([(7, {'a': 1}), (8, {'a': 2})], hook=False,
+                                           ordered=False))
+
+    eq_(set([7, 8]), set(r.item_id for r in results))
+    eq_(set([URL_BASE + '/item/7?hook=false', URL_BASE + '/item/8?hook=false']),
+        set(call[0][0] for call in http.request.call_args_list))
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+"""
+Unit tests for the OAuth authorization classes in pypodio2.transport.
+"""
+
+import json
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+
+from mock import Mock, patch
+from nose.tools import eq_
+
+from pypodio2.tokenstore import FileTokenStore, MemoryTokenStore
+from pypodio2.transport import KeepAliveHeaders, OAuthAppAuthorization
+from tests.utils import get_client_and_http, URL_BASE
+
+
+class TokenEndpoint(object):
+    """Stands in for httplib2.Http when requesting /oauth/token."""
+
+    def __init__(self):
+        self.grants = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self):
+        return self
+
+    def request(self, url, method, body=None, headers=None):
+        self.gate.wait()
+        self.grants.append(body)
+        response = Mock()
+        response.status = 200
+        n = len(self.grants)
+        token = {'access_token': 'access-%s' % n, 'refresh_token': 'refresh-%s' % n,
+                 'expires_in': 28800}
+        return response, json.dumps(token).encode('utf-8')
+
+
+def make_auth(endpoint=None, token_store=None):
+    endpoint = endpoint or TokenEndpoint()
+    with patch('pypodio2.transport.Http', endpoint):
+        auth = OAuthAppAuthorization(1, 'app-token', 'key', 'secret', URL_BASE,
+                                     token_store=token_store)
+    return auth, endpoint
+
+
+def test_initial_grant():
+    auth, endpoint = make_auth()
+    eq_({'authorization': 'OAuth2 access-1'}, auth())
+    assert 'grant_type=app' in endpoint.grants[0]
+
+
+def test_refreshes_synchronously_when_about_to_expire():
+    auth, endpoint = make_auth()
+    auth.token.expires_at = time.time() + 5
+    with patch('pypodio2.transport.Http', endpoint):
+        eq_({'authorization': 'OAuth2 access-2'}, auth())
+    assert 'grant_type=refresh_token' in endpoint.grants[1]
+    assert 'refresh_token=refresh-1' in endpoint.grants[1]
+
+
+def test_refreshes_in_background_ahead_of_expiry():
+    auth, endpoint = make_auth()
+    auth.token.expires_at = time.time() + 120
+    endpoint.gate.clear()
+    with patch('pypodio2.transport.Http', endpoint):
+        # The current token is still handed out while the refresh runs.
+        eq_({'authorization': 'OAuth2 access-1'}, auth())
+        eq_({'authorization': 'OAuth2 access-1'}, auth())
+        endpoint.gate.set()
+        for _ in range(100):
+            if auth.token.access_token == 'access-2':
+                break
+            time.sleep(0.01)
+    eq_({'authorization': 'OAuth2 access-2'}, auth())
+    eq_(2, len(endpoint.grants))
+
+
+def test_transport_retries_once_after_401():
+    auth, endpoint = make_auth()
+    client, http = get_client_and_http()
+    client.transport._headers_factory = KeepAliveHeaders(auth)
+    unauthorized, ok = Mock(), Mock()
+    unauthorized.status, ok.status = 401, 200
+    http.request = Mock(side_effect=[(unauthorized, b''), (ok, b'{"item_id": 1}')])
+
+    with patch('pypodio2.transport.Http', endpoint):
+        eq_({'item_id': 1}, client.Item.find(1))
+
+    sent = [call[1]['headers']['authorization'] for call in http.request.call_args_list]
+    eq_(['OAuth2 access-1', 'OAuth2 access-2'], sent)
+
+
+def test_file_token_store_shares_tokens():
+    directory = tempfile.mkdtemp()
+    try:
+        endpoint = TokenEndpoint()
+        first, _ = make_auth(endpoint, FileTokenStore(directory))
+        second, _ = make_auth(endpoint, FileTokenStore(directory))
+        eq_(1, len(endpoint.grants))
+        eq_(first(), second())
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_file_token_store_is_private():
+    if os.name == 'nt':
+        return
+    parent = tempfile.mkdtemp()
+    try:
+        directory = os.path.join(parent, 'tokens')
+        store = FileTokenStore(directory)
+        store.set('key', {'access_token': 'secret'})
+        paths = [directory] + [os.path.join(directory, name) for name in os.listdir(directory)]
+        eq_(2, len(paths))
+        for path in paths:
+            eq_(0, stat.S_IMODE(os.stat(path).st_mode) & 0o077)
+    finally:
+        shutil.rmtree(parent)
+
+
+def test_only_one_holder_refreshes():
+    store = MemoryTokenStore()
+    endpoint = TokenEndpoint()
+    first, _ = make_auth(endpoint, store)
+    second, _ = make_auth(endpoint, store)
+    stale = first.token
+    with patch('pypodio2.transport.Http', endpoint):
+        first.refresh(stale_token=stale)
+        # second still holds the same stale token, but picks up the
+        # refreshed one from the store instead of refreshing again.
+        second.refresh(stale_token=second.token)
+    eq_(2, len(endpoint.grants))
+    eq_('access-2', second.token.access_token)
+
+
+def test_concurrent_401s_refresh_once():
+    auth, endpoint = make_auth()
+    client, http = get_client_and_http()
+    client.transport.backend.pool.maxsize = 8
+    client.transport._headers_factory = KeepAliveHeaders(auth)
+    arrived = threading.Condition()
+    stale = []
+
+    def request(url, method, body=None, headers=None):
+        response = Mock()
+        if headers['authorization'] == 'OAuth2 access-1':
+            # Hold every request with the old token until all have been
+            # refused, so they all see the 401 at once.
+            with arrived:
+                stale.append(1)
+                arrived.notify_all()
+                while len(stale) < 8:
+                    arrived.wait(1)
+            response.status = 401
+            return response, b''
+        response.status = 200
+        return response, b'{"item_id": 1}'
+    http.request = Mock(side_effect=request)
+
+    results = []
+    with patch('pypodio2.transport.Http', endpoint):
+        threads = [threading.Thread(target=lambda: results.append(client.Item.find(1)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+    eq_([{'item_id': 1}] * 8, results)
+    eq_(2, len(endpoint.grants))
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.backends, against a throwaway local HTTP server.
+"""
+import socket
+import threading
+import zlib
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+from nose.plugins.skip import SkipTest
+from nose.tools import eq_, assert_raises
+
+from pypodio2 import backends, client, compression, transport
+
+
+def encode(data, encoding):
+    if encoding == 'br':
+        return compression.brotli.compress(data)
+    wbits = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS,
+             'raw-deflate': -zlib.MAX_WBITS}[encoding]
+    compressor = zlib.compressobj(6, zlib.DEFLATED, wbits)
+    return compressor.compress(data) + compressor.flush()
+
+
+def encodings():
+    """The encodings every client should decode, as sent by EchoHandler."""
+    return ['gzip', 'deflate'] + (['br'] if compression.brotli is not None else [])
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['content-length']))
+        payload = b'{"path": "' + self.path.encode('ascii') + b'", "body": ' + body + b'}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('X-Rate-Limit-Remaining', '7')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.startswith('/encoded/'):
+            # /encoded/<encoding> compresses the body if the client accepts it.
+            encoding = self.path.split('/')[2]
+            accepted = self.headers.get('accept-encoding') or ''
+            payload = ('{"accept_encoding": "%s", "padding": "%s"}' % (
+                accepted, 'x' * 4096)).encode('ascii')
+            if encoding.replace('raw-', '') in accepted:
+                payload = encode(payload, encoding)
+                self.send_response(200)
+                self.send_header('Content-Encoding', encoding.replace('raw-', ''))
+            else:
+                self.send_response(200)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        if self.path.startswith('/redirect/'):
+            # /redirect/<host> sends the client to /target on <host>, same port.
+            location = 'http://%s:%d/target' % (self.path.split('/')[2],
+                                                 self.server.server_address[1])
+            self.send_response(302)
+            self.send_header('Location', location)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        payload = ('{"path": "%s", "authorization": %s}' % (
+            self.path, '"%s"' % self.headers['authorization']
+            if self.headers.get('authorization') else 'null')).encode('ascii')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    # Keep-alive connections hold a handler thread until the client leaves.
+    daemon_threads = True
+
+
+def serve():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), EchoHandler)
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,))
+    thread.daemon = True
+    thread.start()
+    return httpd, 'http://127.0.0.1:%d' % httpd.server_address[1]
+
+
+def check_backend(backend):
+    httpd, url = serve()
+    try:
+        c = client.Client(transport.HttpTransport(
+            url, lambda: {'authorization': 'OAuth2 t'}, backend=backend))
+        eq_(c.Item.filter(3, {'limit': 1}), {'path': '/item/app/3/filter/',
+                                             'body': {'limit': 1}})
+        response, data = backend.request('POST', url + '/x', b'1', {})
+        eq_((response.status, response['x-rate-limit-remaining']), (200, '7'))
+
+        eq_(c.transport.GET(url='/redirect/127.0.0.1')['path'], '/target')
+        eq_(c.transport.GET(url='/redirect/localhost'),
+            {'path': '/target', 'authorization': None})
+
+        for encoding in encodings():
+            response, data = backend.request('GET', url + '/encoded/' + encoding, None, {})
+            eq_(response.get('-content-encoding'), encoding)
+            assert 'content-encoding' not in response
+            eq_(int(response['content-length']), len(data))
+            assert encoding in c.transport.GET(url='/encoded/' + encoding)['accept_encoding']
+        c.transport.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_httplib2_backend_tcp_nodelay_and_idle_timeout():
+    now = [0]
+    backend = backends.Httplib2Backend(pool_size=1, tcp_nodelay=True, idle_timeout=30,
+                                       clock=lambda: now[0])
+    httpd, url = serve()
+    try:
+        backend.request('POST', url + '/a', b'1', {})
+        http = backend.pool.acquire()
+        backend.pool.release(http)
+        conn = list(http.connections.values())[0]
+        eq_(conn.sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY) != 0, True)
+
+        now[0] += 10
+        backend.request('POST', url + '/b', b'2', {})
+        assert list(http.connections.values())[0] is conn
+        now[0] += 31
+        backend.request('POST', url + '/c', b'3', {})
+        assert conn.sock is None
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    check_backend(backends.Httplib2Backend())
+
+
+def test_urllib3_backend():
+    if backends.urllib3 is None:
+        raise SkipTest('urllib3 is not installed')
+    check_backend(backends.Urllib3Backend(pool_size=2))
+
+
+def test_httpx_backend():
+    if backends.httpx is None:
+        raise SkipTest('httpx is not installed')
+    check_backend(backends.HttpxBackend(pool_size=2))
+    # Plain-text HTTP/2 is not negotiated, so this falls back to HTTP/1.1.
+    check_backend(backends.HttpxBackend(pool_size=2, http2=True))
+
+
+def test_missing_libraries_are_reported():
+    if backends.urllib3 is None:
+        assert_raises(ImportError, backends.Urllib3Backend)
+    if backends.httpx is None:
+        assert_raises(ImportError, backends.HttpxBackend)
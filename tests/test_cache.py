@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.cache.ResponseCache and its use by HttpTransport.
+"""
+
+from mock import Mock
+from nose.tools import eq_
+
+from pypodio2.cache import ResponseCache
+from tests.utils import get_client_and_http
+
+
+class FakeClock(object):
+    now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def get_cached_client(**kwargs):
+    client, http = get_client_and_http()
+    clock = FakeClock()
+    client.transport.cache = ResponseCache(clock=clock, **kwargs)
+    response = Mock()
+    response.status = 200
+    http.request = Mock(return_value=(response, b'{"app_id": 1}'))
+    return client, http, clock
+
+
+def test_caches_metadata_gets_until_ttl():
+    client, http, clock = get_cached_client()
+    eq_({'app_id': 1}, client.Application.find(1))
+    eq_({'app_id': 1}, client.Application.find(1))
+    eq_(1, http.request.call_count)
+
+    clock.now += 301
+    client.Application.find(1)
+    eq_(2, http.request.call_count)
+
+
+def test_does_not_cache_other_endpoints():
+    client, http, clock = get_cached_client()
+    client.Item.find(1)
+    client.Item.find(1)
+    eq_(2, http.request.call_count)
+
+
+def test_writes_evict_related_entries():
+    client, http, clock = get_cached_client()
+    client.Application.find(1)
+    client.Application.find(2)
+    client.Application.add_field(1, {'type': 'text'})
+    client.Application.find(1)
+    client.Application.find(2)
+    eq_(4, http.request.call_count)
+
+    client.View.get_views(5)
+    client.View.update_view(9, {})
+    client.View.get_views(5)
+    eq_(7, http.request.call_count)
+
+
+def test_lru_eviction():
+    client, http, clock = get_cached_client(maxsize=2)
+    for app_id in (1, 2, 1, 3, 1, 2):
+        client.Application.find(app_id)
+    # 1 stays hot; 2 was evicted by 3.
+    eq_(4, http.request.call_count)
+    eq_(2, len(client.transport.cache))
+
+
+def test_explicit_invalidation():
+    client, http, clock = get_cached_client()
+    client.Space.find(4)
+    client.transport.cache.invalidate('/space/')
+    client.Space.find(4)
+    eq_(2, http.request.call_count)
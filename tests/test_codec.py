@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.codec and its use by the transport and areas.
+"""
+
+import json
+
+from mock import Mock
+from nose.tools import eq_
+
+from pypodio2.client import Client
+from pypodio2.codec import DEFAULT_CODEC, STDLIB_CODEC, JsonCodec
+from pypodio2.transport import ConnectionPool, HttpTransport
+from tests.utils import check_client_method, URL_BASE
+
+
+def test_codecs_parse_bytes():
+    for codec in (DEFAULT_CODEC, STDLIB_CODEC):
+        eq_({'a': [1, u'é']}, codec.loads(u'{"a": [1, "é"]}'.encode('utf-8')))
+
+
+def test_pre_serialized_bodies_are_passed_through():
+    body = b'{"fields": {"title": "x"}}'
+    client, check_assertions = check_client_method()
+    result = client.Item.create(1, body)
+    check_assertions(result, 'POST', '/item/app/1/', body,
+                     {'content-type': 'application/json'})
+
+
+def test_custom_codec():
+    calls = []
+
+    def dumps(obj):
+        calls.append('dumps')
+        return json.dumps(obj, separators=(',', ':'))
+
+    def loads(data):
+        calls.append('loads')
+        return json.loads(data.decode('utf-8'))
+
+    http = Mock()
+    transport = HttpTransport(URL_BASE, dict, pool=ConnectionPool(lambda: http),
+                              codec=JsonCodec(dumps, loads, 'test'))
+    client = Client(transport)
+    response = Mock()
+    response.status = 200
+    http.request = Mock(return_value=(response, b'{"item_id": 1}'))
+
+    eq_({'item_id': 1}, client.Item.update(1, {'a': 1}))
+    eq_('{"a":1}', http.request.call_args[1]['body'])
+    eq_(['dumps', 'loads'], calls)
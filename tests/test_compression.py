@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.compression and compressed requests and streams.
+"""
+import json
+import zlib
+
+from mock import Mock
+from nose.tools import eq_, assert_raises
+
+from pypodio2 import compression
+from pypodio2.transport import ConnectionPool, HttpTransport
+from tests.test_backends import encode, encodings, serve
+from tests.utils import URL_BASE
+
+DATA = json.dumps({'items': [{'item_id': i, 'title': 'Item %d' % i}
+                             for i in range(500)]}).encode('utf-8')
+
+
+def decode_in_chunks(encoding, data, size=100):
+    decoder = compression.decoder(encoding)
+    return b''.join(decoder.decompress(data[i:i + size])
+                    for i in range(0, len(data), size)) + decoder.flush()
+
+
+def test_decoders():
+    for encoding in encodings() + ['raw-deflate']:
+        eq_(decode_in_chunks(encoding.replace('raw-', ''), encode(DATA, encoding)), DATA)
+    eq_(compression.decoder('identity'), None)
+    eq_(compression.decoder(None), None)
+    assert_raises(compression.DecodingError, decode_in_chunks, 'gzip', b'not gzip at all')
+
+
+def test_decode_whole_body():
+    response = {'content-encoding': 'gzip', 'content-length': '10'}
+    eq_(compression.decode(response, encode(DATA, 'gzip')), DATA)
+    eq_(response, {'-content-encoding': 'gzip', 'content-length': str(len(DATA))})
+    eq_(compression.decode({}, b'plain'), b'plain')
+
+
+def test_negotiate():
+    eq_(compression.negotiate({'a': '1'}),
+        {'a': '1', 'accept-encoding': compression.ACCEPT_ENCODING})
+    eq_(compression.negotiate({'Accept-Encoding': 'identity'}), {'Accept-Encoding': 'identity'})
+    eq_(compression.negotiate({'range': 'bytes=5-'}), {'range': 'bytes=5-'})
+
+
+def test_compress():
+    eq_(compression.compress(b'{}'), None)
+    eq_(compression.compress(None), None)
+    compressed = compression.compress(DATA.decode('utf-8'))
+    eq_(zlib.decompress(compressed, 16 + zlib.MAX_WBITS), DATA)
+    assert len(compressed) < len(DATA) / 4
+    # No timestamp: recordings of the same request still match.
+    eq_(compression.compress(DATA), compressed)
+
+
+def test_transport_compresses_large_json_bodies():
+    http = Mock()
+    response = Mock(status=200)
+    response.get = {}.get
+    http.request = Mock(return_value=(response, b'{}'))
+    transport = HttpTransport(URL_BASE, headers_factory=dict, compress_requests=True,
+                              pool=ConnectionPool(factory=lambda: http, maxsize=1))
+
+    transport.POST(url='/item/app/1/', body=DATA, type='application/json')
+    kwargs = http.request.call_args[1]
+    eq_(kwargs['headers']['content-encoding'], 'gzip')
+    eq_(zlib.decompress(kwargs['body'], 16 + zlib.MAX_WBITS), DATA)
+
+    transport.POST(url='/item/app/1/', body=b'{}', type='application/json')
+    kwargs = http.request.call_args[1]
+    eq_((kwargs['body'], 'content-encoding' in kwargs['headers']), (b'{}', False))
+
+
+def test_streams_are_decoded_as_they_are_read():
+    httpd, url = serve()
+    try:
+        transport = HttpTransport(url, headers_factory=dict)
+        for encoding in encodings() + ['raw-deflate']:
+            with transport.open_stream('GET', '/encoded/' + encoding) as response:
+                eq_(response.get('-content-encoding'), encoding.replace('raw-', ''))
+                chunks = list(response.iter_content(64))
+            assert all(chunks)
+            payload = json.loads(b''.join(chunks).decode('ascii'))
+            assert encoding.replace('raw-', '') in payload['accept_encoding']
+        with transport.open_stream('GET', '/encoded/gzip',
+                                   headers={'accept-encoding': 'identity'}) as response:
+            eq_(json.loads(response.read().decode('ascii'))['accept_encoding'], 'identity')
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.concurrency and Item.iter_filter_parallel.
+"""
+
+import json
+import threading
+import time
+
+from mock import Mock
+from nose.tools import eq_, assert_raises
+
+from pypodio2.concurrency import imap
+from tests.utils import get_client_and_http
+
+
+def test_imap_ordered():
+    def slow_square(n):
+        time.sleep(0.001 * (10 - n))
+        return n * n
+
+    eq_([n * n for n in range(10)], list(imap(slow_square, range(10), max_workers=4)))
+
+
+def test_imap_unordered_returns_everything():
+    eq_(set(range(20)), set(imap(lambda n: n, range(20), max_workers=3, ordered=False)))
+
+
+def test_imap_bounds_concurrency():
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+
+    def work(n):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.002)
+        with lock:
+            state['running'] -= 1
+        return n
+
+    eq_(list(range(30)), list(imap(work, range(30), max_workers=3)))
+    assert state['peak'] <= 3
+
+
+def test_imap_propagates_errors():
+    def fail(n):
+        raise ValueError(n)
+
+    assert_raises(ValueError, list, imap(fail, range(3)))
+
+
+def test_item_iter_filter_parallel():
+    client, http = get_client_and_http()
+    response = Mock()
+    response.status = 200
+
+    def request(url, method, body=None, headers=None):
+        attributes = json.loads(body)
+        offset, limit = attributes['offset'], attributes['limit']
+        items = [{'item_id': i} for i in range(offset, min(offset + limit, 23))]
+        payload = {'filtered': 23, 'total': 40, 'items': items}
+        return response, json.dumps(payload).encode('utf-8')
+
+    http.request = Mock(side_effect=request)
+
+    items = list(client.Item.iter_filter_parallel(1, {}, limit=5, max_workers=3))
+    eq_(list(range(23)), [item['item_id'] for item in items])
+
+    items = client.Item.iter_filter_parallel(1, {}, limit=5, max_workers=3, ordered=False)
+    eq_(set(range(23)), set(item['item_id'] for item in items))
+
+    # A server capping pages at 4 items must not leave gaps.
+    capped = request
+    http.request = Mock(side_effect=lambda url, method, body=None, headers=None: capped(
+        url, method, json.dumps(dict(json.loads(body), limit=4)), headers))
+    items = list(client.Item.iter_filter_parallel(1, {}, limit=5, max_workers=3))
+    eq_(list(range(23)), [item['item_id'] for item in items])
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.metrics
+"""
+from mock import Mock
+from nose.tools import eq_, assert_raises
+
+from pypodio2 import client, transport
+from pypodio2.metrics import MetricsCollector, endpoint_template
+from pypodio2.retry import RetryPolicy
+from tests.utils import URL_BASE
+
+
+class Response(dict):
+    def __init__(self, status, **headers):
+        dict.__init__(self, headers)
+        self.status = status
+
+
+def get_client(responses, hooks):
+    http = Mock()
+    http.request = Mock(side_effect=responses)
+    pool = transport.ConnectionPool(factory=lambda: http, maxsize=1)
+    return client.Client(transport.HttpTransport(
+        URL_BASE, headers_factory=dict, pool=pool, hooks=hooks,
+        retry_policy=RetryPolicy(sleep=lambda seconds: None)))
+
+
+def test_endpoint_template():
+    eq_(endpoint_template('/item/12'), '/item/{id}')
+    eq_(endpoint_template('/item/app/3/filter/'), '/item/app/{id}/filter/')
+    eq_(endpoint_template('/space/url'), '/space/url')
+
+
+def test_hooks_see_every_request():
+    hook = Mock()
+    c = get_client([(Response(503), b''),
+                    (Response(200, **{'x-rate-limit-limit': '5000',
+                                      'x-rate-limit-remaining': '4321'}), b'{"a": 1}')],
+                   [hook])
+    c.Item.find(12)
+    info = hook.before_request.call_args[0][0]
+    eq_(hook.after_request.call_args[0][0], info)
+    eq_((info.method, info.endpoint, info.status), ('GET', '/item/{id}', 200))
+    eq_((info.retries, info.response_bytes, info.rate_limit_remaining), (1, 8, 4321))
+    assert info.latency >= 0
+
+
+def test_collector_aggregates_and_exports():
+    metrics = MetricsCollector(buckets=(1, 10))
+    c = get_client([(Response(200), b'{}'), (Response(200), b'{}'),
+                    (Response(404), b'{}'),
+                    (Response(200, **{'x-rate-limit-limit': '5000',
+                                      'x-rate-limit-remaining': '99'}), b'{}')],
+                   [metrics])
+    c.Item.find(1)
+    c.Item.find(2)
+    assert_raises(transport.TransportException, c.Item.find, 3)
+    c.Item.filter(7, {'limit': 1})
+
+    stats = metrics.snapshot()
+    eq_(stats[('GET', '/item/{id}')]['statuses'], {'200': 2, '404': 1})
+    eq_(stats[('POST', '/item/app/{id}/filter/')]['request_bytes'], len('{"limit": 1}'))
+
+    text = metrics.to_prometheus()
+    assert 'podio_requests_total{method="GET",endpoint="/item/{id}",status="404"} 1\n' in text
+    assert ('podio_request_duration_seconds_bucket'
+            '{method="GET",endpoint="/item/{id}",le="+Inf"} 3\n') in text
+    assert 'podio_request_duration_seconds_count{method="GET",endpoint="/item/{id}"} 3' in text
+    assert 'podio_rate_limit_remaining 99\n' in text
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.models
+"""
+import json
+
+from mock import Mock
+from nose.tools import eq_, assert_raises
+
+from pypodio2.models import ItemRecord
+from tests.utils import get_client_and_http
+
+ITEM = {
+    'item_id': 11,
+    'app_item_id': 3,
+    'app': {'app_id': 7, 'config': {'name': 'Projects'}},
+    'external_id': 'p-3',
+    'title': 'Launch',
+    'current_revision': {'revision': 4, 'created_by': {'name': 'Ann'}},
+    'last_edit_on': '2016-01-02 10:00:00',
+    'fields': [
+        {'field_id': 100, 'external_id': 'title', 'type': 'text', 'label': 'Title',
+         'config': {'settings': {'size': 'small'}},
+         'values': [{'value': 'Launch'}]},
+        {'field_id': 101, 'external_id': 'status', 'type': 'category', 'label': 'Status',
+         'values': [{'value': {'id': 2, 'text': 'Done', 'color': 'DCEBD8'}}]},
+        {'field_id': 102, 'external_id': 'owner', 'type': 'contact', 'label': 'Owner',
+         'values': [{'value': {'profile_id': 55, 'name': 'Ann', 'avatar': 1,
+                               'about': 'x' * 500}}]},
+        {'field_id': 103, 'external_id': 'customer', 'type': 'app', 'label': 'Customer',
+         'values': [{'value': {'item_id': 21, 'title': 'ACME',
+                               'app': {'app_id': 8, 'config': {'name': 'Customers'}}}},
+                    {'value': {'item_id': 22, 'title': 'Initech',
+                               'app': {'app_id': 8}}}]},
+        {'field_id': 104, 'external_id': 'due', 'type': 'date', 'label': 'Due',
+         'values': [{'start': '2016-01-01 00:00:00', 'end': None}]},
+        {'field_id': 105, 'external_id': 'notes', 'type': 'text', 'values': []},
+    ],
+}
+
+
+def test_item_record_lookup():
+    item = ItemRecord(ITEM)
+    eq_(item.item_id, 11)
+    eq_(item.app_id, 7)
+    eq_(item.revision, 4)
+    eq_(item['title'], 'Launch')
+    eq_(item[101], 'Done')
+    eq_(item['owner'], 55)
+    eq_(item.field('customer').values, [21, 22])
+    eq_(item['due'], '2016-01-01 00:00:00')
+    eq_(item['notes'], None)
+    eq_(item.get('missing', 'x'), 'x')
+    assert 'status' in item and 'missing' not in item
+    assert_raises(KeyError, lambda: item['missing'])
+    assert_raises(AttributeError, setattr, item, 'extra', 1)
+
+
+def test_item_record_to_dict_is_compact():
+    data = ItemRecord(ITEM).to_dict()
+    eq_(data['app'], {'app_id': 7})
+    fields = dict((f['external_id'], f) for f in data['fields'])
+    eq_(fields['owner']['values'], [{'value': {'profile_id': 55, 'name': 'Ann'}}])
+    eq_(fields['customer']['values'][0],
+        {'value': {'item_id': 21, 'title': 'ACME', 'app': {'app_id': 8}}})
+    assert 'config' not in fields['title']
+    eq_(data['last_edit_on'], '2016-01-02 10:00:00')
+    eq_(data['current_revision'], {'revision': 4})
+    record = ItemRecord(data)
+    eq_(record['customer'], 21)
+    eq_((record.revision, record.last_edit_on), (4, '2016-01-02 10:00:00'))
+
+
+def test_typed_find_and_filter():
+    client, http = get_client_and_http()
+    response = Mock()
+    response.status = 200
+    http.request = Mock(return_value=(response, json.dumps(ITEM)))
+    item = client.Item.find(11, typed=True)
+    eq_(type(item), ItemRecord)
+    eq_(item['status'], 'Done')
+
+    http.request = Mock(return_value=(response,
+                                      json.dumps({'filtered': 1, 'items': [ITEM]})))
+    result = client.Item.filter(7, {}, typed=True)
+    eq_(result['filtered'], 1)
+    eq_([i.item_id for i in result['items']], [11])
+    eq_([i.title for i in client.Item.iter_filter(7, typed=True)], ['Launch'])
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.pagination and the iter_* area methods built on it.
+"""
+
+import json
+
+from mock import Mock
+from nose.tools import eq_, assert_raises
+
+from pypodio2.pagination import iter_pages, iter_records
+from tests.utils import get_client_and_http, URL_BASE
+
+
+def make_fetch(total, max_limit=None):
+    calls = []
+
+    def fetch_page(offset, limit):
+        calls.append((offset, limit))
+        return list(range(offset, min(offset + min(limit, max_limit or limit), total)))
+    return fetch_page, calls
+
+
+def test_iter_records_walks_all_pages():
+    for prefetch in (False, True):
+        fetch_page, calls = make_fetch(25)
+        eq_(list(range(25)), list(iter_records(fetch_page, 10, prefetch=prefetch)))
+        eq_([(0, 10), (10, 10), (20, 10), (25, 10)], calls)
+
+
+def test_iter_pages_survives_capped_page_sizes():
+    for prefetch in (False, True):
+        fetch_page, calls = make_fetch(25, max_limit=10)
+        eq_(list(range(25)), list(iter_records(fetch_page, 20, prefetch=prefetch)))
+        eq_([(0, 20), (10, 20), (20, 20), (25, 20)], calls)
+
+
+def test_iter_pages_stops_at_known_total():
+    for prefetch in (False, True):
+        fetch_page, calls = make_fetch(25)
+        records = iter_records(fetch_page, 10, prefetch=prefetch, total=lambda: 25)
+        eq_(list(range(25)), list(records))
+        eq_([(0, 10), (10, 10), (20, 10)], calls)
+
+
+def test_iter_pages_stops_on_exact_multiple():
+    fetch_page, calls = make_fetch(20)
+    eq_([list(range(10)), list(range(10, 20))], list(iter_pages(fetch_page, 10)))
+    eq_([(0, 10), (10, 10), (20, 10)], calls)
+
+
+def test_iter_records_is_lazy():
+    fetch_page, calls = make_fetch(1000)
+    records = iter_records(fetch_page, 10)
+    eq_(0, next(records))
+    eq_([(0, 10)], calls)
+
+
+def test_item_iter_filter():
+    client, http = get_client_and_http()
+    response = Mock()
+    response.status = 200
+    pages = [{'filtered': 3, 'items': [{'item_id': 1}, {'item_id': 2}]},
+             {'filtered': 3, 'items': [{'item_id': 3}]}]
+    http.request = Mock(side_effect=[(response, json.dumps(p).encode('utf-8')) for p in pages])
+
+    items = list(client.Item.iter_filter(7, {'sort_by': 'created_on'}, limit=2))
+
+    eq_([1, 2, 3], [item['item_id'] for item in items])
+    bodies = [json.loads(call[1]['body']) for call in http.request.call_args_list]
+    eq_([{'sort_by': 'created_on', 'offset': 0, 'limit': 2},
+         {'sort_by': 'created_on', 'offset': 2, 'limit': 2}], bodies)
+
+
+def test_stream_iter_all_by_app_id():
+    client, http = get_client_and_http()
+    response = Mock()
+    response.status = 200
+    http.request = Mock(return_value=(response, b'[]'))
+
+    eq_([], list(client.Stream.iter_all_by_app_id(5, limit=30)))
+    url = http.request.call_args[0][0]
+    assert url.startswith(URL_BASE + '/stream/app/5/?'), url
+    assert 'limit=30' in url and 'offset=0' in url, url
+
+
+def test_iter_helpers_refuse_async_transports():
+    client, http = get_client_and_http()
+    client.transport.is_async = True
+    for iterate in (lambda: client.Item.iter_filter(7),
+                    lambda: client.Item.iter_filter_parallel(7),
+                    lambda: client.Application.iter_items(7),
+                    lambda: client.Stream.iter_all_by_app_id(5),
+                    lambda: client.Conversation.iter_all()):
+        assert_raises(TypeError, iterate)
+    eq_(0, http.request.call_count)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.polling
+"""
+from nose.tools import eq_
+
+from pypodio2.polling import StreamCursor
+
+
+class FakeStream(object):
+    """A stream newest first, recording how many objects each poll read."""
+
+    def __init__(self):
+        self.objects = []
+        self.reads = []
+
+    def add(self, obj_id, updated_on, obj_type='item'):
+        self.objects = [o for o in self.objects if (o['type'], o['id']) != (obj_type, obj_id)]
+        self.objects.insert(0, {'type': obj_type, 'id': obj_id,
+                                'last_update_on': '2016-01-01 00:00:%02d' % updated_on})
+
+    def iter_all(self, limit=30):
+        self.reads.append(0)
+        for obj in list(self.objects):
+            self.reads[-1] += 1
+            yield obj
+
+
+def ids(objects):
+    return [o['id'] for o in objects]
+
+
+def test_poll_returns_only_new_objects():
+    stream = FakeStream()
+    for i in range(1, 6):
+        stream.add(i, i)
+    cursor = StreamCursor(stream.iter_all, backlog=2)
+    eq_(ids(cursor.poll()), [5, 4])
+    eq_(ids(cursor.poll()), [])
+    # Reads stop at the first object older than the cursor.
+    eq_(stream.reads[-1], 2)
+
+    stream.add(6, 5)  # same second as the newest seen object
+    stream.add(2, 7)  # an update moves an object to the top
+    eq_(ids(cursor.poll()), [2, 6])
+    eq_(ids(cursor.poll()), [])
+
+
+def test_position_resumes_a_cursor():
+    stream = FakeStream()
+    stream.add(1, 1)
+    cursor = StreamCursor(stream.iter_all, backlog=1)
+    cursor.poll()
+    stream.add(2, 1, obj_type='status')
+    resumed = StreamCursor(stream.iter_all, position=cursor.position)
+    eq_([(o['type'], o['id']) for o in resumed.poll()], [('status', 2)])
+
+
+def test_interval_follows_activity():
+    now = [0]
+    stream = FakeStream()
+    cursor = StreamCursor(stream.iter_all, limit=10, min_interval=1, max_interval=60,
+                          clock=lambda: now[0])
+    stream.add(0, 0)
+    cursor.poll()
+    for i in range(1, 11):
+        stream.add(i, i)
+    now[0] += 10
+    cursor.poll()
+    # 1 object/s, aiming for half a page per poll.
+    eq_(cursor.interval, 5)
+    intervals = []
+    for _ in range(8):
+        now[0] += cursor.interval
+        cursor.poll()
+        intervals.append(cursor.interval)
+    eq_(intervals, sorted(intervals))
+    eq_(intervals[-1], 60)
+
+
+def test_watch_yields_oldest_first():
+    stream = FakeStream()
+    sleeps = []
+    cursor = StreamCursor(stream.iter_all, sleep=sleeps.append)
+    watch = cursor.watch()
+    stream.add(1, 1)
+    stream.add(2, 2)
+    cursor.poll()
+    stream.add(3, 3)
+    stream.add(4, 4)
+    eq_(ids([next(watch), next(watch)]), [3, 4])
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.ratelimit.RateLimiter and its use by HttpTransport.
+"""
+
+from mock import Mock
+from nose.tools import eq_, assert_raises
+
+from pypodio2.ratelimit import RateLimiter
+from pypodio2.transport import RateLimitException, TransportException
+from tests.utils import get_client_and_http
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def rate_limited_response(limit, remaining, status=200):
+    response = Mock()
+    response.status = status
+    response.get = {'x-rate-limit-limit': str(limit),
+                    'x-rate-limit-remaining': str(remaining)}.get
+    return response
+
+
+def make_limiter():
+    clock = FakeClock()
+    return RateLimiter(clock=clock, sleep=clock.sleep), clock
+
+
+def test_no_delay_without_headers():
+    limiter, clock = make_limiter()
+    for _ in range(100):
+        limiter.acquire()
+    eq_(1000.0, clock.now)
+
+
+def test_no_delay_with_plenty_of_budget():
+    limiter, clock = make_limiter()
+    limiter.update(rate_limited_response(3600, 3000))
+    for _ in range(100):
+        limiter.acquire()
+    eq_(1000.0, clock.now)
+
+
+def test_slows_down_progressively_when_budget_is_low():
+    limiter, clock = make_limiter()
+    limiter.update(rate_limited_response(3600, 300))
+    delays = []
+    for _ in range(300):
+        before = clock.now
+        limiter.acquire()
+        delays.append(clock.now - before)
+    assert delays[0] < delays[100] < delays[200] < delays[-1], delays[::50]
+    # Never slower than the refill rate of one request per second.
+    assert max(delays) <= 1.0
+
+
+def test_rate_limited_response_empties_bucket():
+    limiter, clock = make_limiter()
+    limiter.update(rate_limited_response(3600, 2000))
+    limiter.update(rate_limited_response(3600, 2000, status=420))
+    eq_(0.0, limiter.remaining)
+
+
+def test_transport_raises_rate_limit_exception():
+    client, http = get_client_and_http()
+    response = Mock()
+    response.status = 429
+    http.request = Mock(return_value=(response, b'{"error": "rate_limit"}'))
+    assert_raises(RateLimitException, client.Item.find, 1)
+    assert issubclass(RateLimitException, TransportException)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.recording
+"""
+import os
+import shutil
+import tempfile
+
+from httplib2 import Response
+from mock import Mock
+from nose.tools import eq_, assert_raises
+
+from pypodio2 import client, transport
+from pypodio2.recording import Recorder, Replayer, ReplayMiss
+from tests.utils import URL_BASE
+
+
+def make_client(factory):
+    pool = transport.ConnectionPool(factory=factory, maxsize=2)
+    return client.Client(transport.HttpTransport(
+        URL_BASE, headers_factory=lambda: {'authorization': 'OAuth2 secret'}, pool=pool))
+
+
+def fake_http():
+    def request(uri, method='GET', body=None, headers=None):
+        if uri.endswith('/raw'):
+            return Response({'status': '200'}), b'\xff\x00binary'
+        return (Response({'status': '200', 'x-rate-limit-remaining': '10'}),
+                ('{"uri": "%s", "body": %s}' % (uri, body or 'null')).encode('utf-8'))
+    http = Mock()
+    http.request = Mock(side_effect=request)
+    return http
+
+
+def test_record_and_replay():
+    directory = tempfile.mkdtemp()
+    try:
+        for name in ('calls.jsonl', 'calls.jsonl.gz'):
+            path = os.path.join(directory, name)
+            recorder = Recorder(path)
+            live = make_client(recorder.factory(fake_http))
+            first = live.Item.find(1)
+            live.Item.filter(2, {'limit': 1})
+            live.Item.filter(2, {'limit': 2})
+            live.Item.find(1)
+            raw = live.transport.GET(url='/file/3/raw', handler=lambda r, data: data)
+            recorder.close()
+
+            with open(path, 'rb') as f:
+                assert b'secret' not in f.read() or name.endswith('.gz')
+
+            sleeps = []
+            replayer = Replayer(path, speed=10, sleep=sleeps.append)
+            offline = make_client(replayer.factory)
+            eq_(replayer.remaining(), 5)
+            eq_(offline.Item.filter(2, {'limit': 2})['body'], {'limit': 2})
+            eq_(offline.Item.find(1), first)
+            eq_(offline.Item.filter(2, {'limit': 1})['body'], {'limit': 1})
+            eq_(offline.transport.GET(url='/file/3/raw', handler=lambda r, data: data), raw)
+            offline.Item.find(1)
+            assert_raises(ReplayMiss, offline.Item.find, 1)
+            assert_raises(ReplayMiss, offline.Item.find, 9)
+            eq_(replayer.remaining(), 0)
+            eq_(len(sleeps), 5)
+    finally:
+        shutil.rmtree(directory)
+
+
+def test_replay_falls_back_to_method_and_url():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'calls.jsonl')
+        recorder = Recorder(path)
+        make_client(recorder.factory(fake_http)).Item.filter(2, {'limit': 1})
+        recorder.close()
+        replayer = Replayer(path)
+        eq_(make_client(replayer.factory).Item.filter(2, {'limit': 5})['body'], {'limit': 1})
+    finally:
+        shutil.rmtree(directory)
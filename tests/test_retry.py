@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.retry.RetryPolicy and its use by HttpTransport.
+"""
+
+import socket
+
+from mock import Mock
+from nose.tools import eq_, assert_raises
+
+from pypodio2.retry import RetryPolicy
+from pypodio2.transport import TransportException
+from tests.utils import get_client_and_http
+
+
+def response_with(status, headers=None):
+    response = Mock()
+    response.status = status
+    response.get = dict(headers or {}).get
+    return response
+
+
+def client_with_retries(side_effect, policy):
+    client, http = get_client_and_http()
+    client.transport._retry_policy = policy
+    http.request = Mock(side_effect=side_effect)
+    return client, http
+
+
+def test_retries_transient_status_then_succeeds():
+    sleeps = []
+    policy = RetryPolicy(sleep=sleeps.append)
+    client, http = client_with_retries([(response_with(503), b''),
+                                        (response_with(502), b''),
+                                        (response_with(200), b'{"ok": 1}')], policy)
+    eq_({'ok': 1}, client.Item.find(1))
+    eq_(3, http.request.call_count)
+    eq_(2, len(sleeps))
+    assert 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0, sleeps
+
+
+def test_retries_socket_errors():
+    policy = RetryPolicy(sleep=lambda s: None)
+    client, http = client_with_retries([socket.error('reset'),
+                                        (response_with(200), b'{}')], policy)
+    eq_({}, client.Item.find(1))
+
+
+def test_gives_up_after_max_retries():
+    policy = RetryPolicy(max_retries=2, sleep=lambda s: None)
+    client, http = client_with_retries([(response_with(500), b'')] * 3, policy)
+    assert_raises(TransportException, client.Item.find, 1)
+    eq_(3, http.request.call_count)
+
+
+def test_honors_retry_after():
+    sleeps = []
+    policy = RetryPolicy(sleep=sleeps.append)
+    client, http = client_with_retries([(response_with(429, {'retry-after': '7'}), b''),
+                                        (response_with(200), b'{}')], policy)
+    client.Item.find(1)
+    eq_([7.0], sleeps)
+
+
+def test_does_not_retry_post_by_default():
+    policy = RetryPolicy(sleep=lambda s: None)
+    client, http = client_with_retries([(response_with(503), b'')] * 2, policy)
+    assert_raises(TransportException, client.Item.create, 1, {})
+    eq_(1, http.request.call_count)
+
+
+def test_per_call_override():
+    policy = RetryPolicy(sleep=lambda s: None)
+    client, http = client_with_retries([(response_with(503), b''),
+                                        (response_with(200), b'{}')], policy)
+    assert_raises(TransportException, client.transport.GET, url='/item/1', retry=False)
+
+    client, http = client_with_retries([(response_with(503), b''),
+                                        (response_with(200), b'{}')], policy)
+    post_policy = RetryPolicy(methods=('POST',), sleep=lambda s: None)
+    eq_({}, client.Item.filter(1, {}, retry=post_policy))
+    eq_(2, http.request.call_count)
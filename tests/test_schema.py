@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.schema.
+"""
+
+import json
+
+from mock import Mock
+from nose.tools import eq_, assert_raises
+
+from pypodio2.models import ItemRecord
+from pypodio2.schema import AppSchema, SchemaCache, SchemaError
+from tests.utils import get_client_and_http
+
+APP = {
+    'app_id': 7,
+    'current_revision': 3,
+    'fields': [
+        {'field_id': 100, 'external_id': 'title', 'type': 'text',
+         'config': {'label': 'Title', 'required': True}},
+        {'field_id': 101, 'external_id': 'status', 'type': 'category',
+         'config': {'label': 'Status', 'settings': {
+             'multiple': False,
+             'options': [{'id': 1, 'text': 'Open', 'status': 'active'},
+                         {'id': 2, 'text': 'Done', 'status': 'active'},
+                         {'id': 3, 'text': 'Old', 'status': 'deleted'}]}}},
+        {'field_id': 102, 'external_id': 'customer', 'type': 'app',
+         'config': {'label': 'Customer', 'settings': {'referenced_apps': [{'app_id': 8}]}}},
+        {'field_id': 103, 'external_id': 'gone', 'type': 'text', 'status': 'deleted',
+         'config': {'label': 'Gone'}},
+    ],
+}
+
+
+def test_lookups():
+    schema = AppSchema(APP)
+    eq_(100, schema.field_id('title'))
+    eq_('status', schema.field(101).external_id)
+    eq_(2, schema.option_id('status', 'Done'))
+    eq_(set([8]), schema.field('customer').referenced_app_ids)
+    assert_raises(SchemaError, schema.field, 'gone')
+
+
+def test_translate():
+    schema = AppSchema(APP)
+    eq_({100: 'Report', 101: 2, 102: [55]},
+        schema.translate({'title': 'Report', 'status': 'Done', 'customer': [55]}))
+    eq_({101: 1}, schema.translate({101: 1}))
+    eq_({102: [55, 56]}, schema.translate({
+        'customer': [(8, 55), ItemRecord({'item_id': 56, 'app': {'app_id': 8}})]}))
+
+
+def test_translate_rejects_bad_values():
+    schema = AppSchema(APP)
+    assert_raises(SchemaError, schema.translate, {'nope': 1})
+    assert_raises(SchemaError, schema.translate, {'status': 'Old'})
+    assert_raises(SchemaError, schema.translate, {'status': ['Open', 'Done']})
+    assert_raises(SchemaError, schema.translate, {'customer': ['acme']})
+    assert_raises(SchemaError, schema.translate, {'customer': [(9, 55)]})
+    assert_raises(SchemaError, schema.translate,
+                  {'customer': ItemRecord({'item_id': 56, 'app': {'app_id': 9}})})
+
+
+def test_missing_required():
+    schema = AppSchema(APP)
+    eq_(['title'], schema.missing_required({'status': 'Open'}))
+
+
+def test_cache_refetches_on_new_revision():
+    client, http = get_client_and_http()
+    response = Mock()
+    response.status = 200
+    http.request = Mock(return_value=(response, json.dumps(APP).encode('utf-8')))
+    cache = SchemaCache(client)
+
+    schema = cache.get(7)
+    assert cache.get(7) is schema
+    assert cache.get(7, revision=3) is schema
+    eq_(1, http.request.call_count)
+
+    cache.get(7, revision=4)
+    eq_(2, http.request.call_count)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.singleflight and single-flight GETs in HttpTransport.
+"""
+
+import json
+import threading
+import time
+
+from mock import Mock
+from nose.tools import eq_, assert_raises
+
+from pypodio2.singleflight import SingleFlight
+from pypodio2.transport import ConnectionPool, HttpTransport
+from tests.utils import URL_BASE
+
+
+class BlockingHttp(object):
+    """Holds every request until released, counting how many were sent."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def request(self, url, method, body=None, headers=None):
+        with self.lock:
+            self.requests.append((url, method))
+        self.release.wait()
+        response = Mock()
+        response.status = 200
+        return response, json.dumps({'url': url}).encode('utf-8')
+
+
+def run_concurrently(func, n):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(func())) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results
+
+
+def test_identical_gets_share_one_request():
+    http = BlockingHttp()
+    transport = HttpTransport(URL_BASE, dict, pool=ConnectionPool(lambda: http, maxsize=4),
+                              single_flight=True)
+
+    threads, results = run_concurrently(lambda: transport.GET(url='/app/1'), 10)
+    while transport._single_flight.in_flight() == 0:
+        time.sleep(0.001)
+    time.sleep(0.1)  # Let the other threads join the call in flight.
+    http.release.set()
+    for t in threads:
+        t.join()
+
+    eq_(1, len(http.requests))
+    eq_([{'url': URL_BASE + '/app/1'}] * 10, results)
+    # The call is forgotten once done.
+    transport.GET(url='/app/1')
+    eq_(2, len(http.requests))
+
+
+def test_different_urls_and_writes_are_not_collapsed():
+    http = BlockingHttp()
+    http.release.set()
+    transport = HttpTransport(URL_BASE, dict, pool=ConnectionPool(lambda: http, maxsize=4),
+                              single_flight=True)
+    transport.GET(url='/app/1')
+    transport.GET(url='/app/2')
+    transport.POST(url='/app/1/activate')
+    eq_(3, len(http.requests))
+
+
+def test_errors_are_shared():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError('boom')
+
+    assert_raises(ValueError, flight.do, 'key', fail)
+    eq_(0, flight.in_flight())
+    eq_(1, flight.do('key', lambda: 1))
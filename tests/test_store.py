@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.store
+"""
+from nose.tools import eq_, assert_raises
+
+from pypodio2.models import ItemRecord
+from pypodio2.store import SQLiteItemStore
+from pypodio2.sync import ChangeEvent, DELETED, UPDATED
+
+
+def make_item(item_id, status, amount, external_id=None, app_id=1):
+    return {
+        'item_id': item_id,
+        'app': {'app_id': app_id},
+        'external_id': external_id,
+        'last_edit_on': '2016-01-01 00:00:%02d' % item_id,
+        'fields': [
+            {'field_id': 10, 'external_id': 'status', 'type': 'category',
+             'values': [{'value': {'id': status, 'text': 'Option %d' % status}}]},
+            {'field_id': 11, 'external_id': 'amount', 'type': 'number',
+             'values': [{'value': '%d.0000' % amount}]},
+        ],
+    }
+
+
+def make_store(**kwargs):
+    store = SQLiteItemStore(**kwargs)
+    store.save_many([make_item(1, 1, 10, 'a'), make_item(2, 2, 20, 'b'),
+                     make_item(3, 1, 30, 'b'), make_item(4, 1, 40, app_id=2)])
+    return store
+
+
+def ids(response):
+    return [item['item_id'] for item in response['items']]
+
+
+def test_filter():
+    store = make_store()
+    eq_(ids(store.filter(1)), [3, 2, 1])
+
+    response = store.filter(1, {'filters': {'status': [1]}, 'sort_desc': False})
+    eq_((response['total'], response['filtered']), (3, 2))
+    eq_(ids(response), [1, 3])
+
+    eq_(ids(store.filter(1, {'filters': {11: {'from': 15, 'to': 30}}})), [3, 2])
+    eq_(ids(store.filter(1, {'filters': {'last_edit_on': {'from': '2016-01-01 00:00:02'}},
+                             'sort_by': 'amount', 'sort_desc': False})), [2, 3])
+    eq_(ids(store.filter(1, {'sort_by': 'status', 'sort_desc': False, 'limit': 2,
+                             'offset': 1})), [3, 2])
+
+
+def test_find_all_by_external_id_and_get():
+    store = make_store()
+    eq_(ids(store.find_all_by_external_id(1, 'b')), [2, 3])
+    eq_(store.get(4)['app'], {'app_id': 2})
+    eq_(store.get(99), None)
+
+
+def test_updates_replace_indexed_values():
+    store = make_store()
+    store.apply(ChangeEvent(UPDATED, 1, make_item(1, 2, 10, 'a')))
+    eq_(ids(store.filter(1, {'filters': {'status': 1}})), [3])
+    store.apply(ChangeEvent(DELETED, 3, None))
+    eq_(ids(store.filter(1, {'filters': {'status': 1}})), [])
+    store.save(ItemRecord(make_item(5, 1, 50)))
+    eq_(ids(store.filter(1, {'filters': {'status': 1}})), [5])
+    eq_(store.get(5)['last_edit_on'], '2016-01-01 00:00:05')
+    eq_(ids(store.filter(1, {'filters': {'last_edit_on': {'from': '2016-01-01 00:00:05'}}})),
+        [5])
+
+
+def test_only_chosen_fields_are_indexed():
+    store = make_store(indexed_fields=['status'])
+    eq_(ids(store.filter(1, {'filters': {'status': 2}})), [2])
+    assert_raises(ValueError, store.filter, 1, {'filters': {'amount': 10}})
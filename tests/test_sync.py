@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.sync
+"""
+import shutil
+import tempfile
+
+from nose.tools import eq_
+
+from pypodio2.sync import (ItemSync, MemoryCheckpointStore, FileCheckpointStore,
+                           CREATED, UPDATED, DELETED, ID_SCAN_FIELDS)
+
+
+class FakeItemArea(object):
+    """Serves Item.filter from ``items`` the way Podio does, counting calls."""
+
+    def __init__(self):
+        self.items = {}
+        self.calls = []
+
+    def put(self, item_id, last_edit_on):
+        self.items[item_id] = {'item_id': item_id, 'last_edit_on': last_edit_on}
+
+    def filter(self, app_id, attributes, **kwargs):
+        self.calls.append((attributes, kwargs))
+        since = attributes.get('filters', {}).get('last_edit_on', {}).get('from')
+        matching = sorted((i for i in self.items.values()
+                           if since is None or i['last_edit_on'] >= since),
+                          key=lambda i: i['last_edit_on'])
+        offset = attributes.get('offset', 0)
+        return {'total': len(self.items), 'filtered': len(matching),
+                'items': matching[offset:offset + attributes['limit']]}
+
+
+class FakeClient(object):
+    def __init__(self):
+        self.Item = FakeItemArea()
+
+
+def events(sync, **kwargs):
+    return [(e.type, e.item_id) for e in sync.run(**kwargs)]
+
+
+def test_initial_and_incremental_sync():
+    client = FakeClient()
+    for item_id in range(1, 6):
+        client.Item.put(item_id, '2016-01-01 00:00:0%d' % item_id)
+    sync = ItemSync(client, 1, MemoryCheckpointStore(), limit=2)
+
+    eq_(events(sync), [(CREATED, i) for i in range(1, 6)])
+
+    client.Item.calls = []
+    eq_(events(sync), [])
+    # Only one short page: the item at the checkpoint boundary.
+    eq_(len(client.Item.calls), 1)
+
+    client.Item.put(2, '2016-01-01 00:00:07')
+    client.Item.put(6, '2016-01-01 00:00:07')
+    eq_(events(sync), [(UPDATED, 2), (CREATED, 6)])
+    eq_(events(sync), [])
+
+
+def test_items_edited_within_the_checkpoint_second_are_not_missed():
+    client = FakeClient()
+    client.Item.put(1, '2016-01-01 00:00:01')
+    sync = ItemSync(client, 1, MemoryCheckpointStore())
+    events(sync)
+    client.Item.put(2, '2016-01-01 00:00:01')
+    eq_(events(sync), [(CREATED, 2)])
+
+
+def test_items_edited_during_a_run_do_not_shift_pages():
+    client = FakeClient()
+    for item_id in range(1, 6):
+        client.Item.put(item_id, '2016-01-01 00:00:0%d' % item_id)
+    sync = ItemSync(client, 1, MemoryCheckpointStore(), limit=2)
+    seen = []
+    for event in sync.run():
+        seen.append(event.item_id)
+        if event.item_id == 2:
+            # Moves item 1 to the end; with offsets, item 3 would be skipped.
+            client.Item.put(1, '2016-01-01 00:00:09')
+    eq_(seen, [1, 2, 3, 4, 5, 1])
+
+
+def test_more_items_than_a_page_edited_at_once():
+    client = FakeClient()
+    for item_id in range(1, 6):
+        client.Item.put(item_id, '2016-01-01 00:00:01')
+    sync = ItemSync(client, 1, MemoryCheckpointStore(), limit=2)
+    eq_(events(sync), [(CREATED, i) for i in range(1, 6)])
+    eq_(events(sync), [])
+
+
+def test_deletions_are_detected_from_the_item_count():
+    client = FakeClient()
+    for item_id in range(1, 4):
+        client.Item.put(item_id, '2016-01-01 00:00:0%d' % item_id)
+    sync = ItemSync(client, 1, MemoryCheckpointStore())
+    events(sync)
+
+    del client.Item.items[1]
+    client.Item.calls = []
+    eq_(events(sync), [(DELETED, 1)])
+    eq_(client.Item.calls[-1][1], {'GET': {'fields': ID_SCAN_FIELDS}})
+
+    # New items are counted before comparing, so they can't hide a deletion.
+    del client.Item.items[2]
+    client.Item.put(4, '2016-01-01 00:00:04')
+    eq_(events(sync), [(CREATED, 4), (DELETED, 2)])
+
+    client.Item.calls = []
+    eq_(events(sync), [])
+    eq_(len(client.Item.calls), 1)
+    eq_(events(sync, full_scan=True), [])
+    eq_(len(client.Item.calls), 3)
+
+
+def test_file_checkpoint_store():
+    directory = tempfile.mkdtemp()
+    try:
+        client = FakeClient()
+        client.Item.put(1, '2016-01-01 00:00:01')
+        events(ItemSync(client, 7, FileCheckpointStore(directory)))
+        checkpoint = FileCheckpointStore(directory).get(7)
+        eq_(checkpoint.last_edit_on, '2016-01-01 00:00:01')
+        eq_(checkpoint.item_id, 1)
+        eq_(checkpoint.known_ids, set([1]))
+        eq_(FileCheckpointStore(directory).get(8), None)
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.transport.HttpTransport and its connection pool.
+"""
+
+import json
+import threading
+
+from mock import Mock
+from nose.tools import eq_, assert_raises
+
+from pypodio2.transport import ConnectionPool, HttpTransport, PoolTimeout
+from tests.utils import URL_BASE
+
+
+def _ok_response():
+    response = Mock()
+    response.status = 200
+    return response
+
+
+class EchoHttp(object):
+    """Stands in for httplib2.Http, echoing the requested URL and method."""
+
+    def __init__(self):
+        self.in_use = threading.Lock()
+
+    def request(self, url, method, body=None, headers=None):
+        if not self.in_use.acquire(False):
+            raise AssertionError('connection used by two threads at once')
+        try:
+            return _ok_response(), json.dumps({'url': url, 'method': method}).encode('utf-8')
+        finally:
+            self.in_use.release()
+
+
+def test_dynamic_attribute_syntax():
+    transport = HttpTransport(URL_BASE, dict, pool=ConnectionPool(EchoHttp, maxsize=1))
+    eq_({'url': URL_BASE + '/user/status', 'method': 'GET'}, transport.GET.user.status())
+    eq_({'url': URL_BASE + '/item/12', 'method': 'DELETE'}, transport.DELETE.item['12']())
+
+
+def test_builders_do_not_share_state():
+    transport = HttpTransport(URL_BASE, dict, pool=ConnectionPool(EchoHttp, maxsize=1))
+    put = transport.PUT.item
+    get = transport.GET.app
+    eq_({'url': URL_BASE + '/app/1', 'method': 'GET'}, get(1))
+    eq_({'url': URL_BASE + '/item/2', 'method': 'PUT'}, put(2, type='text/plain', body=''))
+
+
+def test_concurrent_requests_on_shared_transport():
+    transport = HttpTransport(URL_BASE, dict, pool=ConnectionPool(EchoHttp, maxsize=4))
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(50):
+                method = 'GET' if n % 2 else 'DELETE'
+                path = '/thing/%s/%s' % (n, i)
+                result = getattr(transport, method)(url=path)
+                eq_({'url': URL_BASE + path, 'method': method}, result)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    eq_([], errors)
+    assert transport.backend.pool._created <= 4
+
+
+def test_pool_is_bounded():
+    pool = ConnectionPool(object, maxsize=1, timeout=0.01)
+    conn = pool.acquire()
+    assert_raises(PoolTimeout, pool.acquire)
+    pool.release(conn)
+    assert pool.acquire() is conn
+
+
+def test_pool_discards_connection_on_error():
+    pool = ConnectionPool(object, maxsize=1, timeout=0.01)
+
+    def fail():
+        with pool.connection():
+            raise IOError('connection reset')
+
+    assert_raises(IOError, fail)
+    eq_(0, pool._created)
+    assert pool.acquire() is not None
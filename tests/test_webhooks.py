@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Unit tests for pypodio2.webhooks
+"""
+import io
+import threading
+
+from mock import Mock, patch
+from nose.tools import eq_
+
+from pypodio2.webhooks import WebhookReceiver
+
+
+def post(app, body, content_type='application/x-www-form-urlencoded'):
+    body = body.encode('utf-8')
+    statuses = []
+    app({'REQUEST_METHOD': 'POST', 'CONTENT_LENGTH': str(len(body)),
+         'CONTENT_TYPE': content_type, 'wsgi.input': io.BytesIO(body)},
+        lambda status, headers: statuses.append(status))
+    return statuses[0]
+
+
+def test_verify_is_validated_and_events_dispatched():
+    client = Mock()
+    events = []
+    app = WebhookReceiver(client, events.append, workers=2)
+    eq_(post(app, 'type=hook.verify&hook_id=12&code=abc'), '200 OK')
+    eq_(post(app, 'type=item.create&hook_id=12&item_id=5&item_revision_id=0'), '200 OK')
+    eq_(post(app, '{"type": "item.update", "hook_id": 12, "item_id": 5}',
+             content_type='application/json'), '200 OK')
+    app.join()
+    client.Hook.validate.assert_called_once_with(12, 'abc')
+    eq_(sorted(e.type for e in events), ['item.create', 'item.update'])
+    eq_(events[0].params['item_id'], '5')
+    app.stop()
+
+
+def test_handler_errors_are_logged_unless_on_error_is_set():
+    def handler(event):
+        raise ValueError(event.params['item_id'])
+
+    with patch('pypodio2.webhooks.log') as log:
+        app = WebhookReceiver(Mock(), handler, workers=1)
+        post(app, 'type=item.create&hook_id=12&item_id=5')
+        app.join()
+        app.stop()
+    eq_(1, log.exception.call_count)
+
+    errors = []
+    with patch('pypodio2.webhooks.log') as log:
+        app = WebhookReceiver(Mock(), handler, workers=1,
+                              on_error=lambda event, e: errors.append(str(e)))
+        post(app, 'type=item.create&hook_id=12&item_id=6')
+        app.join()
+        app.stop()
+    eq_(['6'], errors)
+    eq_(0, log.exception.call_count)
+
+
+def test_retries_are_deduplicated():
+    now = [1000]
+    events = []
+    app = WebhookReceiver(Mock(), events.append, dedupe_window=60, clock=lambda: now[0])
+    body = 'type=item.update&hook_id=1&item_id=5&item_revision_id=3'
+    eq_(post(app, body), '200 OK')
+    eq_(post(app, body), '200 OK')
+    eq_(post(app, 'type=item.update&hook_id=1&item_id=5&item_revision_id=4'), '200 OK')
+    now[0] += 61
+    eq_(post(app, body), '200 OK')
+    app.join()
+    eq_(len(events), 3)
+    app.stop()
+
+
+def test_full_queue_is_refused():
+    gate = threading.Event()
+    errors = []
+    app = WebhookReceiver(Mock(), lambda event: gate.wait(), workers=1, queue_size=1,
+                          on_error=lambda event, e: errors.append(e))
+    eq_(post(app, 'type=item.create&hook_id=1&item_id=1'), '200 OK')
+    # Wait for the worker to take the first event, leaving room for one.
+    while app._queue.qsize():
+        gate.wait(0.01)
+    eq_(post(app, 'type=item.create&hook_id=1&item_id=2'), '200 OK')
+    eq_(post(app, 'type=item.create&hook_id=1&item_id=3'), '503 Service Unavailable')
+    gate.set()
+    app.join()
+    # Refused callbacks are not remembered, so Podio's retry gets through.
+    eq_(post(app, 'type=item.create&hook_id=1&item_id=3'), '200 OK')
+    app.stop()
+    eq_(errors, [])
+
+
+def test_malformed_callbacks():
+    app = WebhookReceiver(Mock(), Mock(), workers=1)
+    eq_(post(app, 'item_id=1'), '400 Bad Request')
+    eq_(post(app, '[1]', content_type='application/json'), '400 Bad Request')
+    statuses = []
+    app({'REQUEST_METHOD': 'GET'}, lambda status, headers: statuses.append(status))
+    eq_(statuses, ['405 Method Not Allowed'])
+    app.stop()
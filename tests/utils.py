@@ -10,6 +10,7 @@ from nose.tools import eq_
 
 import pypodio2.client
 import pypodio2.transport
+from pypodio2.compression import negotiate
 
 # Just in case actual HTTP calls are made, don't use a real URL
 URL_BASE = 'https://api.example.com'
@@ -20,13 +21,12 @@ def get_client_and_http():
     Gets a pypodio2.client.Client instance and a mocked instance of
     httplib2.Http that backs it. Returned as (client, Http)
     """
+    http = Mock()
+    pool = pypodio2.transport.ConnectionPool(factory=lambda: http, maxsize=1)
     transport = pypodio2.transport.HttpTransport(
-        URL_BASE, headers_factory=dict)
+        URL_BASE, headers_factory=dict, pool=pool)
     client = pypodio2.client.Client(transport)
 
-    http = Mock()
-    transport._http = http
-
     return client, http
 
 
@@ -81,6 +81,7 @@ def check_client_method():
         http.request.assert_called_once_with(URL_BASE + expected_path,
                                              http_method,
                                              body=expected_body,
-                                             headers=expected_headers)
+                                             # The backend asks for compression.
+                                             headers=negotiate(expected_headers))
 
     return client, check_assertions